@@ -22,6 +22,9 @@ try:
     from components.class_reports import render_class_reports
     from components.analytics import render_analytics
     from components.upload import render
+    from components.performance import render_performance_panel, render_slow_query_log
+    from config.database import DatabaseConfig
+    from utils import instrumentation
 except ImportError as e:
     st.error(f"Import Error: {e}")
     st.error("Please ensure all required files are present in the repository.")
@@ -46,26 +49,32 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 def main():
+    instrumentation.start_run()
     try:
         # Render sidebar and get navigation state
         sidebar_state = render_sidebar()
+        page = sidebar_state['page']
+        instrumentation.registry.set_page(page)
         
         # Route to appropriate page
-        if sidebar_state['page'] == "🏠 Home":
-            render_home()
-        elif sidebar_state['page'] == "👤 Student Reports":
-            render_student_reports()
-        elif sidebar_state['page'] == "🎓 Class Reports":
-            render_class_reports()
-        elif sidebar_state['page'] == "📈 Analytics":
-            render_analytics()
-        elif sidebar_state['page'] == "Upload Results":
-            render()
-        elif sidebar_state['page'] == "⚙️ Settings":
-            render_settings()
+        with instrumentation.timer('page', page):
+            if page == "🏠 Home":
+                render_home()
+            elif page == "👤 Student Reports":
+                render_student_reports()
+            elif page == "🎓 Class Reports":
+                render_class_reports()
+            elif page == "📈 Analytics":
+                render_analytics()
+            elif page == "Upload Results":
+                render()
+            elif page == "⚙️ Settings":
+                render_settings()
     except Exception as e:
         st.error(f"Application Error: {e}")
         st.error("Please check your database configuration and ensure all files are properly set up.")
+    finally:
+        instrumentation.write_textfile()
 
 def render_home():
     """Render home page"""
@@ -95,5 +104,57 @@ def render_settings():
     - Add your database credentials in the secrets section
     """)
 
+    db_config = DatabaseConfig()
+    if db_config.embedded:
+        st.caption(f"Backend: embedded {db_config.backend} database at `{db_config.path}`")
+    else:
+        st.caption(f"Backend: MySQL `{db_config.database}` on {db_config.host}:{db_config.port}")
+
+    st.subheader("Database Health")
+
+    if st.button("Check now"):
+        db_config.health_monitor.check()
+    health = db_config.health()
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.metric("Status", {True: "Up", False: "Down", None: "Checking"}[health['healthy']])
+    with col2:
+        st.metric("Ping", f"{health['latency_ms']:.1f} ms" if health['latency_ms'] is not None else "-")
+    with col3:
+        st.metric("Failed Checks", health['consecutive_failures'])
+
+    if health['last_error']:
+        st.caption(f"Last error: {health['last_error']}")
+
+    # Embedded databases are opened per request and have no pool
+    if not db_config.embedded:
+        render_pool_stats(db_config)
+
+    render_performance_panel()
+    render_slow_query_log()
+
+def render_pool_stats(db_config):
+    """Render connection pool usage"""
+    st.subheader("Connection Pool")
+
+    pool_stats = db_config.pool_stats()
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric("In Use", f"{pool_stats['in_use']} / {pool_stats['size']}")
+    with col2:
+        st.metric("Idle", pool_stats['idle'])
+    with col3:
+        st.metric("Checkouts", pool_stats['checkouts'])
+    with col4:
+        st.metric("Avg Wait", f"{pool_stats['avg_wait_ms']:.1f} ms")
+
+    st.caption(
+        f"Connections created: {pool_stats['created']} · "
+        f"discarded: {pool_stats['discarded']} · "
+        f"checkout timeouts: {pool_stats['timeouts']}"
+    )
+
 if __name__ == "__main__":
     main()
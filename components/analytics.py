@@ -1,33 +1,37 @@
+import time
 import streamlit as st
 import plotly.express as px
-from services.database_service import DatabaseService
 from services.report_service import ReportService
+from utils.helpers import show_load_time
 
 def render_analytics():
     """Render analytics page"""
     st.title("📈 Advanced Analytics")
     
-    db_service = DatabaseService()
     report_service = ReportService()
+    db_service = report_service.db_service
     
     # Get available data
-    exams_df = db_service.get_available_exams()
+    exam_catalog = db_service.get_exam_catalog()
     
-    if exams_df.empty:
+    if not exam_catalog:
         st.warning("No exam data available for analytics")
         return
     
     st.subheader("📊 Exam Comparison")
     
     # Exam selection for comparison
-    exam_options = [f"{row['EXNM']} ({row['ExID']})" for _, row in exams_df.iterrows()]
-    selected_exam = st.selectbox("Select Exam for Analysis", exam_options)
+    exam_id = st.selectbox(
+        "Select Exam for Analysis",
+        exam_catalog.options(),
+        format_func=exam_catalog.format_func()
+    )
     
-    if selected_exam:
-        exam_id = selected_exam.split("(")[-1].replace(")", "")
-        
+    if exam_id:
         # Generate comparative analysis
+        started = time.perf_counter()
         analysis = report_service.generate_comparative_analysis(exam_id)
+        show_load_time(started, db_service.last_fetch)
         
         if analysis:
             # Display overall statistics
@@ -45,11 +49,11 @@ def render_analytics():
             
             if not analysis['class_performance'].empty:
                 # Create comparison chart
-                class_data = analysis['class_performance'].reset_index()
+                class_data = analysis['class_performance']
                 
                 fig = px.bar(
                     x=class_data.index,
-                    y=class_data[('ExMk', 'mean')],
+                    y=class_data['Average'],
                     title="Average Scores by Class",
                     labels={'x': 'Class', 'y': 'Average Score'}
                 )
@@ -60,5 +64,64 @@ def render_analytics():
                 st.dataframe(analysis['class_performance'])
             else:
                 st.info("No class performance data available")
+            
+            # Student-level rows are only fetched when asked for
+            if st.toggle("📋 Show student-level results", key="analytics_show_rows"):
+                rows = db_service.get_exam_results(exam_id=exam_id, columns="summary")
+                if not rows.empty:
+                    st.dataframe(
+                        rows[['STNAME', 'ROLLNO', 'CLASS', 'ExMk', 'ExRnk', 'ClassExRnk']],
+                        column_config={
+                            'STNAME': 'Student Name',
+                            'ROLLNO': 'Roll Number',
+                            'CLASS': 'Class',
+                            'ExMk': 'Total Marks',
+                            'ExRnk': 'Rank',
+                            'ClassExRnk': 'Class Rank'
+                        },
+                        hide_index=True
+                    )
+            
+            render_item_analysis(db_service, exam_id)
         else:
             st.error("Unable to generate analysis for selected exam")
+
+def render_item_analysis(db_service, exam_id):
+    """Per-question difficulty and discrimination from the question response store"""
+    st.subheader("🧩 Item Analysis")
+    
+    items = db_service.get_item_analysis(exam_id)
+    if items.empty:
+        st.info("No question-level responses stored for this exam")
+        return
+    
+    subjects = items[['SubjectNo', 'Subject']].drop_duplicates()
+    subject_no = st.selectbox(
+        "Subject",
+        subjects['SubjectNo'].tolist(),
+        format_func=dict(zip(subjects['SubjectNo'], subjects['Subject'])).get,
+        key="item_analysis_subject"
+    )
+    subject_items = items[items['SubjectNo'] == subject_no]
+    
+    fig = px.scatter(
+        subject_items,
+        x='difficulty',
+        y='discrimination',
+        hover_name='Question',
+        title="Difficulty vs Discrimination",
+        labels={'difficulty': 'Difficulty (share correct)', 'discrimination': 'Discrimination Index'}
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    st.dataframe(
+        subject_items.drop(columns=['SubjectNo', 'Subject']).round(3),
+        column_config={
+            'difficulty': 'Difficulty',
+            'discrimination': 'Discrimination',
+            'incorrect_rate': 'Incorrect Rate',
+            'skip_rate': 'Skip Rate',
+            'point_biserial': 'Point-Biserial'
+        },
+        hide_index=True
+    )
@@ -1,21 +1,31 @@
+import os
+import tempfile
+import time
+import pandas as pd
 import streamlit as st
-import plotly.express as px
-from services.database_service import DatabaseService
+from services.database_service import RESULT_SORT_COLUMNS
+from services.export_service import EXPORT_FORMATS, ExportService
 from services.report_service import ReportService
-from utils.visualizations import create_class_distribution_chart, create_subject_comparison_chart
+from utils.helpers import show_load_time
+from utils.visualizations import create_class_distribution_chart, create_subject_comparison_chart, figure_payload_size
 
 def render_class_reports():
     """Render class reports page"""
     st.title("🎓 Class Performance Reports")
     
-    db_service = DatabaseService()
     report_service = ReportService()
+    db_service = report_service.db_service
+    
+    started = time.perf_counter()
     
     # Get available classes and exams
-    classes = db_service.get_available_classes()
-    exams_df = db_service.get_available_exams()
+    catalogs = db_service.fetch_all({
+        'classes': db_service.get_class_catalog,
+        'exams': db_service.get_exam_catalog,
+    })
+    class_catalog, exam_catalog = catalogs['classes'], catalogs['exams']
     
-    if not classes:
+    if not class_catalog:
         st.warning("No class data available")
         return
     
@@ -23,19 +33,24 @@ def render_class_reports():
     col1, col2 = st.columns(2)
     
     with col1:
-        selected_class = st.selectbox("Select Class", classes, key="class_report_class_select")
+        selected_class = st.selectbox(
+            "Select Class",
+            class_catalog.options(),
+            format_func=class_catalog.format_func(),
+            key="class_report_class_select"
+        )
     
     with col2:
-        exam_options = ["All Exams"] + [f"{row['EXNM']} ({row['ExID']})" for _, row in exams_df.iterrows()]
-        selected_exam = st.selectbox("Select Exam", exam_options, key="class_report_exam_select")
-    
-    # Extract exam ID
-    exam_id = None
-    if selected_exam != "All Exams":
-        exam_id = selected_exam.split("(")[-1].replace(")", "")
+        exam_id = st.selectbox(
+            "Select Exam",
+            exam_catalog.options("All Exams"),
+            format_func=exam_catalog.format_func("All Exams"),
+            key="class_report_exam_select"
+        )
     
     # Generate report
     report = report_service.generate_class_report(selected_class, exam_id)
+    show_load_time(started, db_service.last_fetch)
     
     if report:
         # Class overview
@@ -56,7 +71,11 @@ def render_class_reports():
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            st.metric("Median Score", f"{report['score_statistics']['median']:.1f}")
+            if report['score_statistics'].get('median_exact', True):
+                st.metric("Median Score", f"{report['score_statistics']['median']:.1f}")
+            else:
+                st.metric("Median Score (approx.)", f"{report['score_statistics']['median']:.1f}",
+                          help="Merged from the per-exam quantile summaries; select one exam for the exact median")
         with col2:
             st.metric("Standard Deviation", f"{report['score_statistics']['std_dev']:.1f}")
         with col3:
@@ -67,8 +86,9 @@ def render_class_reports():
         
         with col1:
             st.subheader("📈 Score Distribution")
-            fig = create_class_distribution_chart(report['data'])
+            fig = create_class_distribution_chart(histogram=report['score_histogram'])
             st.plotly_chart(fig, use_container_width=True)
+            st.caption(f"Chart payload: {figure_payload_size(fig) / 1024:.1f} KB")
         
         with col2:
             st.subheader("🎯 Subject Averages")
@@ -86,19 +106,135 @@ def render_class_reports():
             }
         )
         
-        # Detailed results
-        with st.expander("📋 Detailed Results"):
-            display_columns = ['STNAME', 'ROLLNO', 'ExMk', 'ExRnk', 'S1Mk', 'S2Mk', 'S3Mk', 'S4Mk']
-            st.dataframe(
-                report['data'][display_columns],
-                column_config={
-                    'STNAME': 'Student Name',
-                    'ROLLNO': 'Roll Number',
-                    'ExMk': 'Total Marks',
-                    'ExRnk': 'Rank',
-                    'S1Mk': 'Physics',
-                    'S2Mk': 'Chemistry',
-                    'S3Mk': 'Botany',
-                    'S4Mk': 'Zoology'
-                }
+        # Detailed results, one page at a time and only when asked for
+        if st.toggle("📋 Show detailed results", key="class_report_show_rows"):
+            render_results_grid(db_service, selected_class, exam_id, report['subject_columns'])
+        
+        render_report_card_export(report_service, selected_class, exam_id)
+
+RESULTS_PAGE_SIZE = 50
+
+SORT_LABELS = {
+    'ExRnk': 'Rank',
+    'ClassExRnk': 'Class Rank',
+    'ExMk': 'Total Marks',
+    'STNAME': 'Student Name',
+    'ROLLNO': 'Roll Number',
+}
+
+def _page_key(row, sort):
+    # Plain Python values, so the key can be cached and sent as query parameters;
+    # rows without a sort value come last and are paged by (STID, ExID) alone
+    values = tuple(value.item() if hasattr(value, 'item') else value for value in row[[sort, 'STID', 'ExID']])
+    missing = bool(pd.isna(values[0]))
+    return (missing, None if missing else values[0]) + values[1:]
+
+def render_results_grid(db_service, class_name, exam_id, subject_columns):
+    """Keyset-paginated result rows with server-side sorting and name/roll search"""
+    col1, col2, col3 = st.columns([2, 1, 2])
+    
+    with col1:
+        sort = st.selectbox("Sort by", list(SORT_LABELS), format_func=SORT_LABELS.get,
+                            key="results_grid_sort")
+    with col2:
+        descending = st.toggle("Descending", value=RESULT_SORT_COLUMNS[sort] == 'DESC',
+                               key=f"results_grid_desc_{sort}")
+    with col3:
+        search = st.text_input("Search", placeholder="Name or roll number starts with...",
+                               key="results_grid_search")
+    
+    # Stack of page keys: the last entry is where the current page starts
+    grid_key = (class_name, exam_id, sort, descending, search)
+    if st.session_state.get('results_grid_key') != grid_key:
+        st.session_state['results_grid_key'] = grid_key
+        st.session_state['results_grid_pages'] = [None]
+    pages = st.session_state['results_grid_pages']
+    
+    columns = ['STID', 'ExID', 'STNAME', 'ROLLNO', 'EXNM', 'ExMk', 'ExRnk', 'ClassExRnk'] + list(subject_columns)
+    rows = db_service.get_results_page(
+        class_name, exam_id, sort=sort, descending=descending, search=search,
+        after=pages[-1], limit=RESULTS_PAGE_SIZE + 1, columns=columns
+    )
+    has_next = len(rows) > RESULTS_PAGE_SIZE
+    rows = rows.head(RESULTS_PAGE_SIZE)
+    
+    if rows.empty:
+        st.info("No matching results")
+    else:
+        st.dataframe(
+            rows.drop(columns=['STID', 'ExID']),
+            column_config={
+                'STNAME': 'Student Name',
+                'ROLLNO': 'Roll Number',
+                'EXNM': 'Exam',
+                'ExMk': 'Total Marks',
+                'ExRnk': 'Rank',
+                'ClassExRnk': 'Class Rank',
+                **subject_columns
+            },
+            hide_index=True
+        )
+    
+    first_row = (len(pages) - 1) * RESULTS_PAGE_SIZE + 1
+    col1, col2, col3 = st.columns([1, 2, 1])
+    
+    with col1:
+        if st.button("◀ Previous", disabled=len(pages) == 1, key="results_grid_prev"):
+            pages.pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Rows {first_row:,}–{first_row + len(rows) - 1:,}" if len(rows) else "")
+    with col3:
+        if st.button("Next ▶", disabled=not has_next, key="results_grid_next"):
+            pages.append(_page_key(rows.iloc[-1], sort))
+            st.rerun()
+
+def render_report_card_export(report_service, class_name, exam_id=None):
+    """Bulk export of one report card per student of the class (and exam) as a ZIP"""
+    with st.expander("📦 Export Report Cards"):
+        fmt = st.radio("Format", EXPORT_FORMATS, format_func=str.upper, horizontal=True,
+                       key="report_card_format")
+        
+        if st.button("Generate Report Cards", key="report_card_export"):
+            try:
+                service = ExportService(fmt)
+            except ImportError as e:
+                st.error(str(e))
+                return
+            
+            with st.spinner("Building student reports..."):
+                reports = report_service.generate_student_reports(class_name, exam_id)
+            if not reports:
+                st.warning("No students found for this selection")
+                return
+            
+            progress = st.progress(0.0, text="Rendering report cards...")
+            on_progress = lambda done, total: progress.progress(
+                done / total, text=f"Rendered {done:,} of {total:,} report cards"
+            )
+            
+            handle, path = tempfile.mkstemp(suffix=".zip")
+            os.close(handle)
+            summary = service.export(reports, path, on_progress=on_progress)
+            
+            previous = st.session_state.get('report_card_zip')
+            if previous and os.path.exists(previous['path']):
+                os.remove(previous['path'])
+            st.session_state['report_card_zip'] = {
+                'path': path,
+                'file_name': f"report_cards_{class_name}_{exam_id or 'all'}_{fmt}.zip",
+                'summary': summary
+            }
+        
+        export = st.session_state.get('report_card_zip')
+        if export and os.path.exists(export['path']):
+            summary = export['summary']
+            st.success(
+                f"{summary.cards:,} report cards in {summary.elapsed_seconds:.1f}s "
+                f"({summary.cards_per_second:,.1f} cards/s on {summary.workers} workers)"
             )
+            if summary.failed:
+                st.warning(f"{len(summary.failed)} cards failed: {summary.failed[0]}")
+            with open(export['path'], 'rb') as archive:
+                st.download_button("Download ZIP", archive, file_name=export['file_name'],
+                                   mime="application/zip")
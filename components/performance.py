@@ -0,0 +1,128 @@
+import json
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from utils import instrumentation
+
+# Seconds between refreshes of the live panel
+LIVE_REFRESH_SECONDS = 5
+
+
+def _previous_run_table(run):
+    """Events of one rerun, slowest first"""
+    df = pd.DataFrame([
+        {
+            'Kind': event.kind,
+            'Name': event.name,
+            'ms': event.seconds * 1000,
+            'Rows': event.rows,
+            'KB': event.bytes / 1024 if event.bytes is not None else None,
+            'Cache': {True: "hit", False: "miss", None: ""}[event.cache_hit],
+        }
+        for event in run['events']
+    ])
+    return df.sort_values('ms', ascending=False).round(1) if not df.empty else df
+
+
+def _aggregate_table(stats):
+    """One row per (kind, name) with count, latency, volume and cache hit rate"""
+    rows = []
+    for s in stats:
+        p95 = instrumentation.percentile(s, 0.95)
+        rows.append({
+            'Kind': s.kind,
+            'Name': s.name,
+            'Calls': s.count,
+            'Total s': s.seconds,
+            'Mean ms': s.mean_seconds * 1000,
+            'p95 ms': p95 * 1000 if p95 is not None else None,
+            'Max ms': s.max_seconds * 1000,
+            'Rows': s.rows if s.kind == 'query' else None,
+            'MB': s.bytes / 1024 ** 2 if s.kind == 'query' else None,
+            'Hit rate': s.hit_rate * 100 if s.hit_rate is not None else None,
+        })
+    return pd.DataFrame(rows).round(3)
+
+
+def _render_metrics():
+    run = instrumentation.registry.previous_run()
+    if run:
+        st.caption(f"Previous rerun: {run['page'] or 'unknown page'} · {run['seconds'] * 1000:,.0f} ms · "
+                   f"{len(run['events'])} events")
+        st.dataframe(_previous_run_table(run), use_container_width=True, hide_index=True)
+
+    stats = instrumentation.registry.stats()
+    st.markdown("**Since start**")
+    if not stats:
+        st.info("Nothing recorded yet.")
+    else:
+        st.dataframe(
+            _aggregate_table(stats), use_container_width=True, hide_index=True,
+            column_config={'Hit rate': st.column_config.NumberColumn(format="%.0f%%")}
+        )
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.download_button("Download JSON", json.dumps(instrumentation.snapshot(), indent=2),
+                           file_name="metrics.json", mime="application/json")
+    with col2:
+        st.download_button("Download Prometheus", instrumentation.prometheus_text(),
+                           file_name="metrics.prom", mime="text/plain")
+    with col3:
+        st.button("Reset counters", on_click=instrumentation.registry.reset)
+
+
+def render_performance_panel():
+    """Timings of queries, cache lookups, report compute, charts and pages"""
+    st.subheader("Performance")
+    live = st.toggle(f"Live (refresh every {LIVE_REFRESH_SECONDS} s)")
+    st.fragment(_render_metrics, run_every=LIVE_REFRESH_SECONDS if live else None)()
+
+
+def _set_slow_query_threshold():
+    instrumentation.slow_queries.threshold_seconds = st.session_state['slow_query_ms'] / 1000
+
+
+def render_slow_query_log():
+    """Recent queries over the slow query threshold with their EXPLAIN plans"""
+    log = instrumentation.slow_queries
+    st.subheader("Slow Queries")
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        # Applies to the whole app process, not only this session
+        st.number_input("Log queries slower than (ms)", min_value=0, step=100,
+                        value=int(log.threshold_seconds * 1000), key="slow_query_ms",
+                        on_change=_set_slow_query_threshold)
+    with col2:
+        st.button("Clear log", on_click=log.clear)
+
+    entries = log.entries()
+    if not entries:
+        st.info("No slow queries logged.")
+        return
+
+    st.dataframe(pd.DataFrame([
+        {
+            'Logged': datetime.fromtimestamp(entry.logged_at).strftime('%H:%M:%S'),
+            'Query': entry.what,
+            'ms': round(entry.seconds * 1000, 1),
+            'Rows': entry.rows,
+            'Full scans': ", ".join(entry.full_scans),
+        }
+        for entry in entries
+    ]), use_container_width=True, hide_index=True)
+
+    for entry in entries:
+        label = f"{entry.what} · {entry.seconds * 1000:,.0f} ms · {entry.rows:,} rows"
+        with st.expander(label + (" · full scan" if entry.full_scans else "")):
+            if entry.full_scans:
+                st.warning(f"Reads all of {', '.join(entry.full_scans)} without an index")
+            st.code(entry.query, language="sql")
+            if entry.params:
+                st.caption(f"Parameters: {entry.params}")
+            if entry.plan is not None:
+                st.dataframe(entry.plan, use_container_width=True, hide_index=True)
+            else:
+                st.caption(f"No {entry.backend} plan: {entry.plan_error}")
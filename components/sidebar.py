@@ -12,38 +12,44 @@ def render_sidebar():
         key="sidebar_page_select"
     )
     
-    # Database connection status
+    # Database connection status, read from the background health monitor
     db_service = DatabaseService()
-    connection = db_service.db_config.get_connection()
+    health = db_service.db_config.health()
     
-    if connection:
-        st.sidebar.success("✅ Database Connected")
-        connection.close()
+    if health['healthy'] is None:
+        st.sidebar.info("⏳ Checking database connection...")
+    elif health['healthy']:
+        st.sidebar.success(f"✅ Database Connected ({health['latency_ms']:.0f} ms)")
     else:
         st.sidebar.error("❌ Database Connection Failed")
+        st.sidebar.caption(health['last_error'])
     
     # Filters section
     st.sidebar.markdown("---")
     st.sidebar.subheader("🔍 Filters")
     
-    # Get available data
-    exams_df = db_service.get_available_exams()
-    classes = db_service.get_available_classes()
+    # Options keyed by id, cached per data version and shared with the pages
+    exam_catalog = db_service.get_exam_catalog()
+    class_catalog = db_service.get_class_catalog()
     
     # Exam filter
-    exam_options = ["All Exams"] + [f"{row['EXNM']} ({row['ExID']})" for _, row in exams_df.iterrows()]
-    selected_exam = st.sidebar.selectbox("Select Exam", exam_options, key="sidebar_exam_select")
+    exam_id = st.sidebar.selectbox(
+        "Select Exam",
+        exam_catalog.options("All Exams"),
+        format_func=exam_catalog.format_func("All Exams"),
+        key="sidebar_exam_select"
+    )
     
     # Class filter
-    class_options = ["All Classes"] + classes
-    selected_class = st.sidebar.selectbox("Select Class", class_options, key="sidebar_class_select")
-    
-    # Extract exam ID
-    exam_id = None
-    if selected_exam != "All Exams":
-        exam_id = selected_exam.split("(")[-1].replace(")", "")
+    class_filter = st.sidebar.selectbox(
+        "Select Class",
+        class_catalog.options("All Classes"),
+        format_func=class_catalog.format_func("All Classes"),
+        key="sidebar_class_select"
+    )
     
-    class_filter = None if selected_class == "All Classes" else selected_class
+    selected_exam = exam_catalog.label(exam_id) if exam_id else "All Exams"
+    selected_class = class_filter or "All Classes"
     
     return {
         'page': page,
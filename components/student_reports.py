@@ -3,7 +3,78 @@ import plotly.express as px
 import plotly.graph_objects as go
 from services.database_service import DatabaseService
 from services.report_service import ReportService
-from utils.visualizations import create_performance_chart, create_subject_radar_chart
+from utils.visualizations import create_performance_chart, create_subject_radar_chart, figure_payload_size
+
+STUDENT_PAGE_SIZE = 20
+
+def _change_search_page(step):
+    st.session_state['student_search_page'] = max(st.session_state.get('student_search_page', 0) + step, 0)
+
+def render_student_search(db_service):
+    """Search students on the server, one page at a time, and return the selected STID"""
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        term = st.text_input(
+            "Search Student",
+            placeholder="Name, roll number or student ID",
+            key="student_search_term"
+        )
+    with col2:
+        class_catalog = db_service.get_class_catalog()
+        class_name = st.selectbox(
+            "Class",
+            class_catalog.options("All Classes"),
+            format_func=class_catalog.format_func("All Classes"),
+            key="student_search_class"
+        )
+    
+    anywhere = st.checkbox("Match anywhere in the name", key="student_search_infix")
+    
+    # Go back to the first page whenever the search changes
+    search_key = (term, class_name, anywhere)
+    if st.session_state.get('student_search_key') != search_key:
+        st.session_state['student_search_key'] = search_key
+        st.session_state['student_search_page'] = 0
+    page = st.session_state.get('student_search_page', 0)
+    
+    # One extra row tells whether there is a next page
+    results = db_service.search_students(
+        term,
+        class_name,
+        match="infix" if anywhere else "prefix",
+        limit=STUDENT_PAGE_SIZE + 1,
+        offset=page * STUDENT_PAGE_SIZE
+    )
+    has_next = len(results) > STUDENT_PAGE_SIZE
+    results = results.head(STUDENT_PAGE_SIZE)
+    
+    if results.empty:
+        st.info("No matching students")
+        return None
+    
+    labels = dict(zip(
+        results['STID'],
+        results['STNAME'].astype(str) + " · Roll " + results['ROLLNO'].fillna('-').astype(str)
+        + " · " + results['CLASS'].fillna('-').astype(str)
+    ))
+    student_id = st.selectbox(
+        "Select Student",
+        list(labels),
+        format_func=labels.get,
+        key="student_search_select"
+    )
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    
+    with col1:
+        st.button("◀ Previous", disabled=page == 0, on_click=_change_search_page, args=(-1,))
+    with col2:
+        st.caption(f"Page {page + 1}")
+    with col3:
+        st.button("Next ▶", disabled=not has_next, on_click=_change_search_page, args=(1,))
+    
+    return student_id
 
 def render_student_reports():
     """Render student reports page"""
@@ -12,21 +83,10 @@ def render_student_reports():
     db_service = DatabaseService()
     report_service = ReportService()
     
-    # Student selection
-    students_df = db_service.get_all_students()
+    # Student selection, searched on the server instead of listing every student
+    student_id = render_student_search(db_service)
     
-    if students_df.empty:
-        st.warning("No student data available")
-        return
-    
-    # Create student options
-    student_options = [f"{row['STNAME']} ({row['STID']})" for _, row in students_df.iterrows()]
-    selected_student = st.selectbox("Select Student", student_options)
-    
-    if selected_student:
-        # Extract student ID
-        student_id = selected_student.split("(")[-1].replace(")", "")
-        
+    if student_id:
         # Generate report
         report = report_service.generate_student_report(student_id)
         
@@ -64,6 +124,7 @@ def render_student_reports():
                 st.subheader("📈 Score Trend")
                 fig = create_performance_chart(report['exam_history'])
                 st.plotly_chart(fig, use_container_width=True)
+                st.caption(f"Chart payload: {figure_payload_size(fig) / 1024:.1f} KB")
             
             with col2:
                 st.subheader("🎯 Subject Performance")
@@ -72,7 +133,8 @@ def render_student_reports():
             
             # Detailed exam history
             st.subheader("📋 Exam History")
-            display_columns = ['EXNM', 'ExDt', 'ExMk', 'ExRnk', 'S1Mk', 'S2Mk', 'S3Mk', 'S4Mk']
+            subject_columns = report['subject_columns']
+            display_columns = ['EXNM', 'ExDt', 'ExMk', 'ExRnk'] + list(subject_columns)
             st.dataframe(
                 report['exam_history'][display_columns],
                 column_config={
@@ -80,9 +142,6 @@ def render_student_reports():
                     'ExDt': 'Date',
                     'ExMk': 'Total Marks',
                     'ExRnk': 'Rank',
-                    'S1Mk': 'Physics',
-                    'S2Mk': 'Chemistry',
-                    'S3Mk': 'Botany',
-                    'S4Mk': 'Zoology'
+                    **subject_columns
                 }
             )
@@ -2,60 +2,115 @@
 
 import streamlit as st
 import pandas as pd
-import mysql.connector
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-def get_connection():
-    return mysql.connector.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME"),
-        port=int(os.getenv("DB_PORT", 3306)),
+from config.database import DatabaseConfig
+from services.database_service import DatabaseService
+from services.ingest_service import INGEST_MODES, IngestError, IngestService
+
+
+def _file_key(uploaded_file):
+    return f"{uploaded_file.name}:{uploaded_file.size}"
+
+
+def _run_ingest(uploaded_file, mode, skip_unchanged, start_batch=0):
+    """Stream the uploaded CSV into the database with a live progress bar"""
+    service = IngestService(mode=mode, skip_unchanged=skip_unchanged)
+    uploaded_file.seek(0)
+    progress = st.progress(0.0, text="Starting upload...")
+
+    def on_progress(fraction, summary):
+        progress.progress(
+            fraction if fraction is not None else 0.0,
+            text=f"{summary.rows_read:,} rows written in {summary.batches} batches "
+                 f"({summary.rows_per_second:,.0f} rows/s)"
+        )
+
+    try:
+        summary = service.ingest_csv(uploaded_file, start_batch=start_batch, on_progress=on_progress)
+    except IngestError as e:
+        # Each committed batch bumped data_versions and the derived tables were refreshed for
+        # them before the error; re-read the versions so this process drops stale cached frames now
+        DatabaseService.refresh_data_versions()
+        st.session_state['upload_resume'] = {'file': _file_key(uploaded_file), 'batch': e.next_batch}
+        st.error(f"Database error: {e}")
+        if e.summary.batches:
+            st.info(
+                f"{e.summary.batches} batches ({e.summary.rows_read:,} rows) were committed "
+                "before the failure; resuming continues with the failed batch."
+            )
+        return
+
+    st.session_state.pop('upload_resume', None)
+    DatabaseService.refresh_data_versions()
+    progress.progress(1.0, text="Upload complete")
+    st.session_state.setdefault('upload_history', []).append({
+        'File': uploaded_file.name,
+        'Mode': mode,
+        'Rows': summary.rows_read,
+        'Seconds': round(summary.elapsed_seconds, 2),
+        'Rows / s': round(summary.rows_per_second),
+    })
+    render_summary(summary)
+
+
+def render_summary(summary):
+    """Show inserted / updated / unchanged counts for a finished upload"""
+    col1, col2, col3, col4, col5 = st.columns(5)
+
+    with col1:
+        st.metric("Inserted", f"{summary.inserted:,}")
+    with col2:
+        st.metric("Updated", f"{summary.updated:,}")
+    with col3:
+        st.metric("Skipped (unchanged)", f"{summary.skipped:,}")
+    with col4:
+        st.metric("Unchanged", f"{summary.unchanged:,}")
+    with col5:
+        st.metric("Rows / s", f"{summary.rows_per_second:,.0f}")
+
+    skipped = f", {summary.skipped_batches} already-committed batches skipped" if summary.skipped_batches else ""
+    st.success(
+        f"Uploaded {summary.rows_read:,} rows in {summary.batches} batches "
+        f"({summary.elapsed_seconds:.1f}s){skipped}."
     )
 
+
 def render():
-    st.title("Upload Exam Results CSV to MySQL")
+    st.title("Upload Exam Results CSV to the Database")
 
     uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
     if uploaded_file:
-        df = pd.read_csv(uploaded_file)
-        st.write("Preview:", df.head())
+        st.write("Preview:", pd.read_csv(uploaded_file, nrows=5))
+
+        db_config = DatabaseConfig()
+        local_infile = db_config.allow_local_infile
+        mode = st.radio(
+            "Ingest mode",
+            INGEST_MODES,
+            format_func=lambda m: "Batched INSERT (executemany)" if m == 'executemany'
+            else "Bulk load (LOAD DATA LOCAL INFILE via staging table)",
+            disabled=not local_infile,
+            horizontal=True
+        )
+        if db_config.embedded:
+            st.caption(f"Bulk load needs MySQL; rows are upserted into the embedded {db_config.backend} database.")
+        elif not local_infile:
+            st.caption("Set DB_ALLOW_LOCAL_INFILE=true (and local_infile=ON on the server) to enable bulk load.")
+
+        skip_unchanged = st.checkbox(
+            "Only send new or changed rows",
+            value=True,
+            help="Rows identical to the last upload of the same student and exam are skipped"
+        )
+
+        resume = st.session_state.get('upload_resume')
+        can_resume = resume is not None and resume['file'] == _file_key(uploaded_file)
 
         if st.button("Append/Update to Database"):
-            columns = list(df.columns)
-            col_str = ", ".join(f"`{c}`" for c in columns)
-            val_str = ", ".join(["%s"] * len(columns))
-            update_str = ", ".join(
-                f"`{c}`=VALUES(`{c}`)" for c in columns if c not in ["STID", "ExID"]
-            )
+            _run_ingest(uploaded_file, mode, skip_unchanged)
+        elif can_resume and st.button(f"Resume from batch {resume['batch'] + 1}"):
+            _run_ingest(uploaded_file, mode, skip_unchanged, start_batch=resume['batch'])
 
-            query = f"""
-                INSERT INTO exam_results ({col_str})
-                VALUES ({val_str})
-                ON DUPLICATE KEY UPDATE {update_str}
-            """
-
-            conn = None
-            cursor = None
-            try:
-                conn = get_connection()
-                if conn is None:
-                    raise ConnectionError("Unable to establish database connection")
-                cursor = conn.cursor()
-                data = [tuple(row) for row in df.values]
-                cursor.executemany(query, data)
-                conn.commit()
-                st.success(
-                    f"Uploaded {cursor.rowcount} rows to the database."
-                )
-            except Exception as e:
-                st.error(f"Database error: {e}")
-            finally:
-                if cursor is not None:
-                    cursor.close()
-                if conn is not None:
-                    conn.close()
+    history = st.session_state.get('upload_history')
+    if history:
+        with st.expander("⏱️ Upload timings by mode"):
+            st.dataframe(pd.DataFrame(history), hide_index=True)
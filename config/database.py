@@ -1,31 +1,336 @@
 import os
+import queue
+import threading
+import time
 from dotenv import load_dotenv
 import mysql.connector
 from mysql.connector import Error
 import streamlit as st
+from config import embedded
 
 load_dotenv()
 
+
+class PoolTimeoutError(Error):
+    """Raised when no pooled connection becomes free within the checkout timeout"""
+
+
+class PooledConnection:
+    """Connection borrowed from a ConnectionPool; close() hands it back to the pool"""
+
+    def __init__(self, pool, connection):
+        self._pool = pool
+        self._connection = connection
+
+    def __getattr__(self, name):
+        if self._connection is None:
+            raise Error("Pooled connection has already been returned to the pool")
+        return getattr(self._connection, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._connection, name, value)
+
+    def close(self):
+        """Return the underlying connection to the pool"""
+        if self._connection is not None:
+            self._pool.release(self._connection)
+            self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """Thread-safe pool of MySQL connections shared by the whole process"""
+
+    def __init__(self, connect, size=5, timeout=10.0, validate_after=30.0):
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.validate_after = validate_after
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._stats = {
+            'created': 0,
+            'checkouts': 0,
+            'timeouts': 0,
+            'discarded': 0,
+            'in_use': 0,
+            'wait_time_total': 0.0,
+        }
+
+    def acquire(self, timeout=None):
+        """Borrow a healthy connection, waiting up to `timeout` seconds for a free slot"""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=timeout):
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise PoolTimeoutError(
+                f"No database connection available after {timeout:.1f}s "
+                f"(pool size {self.size})"
+            )
+
+        try:
+            connection = self._take_idle() or self._create()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._stats['checkouts'] += 1
+            self._stats['in_use'] += 1
+            self._stats['wait_time_total'] += time.perf_counter() - started
+        return PooledConnection(self, connection)
+
+    def release(self, connection):
+        """Roll back any open transaction and put the connection back on the idle stack"""
+        try:
+            # in_transaction is tracked client-side; reading autocommit would cost a round trip.
+            # Pooled connections are opened with autocommit=True and nothing turns it off
+            if connection.in_transaction:
+                connection.rollback()
+            self._idle.put((connection, time.monotonic()))
+        except Error:
+            self._discard(connection)
+        finally:
+            with self._lock:
+                self._stats['in_use'] -= 1
+            self._slots.release()
+
+    def stats(self):
+        """Return a snapshot of pool usage counters"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['size'] = self.size
+        stats['idle'] = self._idle.qsize()
+        stats['avg_wait_ms'] = (
+            stats['wait_time_total'] / stats['checkouts'] * 1000 if stats['checkouts'] else 0.0
+        )
+        return stats
+
+    def close_all(self):
+        """Close every idle connection (borrowed ones are closed when returned)"""
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(connection)
+
+    def _take_idle(self):
+        while True:
+            try:
+                connection, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            if time.monotonic() - last_used < self.validate_after:
+                return connection
+            # Idle long enough that the server may have dropped it: ping before lending
+            try:
+                connection.ping(reconnect=False)
+                return connection
+            except Error:
+                self._discard(connection)
+
+    def _create(self):
+        connection = self._connect()
+        with self._lock:
+            self._stats['created'] += 1
+        return connection
+
+    def _discard(self, connection):
+        with self._lock:
+            self._stats['discarded'] += 1
+        try:
+            connection.close()
+        except Error:
+            pass
+
+
+class HealthMonitor:
+    """Background thread that pings the database and keeps the latest status.
+
+    Uses its own connection so a busy pool cannot delay the check, and readers
+    (e.g. the sidebar badge) get the cached status without touching the database.
+    """
+
+    def __init__(self, connect, interval=15.0):
+        self._connect = connect
+        self.interval = interval
+        self._connection = None
+        self._lock = threading.Lock()
+        # Serializes use of self._connection: check() runs on the monitor thread and from "Check now"
+        self._check_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._status = {
+            'healthy': None,  # None until the first check finishes
+            'latency_ms': None,
+            'last_error': None,
+            'last_error_at': None,
+            'checked_at': None,
+            'consecutive_failures': 0,
+        }
+
+    def start(self):
+        """Start the background thread (no-op when it is already running)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="db-health-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        """Return a snapshot of the latest health check"""
+        with self._lock:
+            status = dict(self._status)
+        status['age_seconds'] = time.time() - status['checked_at'] if status['checked_at'] else None
+        return status
+
+    def check(self):
+        """Ping the database once and record the result"""
+        with self._check_lock:
+            self._check()
+        return self.status()
+
+    def _check(self):
+        started = time.perf_counter()
+        try:
+            if self._connection is None:
+                self._connection = self._connect()
+            cursor = self._connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            latency = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._status.update(healthy=True, latency_ms=latency, checked_at=time.time(),
+                                    consecutive_failures=0)
+        except Exception as e:
+            self._drop_connection()
+            with self._lock:
+                self._status.update(healthy=False, latency_ms=None, last_error=str(e),
+                                    last_error_at=time.time(), checked_at=time.time(),
+                                    consecutive_failures=self._status['consecutive_failures'] + 1)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.check()
+            self._stop.wait(self.interval)
+        with self._check_lock:
+            self._drop_connection()
+
+    def _drop_connection(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_monitor = None
+
+
 class DatabaseConfig:
-    def __init__(self):
+    def __init__(self, backend=None):
         self.host = os.getenv('DB_HOST', 'localhost')
         self.database = os.getenv('DB_NAME', 'exam_db')
         self.user = os.getenv('DB_USER', 'root')
         self.password = os.getenv('DB_PASSWORD', '')
         self.port = int(os.getenv('DB_PORT', 3306))
-    
+        self.pool_size = int(os.getenv('DB_POOL_SIZE', 5))
+        self.pool_timeout = float(os.getenv('DB_POOL_TIMEOUT', 10))
+        self.pool_validate_after = float(os.getenv('DB_POOL_VALIDATE_AFTER', 30))
+        self.connect_timeout = int(os.getenv('DB_CONNECT_TIMEOUT', 3))
+        self.health_interval = float(os.getenv('DB_HEALTH_INTERVAL', 15))
+        self.layout = os.getenv('DB_LAYOUT', 'wide').lower()
+        self.allow_local_infile = os.getenv('DB_ALLOW_LOCAL_INFILE', 'false').lower() in ('1', 'true', 'yes')
+        # mysql, or an embedded engine storing everything in DB_PATH (see config/embedded.py)
+        self.backend = (backend or os.getenv('DB_BACKEND', 'mysql')).lower()
+        self.path = os.getenv('DB_PATH', f"{self.database}.{self.backend}")
+        if self.embedded:
+            # The embedded engines only keep the wide layout and have no LOAD DATA
+            self.layout = 'wide'
+            self.allow_local_infile = False
+
+    @property
+    def embedded(self):
+        """True when DB_BACKEND names an embedded engine instead of a MySQL server"""
+        return self.backend in embedded.EMBEDDED_BACKENDS
+
+    def connect(self):
+        """Open a new, unpooled database connection"""
+        if self.backend != 'mysql':
+            return embedded.connect(self.backend, self.path, timeout=self.connect_timeout)
+        return mysql.connector.connect(
+            host=self.host,
+            database=self.database,
+            user=self.user,
+            password=self.password,
+            port=self.port,
+            autocommit=True,
+            allow_local_infile=self.allow_local_infile,
+            # Fail fast when the server is unreachable instead of waiting for the OS timeout
+            connection_timeout=self.connect_timeout
+        )
+
+    @property
+    def pool(self):
+        """Process-wide connection pool, created on first use"""
+        global _pool
+        if _pool is None:
+            with _pool_lock:
+                if _pool is None:
+                    _pool = ConnectionPool(
+                        self.connect,
+                        size=self.pool_size,
+                        timeout=self.pool_timeout,
+                        validate_after=self.pool_validate_after
+                    )
+        return _pool
+
     def get_connection(self):
-        """Create and return database connection"""
+        """Borrow a pooled database connection; close() returns it to the pool.
+
+        Embedded databases are opened per call instead: that costs about as
+        much as a pool checkout and keeps each connection on one thread.
+        """
         try:
-            connection = mysql.connector.connect(
-                host=self.host,
-                database=self.database,
-                user=self.user,
-                password=self.password,
-                port=self.port,
-                autocommit=True
-            )
-            return connection
-        except Error as e:
+            return self.connect() if self.embedded else self.pool.acquire()
+        except Exception as e:
             st.error(f"Database connection failed: {e}")
             return None
+
+    def pool_stats(self):
+        """Return usage counters of the shared connection pool"""
+        return self.pool.stats()
+
+    @property
+    def health_monitor(self):
+        """Process-wide HealthMonitor, started on first use"""
+        global _monitor
+        if _monitor is None:
+            with _pool_lock:
+                if _monitor is None:
+                    _monitor = HealthMonitor(self.connect, interval=self.health_interval)
+        _monitor.start()
+        return _monitor
+
+    def health(self):
+        """Latest cached health status; never opens a connection in the caller's thread"""
+        return self.health_monitor.status()
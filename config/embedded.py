@@ -0,0 +1,176 @@
+"""Embedded database engines (SQLite, DuckDB) behind the MySQL connection interface.
+
+With DB_BACKEND=sqlite or DB_BACKEND=duckdb the app keeps all tables in the
+single file DB_PATH instead of a MySQL server. The services write MySQL
+flavoured SQL, so EmbeddedConnection translates each statement on the way in:
+%s placeholders become ?, backtick-quoted names become double-quoted,
+LIKE gets MySQL's backslash escape, INSERT IGNORE becomes INSERT OR IGNORE and
+ON DUPLICATE KEY UPDATE becomes ON CONFLICT DO UPDATE. The few statements
+with no portable form branch on ``cursor.dialect``.
+
+SQLite ships with Python. DuckDB is optional (``pip install duckdb``) and, being
+a column store, scans and aggregates exam_results much faster.
+"""
+import datetime
+import re
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+EMBEDDED_BACKENDS = ['sqlite', 'duckdb']
+
+_LIKE = re.compile(r"\bLIKE\s+%s", re.IGNORECASE)
+_INSERT_IGNORE = re.compile(r"\bINSERT\s+IGNORE\b", re.IGNORECASE)
+_ON_DUPLICATE = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.IGNORECASE)
+_VALUES_OF = re.compile(r"\bVALUES\((`?\w+`?)\)", re.IGNORECASE)
+# A translated INSERT whose VALUES row is placeholders only: (INSERT ... INTO t (columns), columns, rest)
+_INSERT_VALUES = re.compile(
+    r"^(\s*INSERT\s+(?:OR\s+IGNORE\s+)?INTO\s+\S+\s*\(([^)]*)\))\s*VALUES\s*\(\s*\?(?:\s*,\s*\?)*\s*\)(.*)$",
+    re.IGNORECASE | re.DOTALL
+)
+
+
+def dialect(cursor):
+    """'mysql', 'sqlite' or 'duckdb': the SQL dialect a cursor runs"""
+    return getattr(cursor, 'dialect', 'mysql')
+
+
+def translate(query):
+    """Rewrite one MySQL statement for SQLite/DuckDB"""
+    if _ON_DUPLICATE.search(query):
+        head, update = _ON_DUPLICATE.split(query, maxsplit=1)
+        query = head + "ON CONFLICT DO UPDATE SET" + _VALUES_OF.sub(r"excluded.\1", update)
+    query = _LIKE.sub(lambda match: "LIKE %s ESCAPE '\\'", query)
+    query = _INSERT_IGNORE.sub("INSERT OR IGNORE", query)
+    return query.replace("%s", "?").replace("`", '"')
+
+
+def _value(value):
+    # NumPy scalars (e.g. keys taken from a DataFrame) cannot be bound by sqlite3
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
+
+
+def _params(params):
+    return tuple(_value(value) for value in params) if params else ()
+
+
+class EmbeddedCursor:
+    """DB-API cursor that translates MySQL statements before running them"""
+
+    def __init__(self, cursor, dialect, owned=True):
+        self._cursor = cursor
+        self.dialect = dialect
+        # A DuckDB "cursor" is the connection itself and must not be closed with the cursor
+        self._owned = owned
+
+    def execute(self, query, params=None):
+        self._cursor.execute(translate(query), _params(params))
+        return self
+
+    def executemany(self, query, rows):
+        query = translate(query)
+        rows = [_params(row) for row in rows]
+        insert = _INSERT_VALUES.match(query) if self.dialect == 'duckdb' else None
+        if insert and rows:
+            # DuckDB runs executemany row by row (tens of ms and growing memory per row);
+            # send the rows as one INSERT ... SELECT from a registered DataFrame instead
+            head, columns, rest = insert.groups()
+            names = [name.strip().strip('"') for name in columns.split(",")]
+            frame = pd.DataFrame(rows, columns=names, dtype=object)
+            self._cursor.register('_executemany_rows', frame)
+            try:
+                selected = ", ".join(f'"{name}"' for name in names)
+                self._cursor.execute(f"{head} SELECT {selected} FROM _executemany_rows{rest}")
+            finally:
+                self._cursor.unregister('_executemany_rows')
+            return self
+        self._cursor.executemany(query, rows)
+        return self
+
+    def close(self):
+        if self._owned:
+            self._cursor.close()
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class EmbeddedConnection:
+    """Connection to an embedded database with the parts of the MySQL connection API the services use"""
+
+    def __init__(self, connection, dialect):
+        self._connection = connection
+        self.dialect = dialect
+
+    def cursor(self):
+        if self.dialect == 'duckdb':
+            # DuckDB's cursor() opens a second connection outside this one's transaction
+            return EmbeddedCursor(self._connection, self.dialect, owned=False)
+        return EmbeddedCursor(self._connection.cursor(), self.dialect)
+
+    def start_transaction(self):
+        self._connection.execute("BEGIN TRANSACTION")
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        try:
+            self._connection.rollback()
+        except Exception:
+            # No transaction open
+            pass
+
+    def close(self):
+        self._connection.close()
+
+    def insert_frame(self, table, df):
+        """Append a DataFrame to `table` in one bulk operation (columns by name)"""
+        if df.empty:
+            return
+        columns = ", ".join(f'"{c}"' for c in df.columns)
+        if self.dialect == 'duckdb':
+            self._connection.register('_insert_frame', df)
+            try:
+                self._connection.execute(f'INSERT INTO "{table}" ({columns}) SELECT {columns} FROM _insert_frame')
+            finally:
+                self._connection.unregister('_insert_frame')
+        else:
+            rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+            self._connection.executemany(
+                f'INSERT INTO "{table}" ({columns}) VALUES ({", ".join(["?"] * len(df.columns))})',
+                [_params(row) for row in rows]
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def connect(backend, path, timeout=3):
+    """Open `path` with the embedded engine `backend` ('sqlite' or 'duckdb')"""
+    if backend == 'sqlite':
+        # Autocommit unless a transaction is started explicitly, like the MySQL connections
+        # check_same_thread=False: the health monitor's connection is also pinged from the script
+        # thread ("Check now"); HealthMonitor serializes those uses
+        connection = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        # Readers do not block the upload's writer (and the other way round)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return EmbeddedConnection(connection, backend)
+    if backend == 'duckdb':
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("DB_BACKEND=duckdb needs the optional 'duckdb' package") from e
+        return EmbeddedConnection(duckdb.connect(path), backend)
+    raise ValueError(f"Unknown embedded backend '{backend}', expected one of {', '.join(EMBEDDED_BACKENDS)}")
@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Optional, List
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Set, Tuple
 import pandas as pd
 
 @dataclass
@@ -33,3 +33,119 @@ class SubjectScore:
     correct_answers: int
     incorrect_answers: int
     unattempted: int
+
+@dataclass
+class IngestSummary:
+    batches: int = 0
+    skipped_batches: int = 0
+    rows_read: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+    elapsed_seconds: float = 0.0
+    exam_ids: Set[str] = field(default_factory=set)
+    # (ExID, CLASS) pairs whose rows were written, for cache invalidation
+    touched: Set[Tuple[str, str]] = field(default_factory=set)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+@dataclass
+class OptionCatalog:
+    """Selectbox options keyed by id: ids in display order and a label per id"""
+    ids: List[str] = field(default_factory=list)
+    labels: Dict[str, str] = field(default_factory=dict)
+    dates: Dict[str, Optional[str]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def label(self, option_id) -> str:
+        return self.labels.get(option_id, str(option_id))
+
+    def options(self, all_label: Optional[str] = None) -> List[Optional[str]]:
+        """Ids to pass to st.selectbox; a leading None stands for `all_label`"""
+        return ([None] if all_label else []) + self.ids
+
+    def format_func(self, all_label: Optional[str] = None):
+        """format_func for st.selectbox over options(all_label)"""
+        return lambda option_id: all_label if option_id is None else self.label(option_id)
+
+    def index(self, option_id, all_label: Optional[str] = None) -> int:
+        """Position of `option_id` in options(all_label), 0 when it is not there"""
+        options = self.options(all_label)
+        return options.index(option_id) if option_id in options else 0
+
+@dataclass
+class ExportSummary:
+    fmt: str = 'html'
+    workers: int = 1
+    cards: int = 0
+    bytes_written: int = 0
+    elapsed_seconds: float = 0.0
+    # Error messages of cards that could not be rendered
+    failed: List[str] = field(default_factory=list)
+
+    @property
+    def cards_per_second(self) -> float:
+        return self.cards / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+@dataclass
+class FetchTiming:
+    wall_seconds: float = 0.0
+    # Seconds each dataset took on its own; their sum is the sequential cost
+    dataset_seconds: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def serial_seconds(self) -> float:
+        return sum(self.dataset_seconds.values())
+
+@dataclass
+class MetricEvent:
+    kind: str   # 'query', 'cache', 'compute', 'chart' or 'page'
+    name: str
+    seconds: float = 0.0
+    rows: Optional[int] = None
+    bytes: Optional[int] = None
+    # Only set for kind 'cache'
+    cache_hit: Optional[bool] = None
+
+@dataclass
+class MetricStats:
+    kind: str
+    name: str
+    count: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    # Observations per latency bucket (upper bounds in utils.instrumentation.LATENCY_BUCKETS, then +Inf)
+    buckets: List[int] = field(default_factory=list)
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.seconds / self.count if self.count else 0.0
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else None
+
+@dataclass
+class SlowQuery:
+    what: str
+    query: str
+    params: List = field(default_factory=list)
+    seconds: float = 0.0
+    rows: int = 0
+    logged_at: float = 0.0   # time.time()
+    backend: str = 'mysql'
+    # EXPLAIN output captured right after the query, or why it could not be
+    plan: Optional[pd.DataFrame] = None
+    plan_error: Optional[str] = None
+    # Tables the plan reads in full (no usable index)
+    full_scans: List[str] = field(default_factory=list)
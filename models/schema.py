@@ -0,0 +1,158 @@
+"""Column layout of the wide ``exam_results`` table and named column projections"""
+
+MAX_SUBJECTS = 10
+
+# Per-subject column templates in table order. Subjects 6-10 were added later
+# with upper-case names (S6MK, QS6CORIDS, ...), see subject_column().
+SUBJECT_COLUMN_TEMPLATES = [
+    ('S{}NM', 'VARCHAR(64)'),
+    ('TOPIC{}', 'VARCHAR(128)'),
+    ('S{}Max', 'INT'),
+    ('S{}Min', 'INT'),
+    ('QS{}Cor', 'INT'),
+    ('QS{}Inc', 'INT'),
+    ('QS{}Una', 'INT'),
+    ('QS{}Can', 'VARCHAR(255)'),
+    ('QS{}CorIds', 'TEXT'),
+    ('QS{}IncorIds', 'TEXT'),
+    ('QS{}Leftids', 'TEXT'),
+    ('QS{}Canc', 'VARCHAR(255)'),
+    ('QS{}Mk', 'FLOAT'),
+    ('S{}Mk', 'FLOAT'),
+    ('S{}GMax', 'FLOAT'),
+    ('S{}GMin', 'FLOAT'),
+    ('S{}Avg', 'FLOAT'),
+]
+
+IDENTITY_COLUMNS = [
+    ('STID', 'VARCHAR(32)'),
+    ('STNAME', 'VARCHAR(128)'),
+    ('FATHER', 'VARCHAR(128)'),
+    ('ROLLNO', 'VARCHAR(32)'),
+    ('CLASS', 'VARCHAR(64)'),
+]
+
+EXAM_COLUMNS = [
+    ('ExID', 'VARCHAR(32)'),
+    ('EXNM', 'VARCHAR(128)'),
+    ('ExDt', 'DATE'),
+    ('Duration', 'VARCHAR(16)'),
+    ('QTYPE', 'VARCHAR(32)'),
+]
+
+TOTAL_COLUMNS = [
+    ('ExMk', 'FLOAT'),
+    ('AllExMk', 'FLOAT'),
+    ('ExGMax', 'FLOAT'),
+    ('ExGmin', 'FLOAT'),
+    ('ExAvg', 'FLOAT'),
+    ('ExRnk', 'INT'),
+    ('ClassExRnk', 'INT'),
+    ('FinRnk', 'INT'),
+    ('ClassRnk', 'INT'),
+    ('EXSTCOUNT', 'INT'),
+    ('EXCLASSSTCOUNT', 'INT'),
+    ('AllExCount', 'INT'),
+    ('CLASSSTCOUNT', 'INT'),
+    ('CNTBELOW', 'INT'),
+    ('CNTABOVE', 'INT'),
+]
+
+KEY_COLUMNS = ['STID', 'ExID']
+
+# Display names used when an exam does not store S*NM subject names
+DEFAULT_SUBJECT_NAMES = {1: 'Physics', 2: 'Chemistry', 3: 'Botany', 4: 'Zoology'}
+
+
+def subject_column(template, subject_no):
+    """Return the exact column name for a per-subject template, e.g. ('S{}Mk', 6) -> 'S6MK'"""
+    name = template.format(subject_no)
+    return name if subject_no <= 5 else name.upper()
+
+
+def subject_columns(template, subjects=range(1, MAX_SUBJECTS + 1)):
+    """Return the column names of one per-subject template for the given subjects"""
+    return [subject_column(template, i) for i in subjects]
+
+
+def subject_name(subject_no, stored_name=None):
+    """Display name of a subject slot, preferring the name stored in S*NM"""
+    if isinstance(stored_name, str) and stored_name.strip():
+        return stored_name.strip()
+    return DEFAULT_SUBJECT_NAMES.get(subject_no, f"Subject {subject_no}")
+
+
+def _subject_block(subjects):
+    return [
+        (subject_column(template, i), sql_type)
+        for template, sql_type in SUBJECT_COLUMN_TEMPLATES
+        for i in subjects
+    ]
+
+
+# Column order of exam_results, see utils/migrations.py
+EXAM_RESULTS_COLUMNS = (
+    IDENTITY_COLUMNS
+    + EXAM_COLUMNS
+    + _subject_block(range(1, 6))
+    + TOTAL_COLUMNS
+    + [('PHONE', 'VARCHAR(32)')]
+    + _subject_block(range(6, MAX_SUBJECTS + 1))
+)
+
+COLUMN_NAMES = [name for name, _ in EXAM_RESULTS_COLUMNS]
+COLUMN_TYPES = dict(EXAM_RESULTS_COLUMNS)
+_CANONICAL_NAMES = {name.lower(): name for name in COLUMN_NAMES}
+
+_SUMMARY = [
+    'STID', 'STNAME', 'FATHER', 'ROLLNO', 'CLASS',
+    'ExID', 'EXNM', 'ExDt',
+    'ExMk', 'ExRnk', 'ClassExRnk',
+]
+
+PROJECTIONS = {
+    # Identity, exam and headline totals: enough for lists, rankings and trends
+    'summary': _SUMMARY,
+    # Summary plus subject names and marks for every subject slot
+    'subjects': _SUMMARY + subject_columns('S{}NM') + subject_columns('S{}Mk'),
+    # Question-level counts and the comma-separated question id lists
+    'item-level': KEY_COLUMNS + ['CLASS', 'ExMk'] + [
+        subject_column(template, i)
+        for template, _ in SUBJECT_COLUMN_TEMPLATES if template.startswith('QS')
+        for i in range(1, MAX_SUBJECTS + 1)
+    ],
+    'full': COLUMN_NAMES,
+}
+
+
+def canonical_column(name):
+    """Return the schema spelling of a column name, or raise ValueError if unknown"""
+    try:
+        return _CANONICAL_NAMES[str(name).lower()]
+    except KeyError:
+        raise ValueError(f"Unknown exam_results column: {name}") from None
+
+
+def resolve_columns(columns):
+    """Turn a projection name or an iterable of column names into schema column names"""
+    if columns is None:
+        return list(COLUMN_NAMES)
+    if isinstance(columns, str):
+        if columns not in PROJECTIONS:
+            raise ValueError(
+                f"Unknown projection '{columns}', expected one of {', '.join(PROJECTIONS)}"
+            )
+        return list(PROJECTIONS[columns])
+
+    resolved = []
+    for column in columns:
+        name = canonical_column(column)
+        if name not in resolved:
+            resolved.append(name)
+    return resolved
+
+
+def select_list(columns, table_alias=None):
+    """Render resolved column names as a backtick-quoted SELECT list"""
+    prefix = f"{table_alias}." if table_alias else ""
+    return ", ".join(f"{prefix}`{c}`" for c in resolve_columns(columns))
@@ -1,145 +1,562 @@
+import functools
+import inspect
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-import mysql.connector
 from config.database import DatabaseConfig
+from config.embedded import dialect
+from models.data_models import FetchTiming, OptionCatalog, SlowQuery
+from models.schema import canonical_column, select_list, subject_columns
+from services import normalized_store, response_store
+from utils import instrumentation
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# How often the small data_versions table is re-read to notice uploads made by other processes
+VERSION_CHECK_SECONDS = int(os.getenv('DB_VERSION_CHECK_SECONDS', 5))
+CACHE_MAX_ENTRIES = int(os.getenv('DB_CACHE_MAX_ENTRIES', 128))
+# Used when data_versions is unavailable: behave like the old 5 minute TTL
+FALLBACK_TTL = 300
+
+
+# Per thread count of versioned_cache loads, to tell hits from misses
+_cache_state = threading.local()
+
+
+def versioned_cache(exam_arg=None, class_arg=None):
+    """Cache a DatabaseService method until the data it reads changes.
+
+    The cache key includes the data version of the exam/class named by the
+    `exam_arg` / `class_arg` parameters (or of all data when they are None or
+    not given), so an upload touching that exam and class invalidates the
+    entry while every other cached frame stays valid indefinitely.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def load(_self, data_version, *args, **kwargs):
+            # Only runs on a cache miss
+            _cache_state.misses = getattr(_cache_state, 'misses', 0) + 1
+            return func(_self, *args, **kwargs)
+
+        cached = st.cache_data(ttl=None, max_entries=CACHE_MAX_ENTRIES)(load)
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = bound.arguments
+            version = self.data_version(
+                arguments.get(exam_arg) if exam_arg else None,
+                arguments.get(class_arg) if class_arg else None
+            )
+            # Positional call with defaults filled in, so f(x) and f(exam_id=x) share an entry
+            misses = getattr(_cache_state, 'misses', 0)
+            started = time.perf_counter()
+            try:
+                return cached(self, version, *list(arguments.values())[1:])
+            finally:
+                instrumentation.record('cache', func.__name__, time.perf_counter() - started,
+                                       cache_hit=getattr(_cache_state, 'misses', 0) == misses)
+
+        wrapper.clear = cached.clear
+        return wrapper
+    return decorator
+
+
+_fetch_executor = None
+_fetch_executor_lock = threading.Lock()
+
+
+def _executor(workers):
+    """Process-wide thread pool for DatabaseService.fetch_all, sized like the connection pool"""
+    global _fetch_executor
+    if _fetch_executor is None:
+        with _fetch_executor_lock:
+            if _fetch_executor is None:
+                _fetch_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db-fetch")
+    return _fetch_executor
+
+
+def like_pattern(term, match="prefix"):
+    """LIKE pattern for `term` with wildcards escaped; "prefix" can use an index, "infix" scans"""
+    escaped = (term or "").strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%" if match == "infix" else f"{escaped}%"
+
+
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?!.*\bUSING\b)")
+
+
+def full_scans(plan, engine):
+    """Tables an EXPLAIN plan reads in full, without using an index"""
+    if plan is None or plan.empty:
+        return []
+    if engine == 'mysql' and {'type', 'table'} <= set(plan.columns):
+        return plan.loc[plan['type'] == 'ALL', 'table'].dropna().astype(str).tolist()
+    if engine == 'sqlite' and 'detail' in plan.columns:
+        matches = (_SQLITE_SCAN.match(str(detail)) for detail in plan['detail'])
+        return [match.group(1) for match in matches if match]
+    # DuckDB always scans columns, pruned by zonemaps; nothing to flag
+    return []
+
+
+class _QuotedColumns(dict):
+    """Column name -> backtick-quoted exam_results column, for condition templates"""
+
+    def __missing__(self, key):
+        return f"`{canonical_column(key)}`"
+
+
+# Sortable columns of the detailed-results grid, with the order they start in
+RESULT_SORT_COLUMNS = {
+    'ExRnk': 'ASC',
+    'ClassExRnk': 'ASC',
+    'ExMk': 'DESC',
+    'STNAME': 'ASC',
+    'ROLLNO': 'ASC',
+}
+
 
 class DatabaseService:
     def __init__(self):
         self.db_config = DatabaseConfig()
-    
-    @st.cache_data(ttl=300)  # Cache for 5 minutes
-    def get_all_students(_self):
-        """Fetch all students data"""
-        connection = _self.db_config.get_connection()
+        self.last_fetch = None
+
+    def fetch_all(self, requests):
+        """Run several independent reads concurrently and return {name: result}.
+
+        `requests` maps a name to a zero-argument callable, usually a
+        functools.partial of a DatabaseService getter. Each runs on its own
+        pooled connection; the timings are kept in `self.last_fetch`.
+        """
+        ctx = get_script_run_ctx()
+        dataset_seconds = {}
+
+        def run(name, request):
+            # Let st.cache_data and st.error work from the worker thread
+            if ctx is not None:
+                add_script_run_ctx(threading.current_thread(), ctx)
+            started = time.perf_counter()
+            try:
+                return request()
+            finally:
+                dataset_seconds[name] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        executor = _executor(self.db_config.pool_size)
+        futures = {name: executor.submit(run, name, request) for name, request in requests.items()}
+        results = {name: future.result() for name, future in futures.items()}
+        self.last_fetch = FetchTiming(time.perf_counter() - started, dataset_seconds)
+        return results
+
+    @st.cache_data(ttl=VERSION_CHECK_SECONDS)
+    def _load_data_versions(_self):
+        """Version counters per (ExID, CLASS), bumped by every upload that touches them"""
+        return _self._read_sql(
+            "SELECT ExID, CLASS, Version FROM data_versions", what="data versions", show_errors=False
+        )
+
+    def data_version(self, exam_id=None, class_name=None):
+        """Cache version of the data for an exam and/or class (None means any)"""
+        versions = self._load_data_versions()
+        if versions.empty:
+            return f"ttl-{int(time.time() // FALLBACK_TTL)}"
+
+        mask = pd.Series(True, index=versions.index)
+        if exam_id:
+            mask &= versions['ExID'].astype(str) == str(exam_id)
+        if class_name:
+            mask &= versions['CLASS'] == class_name
+        # A sum grows whenever any matching counter is bumped or a new pair appears
+        return int(versions.loc[mask, 'Version'].sum())
+
+    @classmethod
+    def refresh_data_versions(cls):
+        """Re-read data_versions on the next call, e.g. right after an upload in this process"""
+        cls._load_data_versions.clear()
+
+    @property
+    def normalized(self):
+        """True when reads go to the normalized tables (DB_LAYOUT=normalized)"""
+        return self.db_config.layout == 'normalized'
+
+    def _read_sql(self, query, params=None, what="data", show_errors=True):
+        """Run a query on a pooled connection and return the result as a DataFrame"""
+        connection = self.db_config.get_connection()
         if not connection:
             return pd.DataFrame()
-        
+
         try:
-            query = """
-            SELECT DISTINCT STID, STNAME, FATHER, ROLLNO, CLASS, PHONE
-            FROM exam_results
-            ORDER BY STNAME
-            """
-            df = pd.read_sql(query, connection)
+            started = time.perf_counter()
+            df = pd.read_sql(query, connection, params=params)
+            seconds = time.perf_counter() - started
+            instrumentation.record('query', what, seconds,
+                                   rows=len(df), bytes=int(df.memory_usage(deep=True).sum()))
+            if instrumentation.slow_queries.is_slow(seconds):
+                self._log_slow_query(connection, query, params, what, seconds, len(df))
             return df
         except Exception as e:
-            st.error(f"Error fetching students: {e}")
+            if show_errors:
+                st.error(f"Error fetching {what}: {e}")
             return pd.DataFrame()
         finally:
             connection.close()
-    
-    @st.cache_data(ttl=300)
-    def get_exam_results(_self, exam_id=None, class_filter=None):
-        """Fetch exam results with optional filters"""
-        connection = _self.db_config.get_connection()
-        if not connection:
-            return pd.DataFrame()
-        
+
+    def _log_slow_query(self, connection, query, params, what, seconds, rows):
+        """Add a query to the slow query log with its EXPLAIN plan, taken on the same connection"""
+        engine = dialect(connection)
+        entry = SlowQuery(
+            what, inspect.cleandoc(query), list(params or []), seconds, rows,
+            logged_at=time.time(), backend=engine
+        )
+        explain = "EXPLAIN QUERY PLAN " if engine == 'sqlite' else "EXPLAIN "
         try:
-            query = "SELECT * FROM exam_results WHERE 1=1"
-            params = []
-            
-            if exam_id:
-                query += " AND ExID = %s"
-                params.append(exam_id)
-            
-            if class_filter:
-                query += " AND CLASS = %s"
-                params.append(class_filter)
-            
-            query += " ORDER BY ExRnk"
-            
-            df = pd.read_sql(query, connection, params=params)
-            return df
+            entry.plan = pd.read_sql(explain + query, connection, params=params)
+            entry.full_scans = full_scans(entry.plan, engine)
         except Exception as e:
+            entry.plan_error = str(e)
+        instrumentation.slow_queries.add(entry)
+
+    def _results_query(self, columns, filters, order_by, limit=None, cohort=(), conditions=()):
+        """Build the exam result query for the configured storage layout.
+
+        `cohort` filters pick students rather than rows and `conditions` are
+        extra (template, params) predicates (see normalized_store.results_query).
+        Falls back to the wide exam_results table when a requested column is
+        not part of the normalized layout (e.g. the QS*Ids lists).
+        """
+        built = None
+        if self.normalized:
+            built = normalized_store.results_query(columns, filters, order_by, cohort, conditions)
+
+        if built is None:
+            where_parts = [f"`{column}` = %s" for column, _ in filters]
+            if cohort:
+                cohort_where = " AND ".join(f"`{column}` = %s" for column, _ in cohort)
+                where_parts.append(f"STID IN (SELECT STID FROM exam_results WHERE {cohort_where})")
+            extra, extra_params = normalized_store.render_conditions(conditions, _QuotedColumns())
+            where = " AND ".join(where_parts + extra) or "1=1"
+            query = f"SELECT {select_list(columns)} FROM exam_results WHERE {where}"
+            if order_by:
+                query += " ORDER BY " + normalized_store.render_order_by(order_by, _QuotedColumns())
+            built = query, [value for _, value in filters] + [value for _, value in cohort] + extra_params
+
+        if limit is not None:
+            query, params = built
+            built = query + " LIMIT %s", params + [int(limit)]
+        return built
+
+    @versioned_cache()
+    def get_all_students(_self):
+        """Fetch all students data"""
+        if _self.normalized:
+            query = """
+            SELECT STID, STNAME, FATHER, ROLLNO, CLASS, PHONE
+            FROM students
+            ORDER BY STNAME
+            """
+        else:
+            query = """
+            SELECT DISTINCT STID, STNAME, FATHER, ROLLNO, CLASS, PHONE
+            FROM exam_results
+            ORDER BY STNAME
+            """
+        return _self._read_sql(query, what="students")
+
+    @versioned_cache(exam_arg='exam_id', class_arg='class_filter')
+    def get_exam_results(_self, exam_id=None, class_filter=None, columns="full"):
+        """Fetch exam results with optional filters.
+
+        `columns` is a projection name from models.schema.PROJECTIONS
+        ("summary", "subjects", "item-level", "full") or a list of column names.
+        """
+        filters = []
+        if exam_id:
+            filters.append(('ExID', exam_id))
+        if class_filter:
+            filters.append(('CLASS', class_filter))
+
+        try:
+            query, params = _self._results_query(columns, filters, [('ExRnk', 'ASC')])
+        except ValueError as e:
             st.error(f"Error fetching exam results: {e}")
             return pd.DataFrame()
-        finally:
-            connection.close()
-    
-    @st.cache_data(ttl=300)
-    def get_student_performance(_self, student_id):
-        """Get performance data for a specific student"""
-        connection = _self.db_config.get_connection()
-        if not connection:
-            return pd.DataFrame()
-        
+        return _self._read_sql(query, params, what="exam results")
+
+    @versioned_cache()
+    def get_student_performance(_self, student_id, columns="full"):
+        """Get performance data for a specific student, limited to `columns`"""
         try:
-            query = """
-            SELECT * FROM exam_results 
-            WHERE STID = %s 
-            ORDER BY ExDt DESC
-            """
-            df = pd.read_sql(query, connection, params=[student_id])
-            return df
-        except Exception as e:
+            query, params = _self._results_query(columns, [('STID', student_id)], [('ExDt', 'DESC')])
+        except ValueError as e:
             st.error(f"Error fetching student performance: {e}")
             return pd.DataFrame()
-        finally:
-            connection.close()
-    
-    @st.cache_data(ttl=300)
-    def get_class_analytics(_self, class_name, exam_id=None):
-        """Get analytics for a specific class"""
-        connection = _self.db_config.get_connection()
-        if not connection:
+        return _self._read_sql(query, params, what="student performance")
+
+    @versioned_cache()
+    def get_cohort_performance(_self, class_name=None, exam_id=None, columns="subjects"):
+        """Full exam history of every student in a class and/or exam cohort, in one query.
+
+        Rows are ordered by student and then newest exam first, like
+        get_student_performance.
+        """
+        cohort = []
+        if class_name:
+            cohort.append(('CLASS', class_name))
+        if exam_id:
+            cohort.append(('ExID', exam_id))
+        if not cohort:
+            st.error("Error fetching cohort performance: choose a class or an exam")
             return pd.DataFrame()
-        
+
         try:
-            query = """
-            SELECT * FROM exam_results 
-            WHERE CLASS = %s
-            """
-            params = [class_name]
-            
-            if exam_id:
-                query += " AND ExID = %s"
-                params.append(exam_id)
-            
-            query += " ORDER BY ExRnk"
-            
-            df = pd.read_sql(query, connection, params=params)
-            return df
-        except Exception as e:
+            query, params = _self._results_query(
+                columns, [], [('STID', 'ASC'), ('ExDt', 'DESC')], cohort=cohort
+            )
+        except ValueError as e:
+            st.error(f"Error fetching cohort performance: {e}")
+            return pd.DataFrame()
+        return _self._read_sql(query, params, what="cohort performance")
+
+    @versioned_cache(exam_arg='exam_id', class_arg='class_name')
+    def get_class_analytics(_self, class_name, exam_id=None, columns="full"):
+        """Get analytics for a specific class, limited to `columns`"""
+        filters = [('CLASS', class_name)]
+        if exam_id:
+            filters.append(('ExID', exam_id))
+
+        try:
+            query, params = _self._results_query(columns, filters, [('ExRnk', 'ASC')])
+        except ValueError as e:
             st.error(f"Error fetching class analytics: {e}")
             return pd.DataFrame()
-        finally:
-            connection.close()
-    
-    @st.cache_data(ttl=300)
+        return _self._read_sql(query, params, what="class analytics")
+
+    @versioned_cache()
     def get_available_exams(_self):
         """Get list of available exams"""
-        connection = _self.db_config.get_connection()
-        if not connection:
-            return pd.DataFrame()
-        
-        try:
+        if _self.normalized:
             query = """
-            SELECT DISTINCT ExID, EXNM, ExDt 
-            FROM exam_results 
+            SELECT ExID, EXNM, ExDt
+            FROM exams
             ORDER BY ExDt DESC
             """
-            df = pd.read_sql(query, connection)
-            return df
-        except Exception as e:
-            st.error(f"Error fetching exams: {e}")
-            return pd.DataFrame()
-        finally:
-            connection.close()
-    
-    @st.cache_data(ttl=300)
+        else:
+            query = """
+            SELECT DISTINCT ExID, EXNM, ExDt
+            FROM exam_results
+            ORDER BY ExDt DESC
+            """
+        return _self._read_sql(query, what="exams")
+
+    @versioned_cache()
     def get_available_classes(_self):
         """Get list of available classes"""
-        connection = _self.db_config.get_connection()
-        if not connection:
-            return []
-        
-        try:
+        if _self.normalized:
+            query = "SELECT DISTINCT CLASS FROM student_exams ORDER BY CLASS"
+        else:
             query = "SELECT DISTINCT CLASS FROM exam_results ORDER BY CLASS"
-            df = pd.read_sql(query, connection)
-            return df['CLASS'].tolist()
-        except Exception as e:
-            st.error(f"Error fetching classes: {e}")
-            return []
-        finally:
-            connection.close()
+        df = _self._read_sql(query, what="classes")
+        return df['CLASS'].tolist() if not df.empty else []
+
+    @versioned_cache()
+    def get_exam_catalog(_self):
+        """Exams as an OptionCatalog, newest first, labelled "name · date".
+
+        Exams sharing a name get their ExID appended so every label is unique.
+        """
+        exams = _self.get_available_exams()
+        if exams.empty:
+            return OptionCatalog()
+
+        exams = exams.drop_duplicates('ExID')
+        ids = exams['ExID'].astype(str)
+        dates = pd.to_datetime(exams['ExDt'], errors='coerce').dt.strftime('%Y-%m-%d')
+        names = exams['EXNM'].fillna('').astype(str).str.strip()
+        names = names.where(names != '', ids)
+        labels = names + (" · " + dates).fillna('')
+        labels = labels.where(~names.duplicated(keep=False), labels + " · " + ids)
+        return OptionCatalog(
+            ids=ids.tolist(),
+            labels=dict(zip(ids, labels)),
+            dates=dict(zip(ids, dates.astype(object).where(dates.notna(), None)))
+        )
+
+    @versioned_cache()
+    def get_class_catalog(_self):
+        """Classes as an OptionCatalog, sorted by name"""
+        classes = [str(c) for c in _self.get_available_classes() if c is not None]
+        return OptionCatalog(ids=classes, labels=dict(zip(classes, classes)))
+
+    @versioned_cache(exam_arg='exam_id', class_arg='class_name')
+    def get_results_page(_self, class_name=None, exam_id=None, sort='ExRnk', descending=None,
+                         search="", after=None, limit=50, columns="subjects"):
+        """One page of result rows, keyset-paginated on (sort column is NULL, sort column, STID, ExID).
+
+        `after` is that key of the last row of the previous page (None for the
+        first page), so a page seeks to its first row instead of skipping an
+        OFFSET. Rows whose sort column is NULL (no ranks without marks) come last.
+        `search` matches the start of the student name or roll number. Ask for
+        one row more than the page size to learn whether another page follows.
+        """
+        if sort not in RESULT_SORT_COLUMNS:
+            st.error(f"Error fetching results: cannot sort by {sort}")
+            return pd.DataFrame()
+        direction = RESULT_SORT_COLUMNS[sort] if descending is None else ('DESC' if descending else 'ASC')
+
+        filters = []
+        if class_name:
+            filters.append(('CLASS', class_name))
+        if exam_id:
+            filters.append(('ExID', exam_id))
+
+        conditions = []
+        if search:
+            pattern = like_pattern(search)
+            conditions.append(("({STNAME} LIKE %s OR {ROLLNO} LIKE %s)", [pattern, pattern]))
+        if after is not None:
+            seek = '>' if direction == 'ASC' else '<'
+            after_null, after_value, after_stid, after_exam = after
+            if after_null:
+                conditions.append((f"({{{sort}}} IS NULL AND ({{STID}}, {{ExID}}) {seek} (%s, %s))",
+                                   [after_stid, after_exam]))
+            else:
+                conditions.append((f"({{{sort}}} IS NULL OR ({{{sort}}}, {{STID}}, {{ExID}}) {seek} (%s, %s, %s))",
+                                   [after_value, after_stid, after_exam]))
+
+        try:
+            query, params = _self._results_query(
+                columns, filters,
+                [(f"{{{sort}}} IS NULL", 'ASC'), (sort, direction), ('STID', direction), ('ExID', direction)],
+                limit=limit, conditions=conditions
+            )
+        except ValueError as e:
+            st.error(f"Error fetching results: {e}")
+            return pd.DataFrame()
+        return _self._read_sql(query, params, what="results")
+
+    @versioned_cache(exam_arg='exam_id', class_arg='class_name')
+    def get_top_performers(_self, class_name, exam_id=None, limit=10):
+        """Best-ranked result rows of a class, optionally for one exam"""
+        filters = [('CLASS', class_name)]
+        if exam_id:
+            filters.append(('ExID', exam_id))
+
+        query, params = _self._results_query(
+            ['STNAME', 'ExMk', 'ExRnk'], filters, [('ExRnk', 'ASC')], limit=limit
+        )
+        return _self._read_sql(query, params, what="top performers")
+
+    @versioned_cache(exam_arg='exam_id')
+    def get_exam_summary(_self, exam_id):
+        """Pre-aggregated score summary of one exam (see services.summary_store).
+
+        The summary getters return an empty frame when the summary tables are
+        missing or not yet filled, so callers can fall back to raw rows.
+        """
+        query = "SELECT * FROM exam_summary WHERE ExID = %s"
+        return _self._read_sql(query, [exam_id], what="exam summary", show_errors=False)
+
+    @versioned_cache(exam_arg='exam_id', class_arg='class_name')
+    def get_class_summary(_self, class_name=None, exam_id=None):
+        """Pre-aggregated score summaries, one row per exam and class"""
+        query = "SELECT * FROM exam_class_summary WHERE 1=1"
+        params = []
+        if class_name:
+            query += " AND CLASS = %s"
+            params.append(class_name)
+        if exam_id:
+            query += " AND ExID = %s"
+            params.append(exam_id)
+        return _self._read_sql(query, params, what="class summary", show_errors=False)
+
+    @versioned_cache(exam_arg='exam_id', class_arg='class_name')
+    def get_class_subject_summary(_self, class_name, exam_id=None):
+        """Pre-aggregated per-subject summaries of a class, one row per exam and subject"""
+        query = "SELECT * FROM exam_class_subject_summary WHERE CLASS = %s"
+        params = [class_name]
+        if exam_id:
+            query += " AND ExID = %s"
+            params.append(exam_id)
+        return _self._read_sql(query, params, what="class subject summary", show_errors=False)
+
+    @versioned_cache(exam_arg='exam_id')
+    def get_class_comparison(_self, exam_id):
+        """Per-class aggregates of one exam, grouped by MySQL instead of pandas.
+
+        Returns one row per class with the mark count, mean, sum, sum of squares
+        (for the standard deviation), min and max, plus the mean and stored name
+        of every subject slot.
+        """
+        subject_means = ", ".join(f"AVG(`{c}`) AS `{c}`" for c in subject_columns('S{}Mk'))
+        subject_names = ", ".join(f"MAX(`{c}`) AS `{c}`" for c in subject_columns('S{}NM'))
+        query = f"""
+        SELECT CLASS,
+               COUNT(ExMk) AS StudentCount,
+               AVG(ExMk) AS MeanMarks,
+               SUM(ExMk) AS SumMarks,
+               SUM(ExMk * ExMk) AS SumSquares,
+               MIN(ExMk) AS MinMarks,
+               MAX(ExMk) AS MaxMarks,
+               {subject_means},
+               {subject_names}
+        FROM exam_results
+        WHERE ExID = %s
+        GROUP BY CLASS
+        ORDER BY CLASS
+        """
+        return _self._read_sql(query, [exam_id], what="class comparison")
+
+    @versioned_cache(class_arg='class_name')
+    def search_students(_self, term="", class_name=None, match="prefix", limit=20, offset=0):
+        """Find students whose name, roll number or STID matches `term`.
+
+        match="prefix" is answered from the students indexes (STNAME, ROLLNO,
+        primary key); match="infix" finds the term anywhere and scans the
+        students dimension, which is still far smaller than exam_results.
+        Returns at most `limit` rows starting at `offset`.
+        """
+        pattern = like_pattern(term, match)
+
+        query = """
+        SELECT STID, STNAME, ROLLNO, CLASS
+        FROM students
+        WHERE (STNAME LIKE %s OR ROLLNO LIKE %s OR STID LIKE %s)
+        """
+        params = [pattern, pattern, pattern]
+        if class_name:
+            query += " AND CLASS = %s"
+            params.append(class_name)
+        query += " ORDER BY STNAME, STID LIMIT %s OFFSET %s"
+        params += [int(limit), int(offset)]
+        return _self._read_sql(query, params, what="students")
+
+    @versioned_cache(exam_arg='exam_id')
+    def get_item_analysis(_self, exam_id, subject_no=None):
+        """Per-question difficulty, discrimination and incorrect/skip rates of an exam.
+
+        Decoded from the bit-packed exam_responses rows (see
+        services.response_store); one row per subject and question, empty when
+        the exam has no question-level data.
+        """
+        query = "SELECT * FROM exam_responses WHERE ExID = %s"
+        params = [exam_id]
+        if subject_no:
+            query += " AND SubjectNo = %s"
+            params.append(subject_no)
+        rows = _self._read_sql(query + " ORDER BY SubjectNo", params, what="question responses", show_errors=False)
+
+        analyses = []
+        for row in rows.itertuples():
+            matrix = response_store.ResponseMatrix.unpack(
+                row.StudentIds, row.QuestionIds, row.Correct, row.Incorrect, row.Skipped, row.Scores
+            )
+            analysis = response_store.item_analysis(matrix)
+            analysis.insert(0, 'SubjectNo', row.SubjectNo)
+            analysis.insert(1, 'Subject', row.SubjectName)
+            analyses.append(analysis)
+        return pd.concat(analyses, ignore_index=True) if analyses else pd.DataFrame()
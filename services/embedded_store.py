@@ -0,0 +1,175 @@
+"""Schema and MySQL snapshots for the embedded backends (DB_BACKEND=sqlite/duckdb).
+
+The MySQL schema is built by the versioned migrations in utils/migrations.py.
+An embedded database is created at the latest version in one step, from the
+same table definitions the migrations use (models.schema, summary_store,
+response_store, ingest_service and the students table of normalized_store),
+rewritten by portable_ddl() into types both SQLite and DuckDB understand. Only
+the wide layout is kept. Secondary indexes, inline and from the migrations'
+CREATE INDEX steps, are only created on SQLite; DuckDB answers the same reads
+from its column zonemaps.
+
+snapshot() copies the tables of a MySQL database into an embedded file, e.g. a
+local DuckDB copy for read-heavy analytics:
+
+    python -m services.embedded_store analytics.duckdb --backend duckdb
+
+then run the app with DB_BACKEND=duckdb DB_PATH=analytics.duckdb.
+"""
+import argparse
+import re
+import time
+
+import pandas as pd
+
+from config.embedded import dialect
+from models.schema import EXAM_RESULTS_COLUMNS
+from services.ingest_service import DATA_VERSIONS_DDL, HASH_TABLE_DDL
+from services.normalized_store import NORMALIZED_TABLES_DDL
+from services.response_store import RESPONSES_TABLE_DDL
+from services.summary_store import SUMMARY_TABLES_DDL
+
+# MySQL type -> SQLite/DuckDB type, applied in order
+_PORTABLE_TYPES = [
+    (r"\bBIGINT UNSIGNED\b", "TEXT"),  # 64-bit hashes overflow the signed BIGINT; kept as text
+    (r"\b(?:VARCHAR\(\d+\)|MEDIUMTEXT)", "TEXT"),
+    (r"\bMEDIUMBLOB\b", "BLOB"),
+    (r"\b(?:TINYINT|INT)\b", "INTEGER"),
+    (r"\bFLOAT\b", "DOUBLE"),
+]
+_ON_UPDATE = re.compile(r"\s+ON UPDATE CURRENT_TIMESTAMP", re.IGNORECASE)
+_TABLE_NAME = re.compile(r"CREATE TABLE IF NOT EXISTS (\w+)", re.IGNORECASE)
+_INLINE_INDEX = re.compile(r",\s*INDEX\s+(\w+)\s*(\([^)]*\))", re.IGNORECASE)
+_CREATE_INDEX = re.compile(r"^\s*CREATE INDEX\s+(\w+)\s+ON\s+(\w+)\s*(\([^)]*\))\s*$", re.IGNORECASE)
+
+
+def portable_type(sql_type):
+    """SQLite/DuckDB column type for a MySQL column type"""
+    for pattern, portable in _PORTABLE_TYPES:
+        sql_type = re.sub(pattern, portable, sql_type, flags=re.IGNORECASE)
+    return sql_type
+
+
+def portable_ddl(ddl):
+    """Rewrite one MySQL CREATE TABLE statement; returns (create table, [create index])"""
+    table = _TABLE_NAME.search(ddl).group(1)
+    indexes = [
+        f"CREATE INDEX IF NOT EXISTS {name} ON {table} {columns}"
+        for name, columns in _INLINE_INDEX.findall(ddl)
+    ]
+    ddl = _ON_UPDATE.sub("", _INLINE_INDEX.sub("", ddl))
+    return portable_type(ddl), indexes
+
+
+def _exam_results_ddl():
+    columns = ",\n        ".join(f"`{name}` {sql_type}" for name, sql_type in EXAM_RESULTS_COLUMNS)
+    return f"""
+    CREATE TABLE IF NOT EXISTS exam_results (
+        {columns},
+        PRIMARY KEY (STID, ExID)
+    )
+    """
+
+
+# MySQL definitions of the tables an embedded database keeps; the normalized
+# layout is not supported, but sync_students keeps the students dimension
+_SOURCE_DDL = [
+    _exam_results_ddl(),
+    HASH_TABLE_DDL,
+    NORMALIZED_TABLES_DDL[0],
+    *SUMMARY_TABLES_DDL,
+    RESPONSES_TABLE_DDL,
+    DATA_VERSIONS_DDL,
+]
+
+EMBEDDED_TABLES_DDL = []
+EMBEDDED_INDEXES_DDL = []
+for _ddl in _SOURCE_DDL:
+    _table_ddl, _indexes = portable_ddl(_ddl)
+    EMBEDDED_TABLES_DDL.append(_table_ddl)
+    EMBEDDED_INDEXES_DDL.extend(_indexes)
+
+# Tables copied by snapshot(), in this order
+SNAPSHOT_TABLES = [_TABLE_NAME.search(ddl).group(1) for ddl in _SOURCE_DDL]
+
+
+def migration_indexes():
+    """The CREATE INDEX steps of utils.migrations, made idempotent, for the tables kept here"""
+    # Imported here: utils.migrations imports this module
+    from utils.migrations import MIGRATIONS
+
+    indexes = []
+    for _, _, steps in MIGRATIONS:
+        for step in steps:
+            match = isinstance(step, str) and _CREATE_INDEX.match(step)
+            if match and match.group(2) in SNAPSHOT_TABLES:
+                indexes.append(f"CREATE INDEX IF NOT EXISTS {match.group(1)} ON {match.group(2)} {match.group(3)}")
+    return indexes
+
+
+def create_schema(cursor):
+    """Create every table (and on SQLite the indexes) of an embedded database"""
+    for ddl in EMBEDDED_TABLES_DDL:
+        cursor.execute(ddl)
+    if dialect(cursor) == 'sqlite':
+        for ddl in migration_indexes() + EMBEDDED_INDEXES_DDL:
+            cursor.execute(ddl)
+
+
+def _table_columns(cursor, table):
+    cursor.execute(f"SELECT * FROM {table} LIMIT 0")
+    columns = [description[0] for description in cursor.description]
+    cursor.fetchall()
+    return columns
+
+
+def snapshot(source, target, tables=SNAPSHOT_TABLES, chunk_size=50_000, log=print):
+    """Replace the `tables` of the embedded connection `target` with those of the MySQL connection `source`.
+
+    Rows are streamed in chunks of `chunk_size` and the copy is one
+    transaction, so readers of `target` see either the old or the new data.
+    Returns {table: rows copied}.
+    """
+    cursor = target.cursor()
+    copied = {}
+    try:
+        create_schema(cursor)
+        target.start_transaction()
+        for table in tables:
+            started = time.perf_counter()
+            columns = _table_columns(cursor, table)
+            cursor.execute(f"DELETE FROM {table}")
+            copied[table] = 0
+            for chunk in pd.read_sql(f"SELECT * FROM `{table}`", source, chunksize=chunk_size):
+                # Columns the embedded schema does not keep (e.g. added by hand in MySQL) are left out
+                chunk = chunk[[c for c in columns if c in chunk.columns]]
+                target.insert_frame(table, chunk)
+                copied[table] += len(chunk)
+            log(f"{table:<28} {copied[table]:>10,} rows  {time.perf_counter() - started:8.2f}s")
+        target.commit()
+    except Exception:
+        target.rollback()
+        raise
+    finally:
+        cursor.close()
+    return copied
+
+
+if __name__ == "__main__":
+    from config.database import DatabaseConfig
+    from config.embedded import EMBEDDED_BACKENDS, connect
+
+    parser = argparse.ArgumentParser(description="Copy the configured MySQL database into an embedded database file")
+    parser.add_argument('path', help="SQLite/DuckDB file to write (created if missing)")
+    parser.add_argument('--backend', choices=EMBEDDED_BACKENDS, default='duckdb')
+    parser.add_argument('--table', action='append', choices=SNAPSHOT_TABLES, help="table to copy, repeatable")
+    args = parser.parse_args()
+
+    source = DatabaseConfig(backend='mysql').connect()
+    target = connect(args.backend, args.path)
+    try:
+        copied = snapshot(source, target, args.table or SNAPSHOT_TABLES)
+        print(f"Copied {sum(copied.values()):,} rows into {args.path} ({args.backend})")
+    finally:
+        target.close()
+        source.close()
@@ -0,0 +1,186 @@
+"""Bulk report-card export: one card per student, rendered in parallel into a ZIP.
+
+Cards are rendered by a process pool (plotly figure serialization and PDF
+layout are CPU bound) and written to the archive as they complete, so only a
+bounded number of rendered cards is held in memory at a time.
+
+HTML cards need nothing beyond the app requirements and load plotly.js from
+its CDN. PDF cards additionally need the optional ``weasyprint`` (layout) and
+``kaleido`` (static chart images) packages.
+"""
+import argparse
+import html
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from models.data_models import ExportSummary
+from utils.helpers import format_date, format_rank, format_score
+from utils.visualizations import create_performance_chart
+
+EXPORT_FORMATS = ['html', 'pdf']
+# Only these history columns are sent to the workers
+HISTORY_COLUMNS = ['ExDt', 'EXNM', 'ExMk', 'ExRnk', 'ClassExRnk']
+
+_CARD_STYLE = """
+body { font-family: Helvetica, Arial, sans-serif; margin: 2rem; color: #222; }
+h1 { color: #1f77b4; margin-bottom: 0.2rem; }
+table { border-collapse: collapse; margin: 1rem 0; }
+th, td { border: 1px solid #ccc; padding: 0.3rem 0.7rem; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+.metrics td { border: none; padding-right: 2rem; text-align: left; }
+"""
+
+
+def check_format(fmt):
+    """Raise ValueError/ImportError when `fmt` cannot be produced in this environment"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {', '.join(EXPORT_FORMATS)}")
+    if fmt == 'pdf':
+        try:
+            import kaleido  # noqa: F401
+            import weasyprint  # noqa: F401
+        except ImportError as e:
+            raise ImportError(
+                "PDF report cards need the optional 'weasyprint' and 'kaleido' packages; "
+                "install them or export HTML instead"
+            ) from e
+
+
+def card_filename(student_id, report, fmt):
+    """Archive member name of a card, e.g. 'ClassA/1234_Jane_Doe.html'"""
+    info = report['student_info']
+    name = re.sub(r'[^A-Za-z0-9]+', '_', str(info['name'] or '')).strip('_')
+    folder = re.sub(r'[^A-Za-z0-9]+', '_', str(info['class'] or 'NoClass')).strip('_')
+    return f"{folder}/{student_id}_{name}.{fmt}"
+
+
+def render_card_html(report, chart_html):
+    """HTML of one report card around an already rendered trend chart"""
+    info = report['student_info']
+    escape = lambda value: html.escape(str(value if value is not None else 'N/A'))
+
+    subject_rows = "".join(
+        f"<tr><td>{escape(subject)}</td><td>{format_score(stats['average'])}</td>"
+        f"<td>{format_score(stats['max'])}</td><td>{format_score(stats['min'])}</td></tr>"
+        for subject, stats in report['subject_performance'].items()
+    )
+    history_rows = "".join(
+        f"<tr><td>{escape(row.EXNM)}</td><td>{format_date(row.ExDt)}</td>"
+        f"<td>{format_score(row.ExMk)}</td><td>{format_rank(row.ExRnk)}</td></tr>"
+        for row in report['exam_history'].itertuples()
+    )
+
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Report card - {escape(info['name'])}</title>
+<style>{_CARD_STYLE}</style></head>
+<body>
+<h1>{escape(info['name'])}</h1>
+<p>Father: {escape(info['father'])} · Roll No: {escape(info['roll_no'])} · Class: {escape(info['class'])}</p>
+<table class="metrics"><tr>
+<td>Exams: <b>{report['exam_count']}</b></td>
+<td>Average: <b>{format_score(report['average_score'])}</b></td>
+<td>Best: <b>{format_score(report['best_score'])}</b></td>
+<td>Best Rank: <b>{format_rank(report['best_rank'])}</b></td>
+</tr></table>
+<h2>Subject Breakdown</h2>
+<table><tr><th>Subject</th><th>Average</th><th>Highest</th><th>Lowest</th></tr>{subject_rows}</table>
+<h2>Performance Trend</h2>
+{chart_html}
+<h2>Exam History</h2>
+<table><tr><th>Exam</th><th>Date</th><th>Marks</th><th>Rank</th></tr>{history_rows}</table>
+</body></html>
+"""
+
+
+def render_card(job):
+    """Render one (filename, report, fmt) job to (filename, bytes); runs in a worker process"""
+    filename, report, fmt = job
+    fig = create_performance_chart(report['exam_history'])
+
+    if fmt == 'html':
+        chart = fig.to_html(full_html=False, include_plotlyjs='cdn')
+        return filename, render_card_html(report, chart).encode('utf-8')
+
+    import weasyprint
+
+    svg = fig.to_image(format='svg', width=800, height=400).decode('utf-8')
+    return filename, weasyprint.HTML(string=render_card_html(report, svg)).write_pdf()
+
+
+class ExportService:
+    def __init__(self, fmt='html', workers=None):
+        check_format(fmt)
+        self.fmt = fmt
+        self.workers = workers or int(os.getenv('EXPORT_WORKERS', 0)) or os.cpu_count() or 1
+
+    def _jobs(self, reports):
+        for student_id, report in reports.items():
+            history = report['exam_history']
+            report = dict(report, exam_history=history[[c for c in HISTORY_COLUMNS if c in history.columns]])
+            yield card_filename(student_id, report, self.fmt), report, self.fmt
+
+    def export(self, reports, destination, on_progress=None):
+        """Write one card per report into a ZIP at `destination` (path or binary file).
+
+        `reports` maps STID to a ReportService student report.
+        `on_progress(done, total)` is called after each card is written.
+        """
+        summary = ExportSummary(fmt=self.fmt, workers=self.workers)
+        total = len(reports)
+        started = time.perf_counter()
+        jobs = self._jobs(reports)
+        # Bounded number of cards in flight, so memory does not grow with the cohort
+        max_pending = self.workers * 4
+
+        with zipfile.ZipFile(destination, 'w', zipfile.ZIP_DEFLATED) as archive, \
+                ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pending = set()
+            for job in jobs:
+                pending.add(pool.submit(render_card, job))
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    self._write(archive, done, summary, total, on_progress)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                self._write(archive, done, summary, total, on_progress)
+
+        summary.elapsed_seconds = time.perf_counter() - started
+        return summary
+
+    def _write(self, archive, futures, summary, total, on_progress):
+        for future in futures:
+            try:
+                filename, content = future.result()
+            except Exception as e:
+                summary.failed.append(str(e))
+                continue
+            archive.writestr(filename, content)
+            summary.cards += 1
+            summary.bytes_written += len(content)
+        if on_progress:
+            on_progress(summary.cards + len(summary.failed), total)
+
+
+if __name__ == "__main__":
+    from services.report_service import ReportService
+
+    parser = argparse.ArgumentParser(description="Export report cards of a class and/or exam cohort to a ZIP")
+    parser.add_argument('output', help="ZIP file to write")
+    parser.add_argument('--class', dest='class_name')
+    parser.add_argument('--exam', dest='exam_id')
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='html')
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+    if not (args.class_name or args.exam_id):
+        parser.error("choose a cohort with --class and/or --exam")
+
+    reports = ReportService().generate_student_reports(args.class_name, args.exam_id)
+    summary = ExportService(args.format, args.workers).export(reports, args.output)
+    print(
+        f"{summary.cards:,} cards  {summary.elapsed_seconds:8.2f}s  "
+        f"{summary.cards_per_second:,.1f} cards/s  {summary.bytes_written / 1e6:,.1f} MB  "
+        f"({summary.workers} workers, {len(summary.failed)} failed)"
+    )
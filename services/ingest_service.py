@@ -0,0 +1,370 @@
+import argparse
+import os
+import tempfile
+import time
+import pandas as pd
+from config.database import DatabaseConfig
+from models.data_models import IngestSummary
+from models.schema import EXAM_RESULTS_COLUMNS, KEY_COLUMNS, canonical_column
+from services.normalized_store import sync_normalized, sync_students
+from services.rank_engine import recompute_ranks
+from services.response_store import refresh_responses
+from services.summary_store import refresh_summaries
+from utils.helpers import normalize_exam_dates
+
+# Ids, names and dates are read as text so values like roll numbers keep leading
+# zeros and key lookups compare VARCHAR to VARCHAR
+TEXT_COLUMNS = {
+    name for name, sql_type in EXAM_RESULTS_COLUMNS
+    if sql_type.startswith(('VARCHAR', 'TEXT', 'DATE'))
+}
+
+INGEST_MODES = ['executemany', 'load-data']
+STAGING_TABLE = 'exam_results_stage'
+HASH_TABLE = 'exam_result_hashes'
+
+HASH_TABLE_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {HASH_TABLE} (
+        ExID VARCHAR(32),
+        STID VARCHAR(32),
+        RowHash BIGINT UNSIGNED NOT NULL,
+        PRIMARY KEY (ExID, STID)
+    )
+"""
+
+DATA_VERSIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS data_versions (
+        ExID VARCHAR(32),
+        CLASS VARCHAR(64),
+        Version BIGINT NOT NULL DEFAULT 1,
+        UpdatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (ExID, CLASS)
+    )
+"""
+
+
+class IngestError(Exception):
+    """Raised when a batch fails; batches before `next_batch` are already committed"""
+
+    def __init__(self, message, next_batch, summary):
+        super().__init__(message)
+        self.next_batch = next_batch
+        self.summary = summary
+
+
+def prepare_batch(chunk):
+    """Validate and clean one CSV chunk so it can be sent to exam_results"""
+    chunk = chunk.rename(columns=canonical_column)
+    missing = [c for c in KEY_COLUMNS if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {', '.join(missing)}")
+
+    # A key repeated in one chunk keeps its last row in both upload modes (LOAD DATA
+    # into the keyed staging table would otherwise keep the first)
+    chunk = chunk.dropna(subset=KEY_COLUMNS).drop_duplicates(KEY_COLUMNS, keep='last')
+    if 'ExDt' in chunk.columns:
+        chunk['ExDt'] = normalize_exam_dates(chunk['ExDt'])
+    # NaN is not a valid MySQL value; send NULL instead
+    return chunk.astype(object).where(chunk.notna(), None)
+
+
+def row_hashes(batch):
+    """64-bit content hash per row, independent of column order and int/float parsing"""
+    normalized = {}
+    for column in sorted(batch.columns):
+        values = batch[column]
+        if column not in TEXT_COLUMNS:
+            values = pd.to_numeric(values, errors='coerce').astype(float)
+        normalized[column] = values.astype(str)
+    return pd.util.hash_pandas_object(pd.DataFrame(normalized, index=batch.index), index=False)
+
+
+def _exam_class_pairs(batch):
+    classes = batch['CLASS'] if 'CLASS' in batch.columns else pd.Series(None, index=batch.index)
+    pairs = pd.DataFrame({'ExID': batch['ExID'].astype(str), 'CLASS': classes.fillna('')})
+    return set(pairs.drop_duplicates().itertuples(index=False, name=None))
+
+
+def bump_data_versions(cursor, pairs):
+    """Increment the data version of every (ExID, CLASS) pair so cached reads of it are dropped"""
+    if not pairs:
+        return
+    cursor.executemany("""
+        INSERT INTO data_versions (ExID, CLASS, Version)
+        VALUES (%s, %s, 1)
+        ON DUPLICATE KEY UPDATE Version = Version + 1
+    """, sorted(pairs))
+
+
+class IngestService:
+    def __init__(self, batch_size=None, mode='executemany', skip_unchanged=True):
+        if mode not in INGEST_MODES:
+            raise ValueError(f"Unknown ingest mode '{mode}', expected one of {', '.join(INGEST_MODES)}")
+        self.db_config = DatabaseConfig()
+        if mode == 'load-data' and self.db_config.embedded:
+            raise ValueError("The load-data ingest mode needs a MySQL server (DB_BACKEND=mysql)")
+        self.batch_size = batch_size or int(os.getenv('UPLOAD_BATCH_SIZE', 5000))
+        # LOAD DATA LOCAL INFILE needs DB_ALLOW_LOCAL_INFILE on the client and local_infile on the server
+        self.mode = mode
+        # Compare row content hashes with the previous upload and only send new or changed rows
+        self.skip_unchanged = skip_unchanged
+        self._known_hashes = {}
+
+    def read_batches(self, source):
+        """Yield cleaned DataFrames of at most batch_size rows from a CSV file"""
+        start = source.tell()
+        header = pd.read_csv(source, nrows=0).columns
+        source.seek(start)
+        dtypes = {c: str for c in header if canonical_column(c) in TEXT_COLUMNS}
+
+        for chunk in pd.read_csv(source, chunksize=self.batch_size, dtype=dtypes):
+            yield prepare_batch(chunk)
+
+    def upsert_query(self, columns):
+        """INSERT ... ON DUPLICATE KEY UPDATE statement for the given columns"""
+        col_str = ", ".join(f"`{c}`" for c in columns)
+        val_str = ", ".join(["%s"] * len(columns))
+        update_str = ", ".join(
+            f"`{c}`=VALUES(`{c}`)" for c in columns if c not in KEY_COLUMNS
+        )
+        return f"""
+            INSERT INTO exam_results ({col_str})
+            VALUES ({val_str})
+            ON DUPLICATE KEY UPDATE {update_str}
+        """
+
+    def ingest_csv(self, source, start_batch=0, on_progress=None):
+        """Stream a CSV into exam_results in committed batches.
+
+        Batches before `start_batch` are read but not written, which resumes an
+        upload that failed part-way. `on_progress(fraction, summary)` is called
+        after every batch. Raises IngestError if a batch fails.
+        """
+        summary = IngestSummary()
+        self._known_hashes = {}
+        total_bytes = getattr(source, 'size', None)
+        started = time.perf_counter()
+
+        connection = self.db_config.get_connection()
+        if connection is None:
+            raise IngestError("Unable to establish database connection", start_batch, summary)
+
+        cursor = connection.cursor()
+        # First batch not committed yet; only advanced after a commit, so a failure while
+        # reading the next chunk does not make a resume replay a committed batch
+        next_batch = start_batch
+        finishing = False
+        try:
+            for batch_no, batch in enumerate(self.read_batches(source)):
+                if batch_no < start_batch:
+                    # May have been written by the failed attempt, so still counts as touched
+                    summary.skipped_batches += 1
+                    summary.exam_ids.update(batch['ExID'].astype(str).unique())
+                    summary.touched.update(_exam_class_pairs(batch))
+                    continue
+
+                self._write_batch(connection, cursor, batch, summary)
+                next_batch = batch_no + 1
+                summary.batches += 1
+                summary.elapsed_seconds = time.perf_counter() - started
+
+                if on_progress:
+                    fraction = min(source.tell() / total_bytes, 1.0) if total_bytes else None
+                    on_progress(fraction, summary)
+
+            finishing = True
+            self._after_ingest(connection, cursor, summary)
+        except Exception as e:
+            connection.rollback()
+            if not finishing:
+                self._after_failed_ingest(connection, cursor, summary)
+            raise IngestError(f"Upload stopped at batch {next_batch + 1}: {e}", next_batch, summary) from e
+        finally:
+            summary.elapsed_seconds = time.perf_counter() - started
+            cursor.close()
+            connection.close()
+
+        return summary
+
+    def _write_batch(self, connection, cursor, batch, summary):
+        """Upsert one batch in its own transaction and count inserts vs. updates"""
+        summary.rows_read += len(batch)
+
+        if self.skip_unchanged:
+            hashes = row_hashes(batch)
+            changed = self._changed_mask(cursor, batch, hashes)
+            summary.skipped += int((~changed).sum())
+            batch, hashes = batch[changed], hashes[changed]
+        if batch.empty:
+            return
+        # Only exams with written rows get their ranks, summaries and data versions refreshed
+        summary.exam_ids.update(batch['ExID'].astype(str).unique())
+
+        connection.start_transaction()
+        if self.mode == 'load-data':
+            existing_groups, affected = self._load_data_batch(cursor, batch)
+        else:
+            existing_groups, affected = self._executemany_batch(cursor, batch)
+        if self.skip_unchanged:
+            self._store_hashes(cursor, batch, hashes)
+        # Old and new (exam, class) pairs both changed, e.g. when a student moves class
+        touched = {(str(exam_id), class_name or '') for exam_id, class_name, _ in existing_groups}
+        touched |= _exam_class_pairs(batch)
+        # Committed with the rows, so cached reads see every committed batch even if a later one fails
+        bump_data_versions(cursor, touched)
+        connection.commit()
+
+        summary.touched.update(touched)
+        existing = sum(count for _, _, count in existing_groups)
+
+        inserted = len(batch) - existing
+        if self.db_config.embedded:
+            # SQLite/DuckDB do not tell changed and unchanged upserts apart
+            changed = existing
+        else:
+            # MySQL reports 1 affected row per insert, 2 per changed row and 0 per unchanged row
+            changed = min(max((affected - inserted) // 2, 0), existing)
+        summary.inserted += inserted
+        summary.updated += changed
+        summary.unchanged += existing - changed
+
+    def _changed_mask(self, cursor, batch, hashes):
+        """Boolean Series: True for rows that are new or differ from the last uploaded content"""
+        known = pd.Series(None, index=batch.index, dtype=object)
+        for exam_id, index in batch.groupby('ExID').groups.items():
+            known.loc[index] = batch.loc[index, 'STID'].map(self._exam_hashes(cursor, exam_id))
+        # Compared as text: embedded databases store the unsigned 64-bit hashes as TEXT
+        return known.isna() | (known.astype(str) != hashes.astype(str))
+
+    def _exam_hashes(self, cursor, exam_id):
+        """Stored row hashes of one exam, loaded once per ingest run"""
+        if exam_id not in self._known_hashes:
+            cursor.execute(f"SELECT STID, RowHash FROM {HASH_TABLE} WHERE ExID = %s", (exam_id,))
+            self._known_hashes[exam_id] = dict(cursor.fetchall())
+        return self._known_hashes[exam_id]
+
+    def _store_hashes(self, cursor, batch, hashes):
+        rows = list(zip(batch['ExID'], batch['STID'], hashes.astype(str).tolist()))
+        cursor.executemany(f"""
+            INSERT INTO {HASH_TABLE} (ExID, STID, RowHash)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE RowHash = VALUES(RowHash)
+        """, rows)
+        for exam_id, stid, row_hash in rows:
+            self._known_hashes.setdefault(exam_id, {})[stid] = row_hash
+
+    def _executemany_batch(self, cursor, batch):
+        rows = list(batch.itertuples(index=False, name=None))
+        keys = list(batch[KEY_COLUMNS].itertuples(index=False, name=None))
+        existing_groups = self._existing_groups(cursor, keys)
+        cursor.executemany(self.upsert_query(list(batch.columns)), rows)
+        return existing_groups, cursor.rowcount
+
+    def _load_data_batch(self, cursor, batch):
+        """Bulk-load the batch into a staging table, then merge it with one INSERT ... SELECT"""
+        columns = list(batch.columns)
+        col_str = ", ".join(f"`{c}`" for c in columns)
+        update_str = ", ".join(
+            f"`{c}`=VALUES(`{c}`)" for c in columns if c not in KEY_COLUMNS
+        )
+
+        # Temporary tables live as long as the pooled connection, so reuse and empty it
+        cursor.execute(f"CREATE TEMPORARY TABLE IF NOT EXISTS {STAGING_TABLE} LIKE exam_results")
+        cursor.execute(f"DELETE FROM {STAGING_TABLE}")
+
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        try:
+            with os.fdopen(handle, 'w', newline='', encoding='utf-8') as f:
+                batch.to_csv(f, index=False, header=False, na_rep='NULL', lineterminator='\n')
+            cursor.execute(f"""
+                LOAD DATA LOCAL INFILE %s INTO TABLE {STAGING_TABLE}
+                CHARACTER SET utf8mb4
+                FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+                LINES TERMINATED BY '\\n'
+                ({col_str})
+            """, (path,))
+        finally:
+            os.remove(path)
+
+        cursor.execute(f"""
+            SELECT r.ExID, r.CLASS, COUNT(*) FROM {STAGING_TABLE} s
+            JOIN exam_results r ON r.STID = s.STID AND r.ExID = s.ExID
+            GROUP BY r.ExID, r.CLASS
+        """)
+        existing_groups = cursor.fetchall()
+
+        cursor.execute(f"""
+            INSERT INTO exam_results ({col_str})
+            SELECT {col_str} FROM {STAGING_TABLE}
+            ON DUPLICATE KEY UPDATE {update_str}
+        """)
+        return existing_groups, cursor.rowcount
+
+    def _existing_groups(self, cursor, keys):
+        """(ExID, CLASS, count) of the batch keys already stored in exam_results"""
+        if not keys:
+            return []
+        placeholders = ", ".join(["(%s, %s)"] * len(keys))
+        cursor.execute(
+            f"""
+            SELECT ExID, CLASS, COUNT(*) FROM exam_results
+            WHERE (STID, ExID) IN ({placeholders})
+            GROUP BY ExID, CLASS
+            """,
+            [value for key in keys for value in key]
+        )
+        return cursor.fetchall()
+
+    def _after_ingest(self, connection, cursor, summary, exam_ids=None):
+        """Refresh data derived from exam_results for the exams touched by the upload"""
+        exam_ids = sorted(summary.exam_ids if exam_ids is None else exam_ids)
+        if not exam_ids:
+            return
+        connection.start_transaction()
+        # Ranks first: the normalized tables and summaries copy them
+        ranked = recompute_ranks(cursor, exam_ids)
+        if self.db_config.layout == 'normalized':
+            sync_normalized(cursor, exam_ids)
+        else:
+            sync_students(cursor, exam_ids)
+        refresh_summaries(cursor, exam_ids)
+        refresh_responses(cursor, exam_ids)
+        bump_data_versions(cursor, summary.touched | ranked)
+        connection.commit()
+
+    def _after_failed_ingest(self, connection, cursor, summary):
+        """Bring ranks, summaries and responses up to date with the batches committed before a failure"""
+        committed = {exam_id for exam_id, _ in summary.touched}
+        try:
+            self._after_ingest(connection, cursor, summary, committed)
+        except Exception:
+            # E.g. the connection is gone; the resumed upload refreshes these exams again
+            connection.rollback()
+
+
+def benchmark(path, modes=INGEST_MODES, batch_size=None):
+    """Ingest the same CSV once per mode and return {mode: IngestSummary}"""
+    results = {}
+    for mode in modes:
+        with open(path, 'rb') as source:
+            # Hash skipping would turn every run after the first into a no-op
+            service = IngestService(batch_size=batch_size, mode=mode, skip_unchanged=False)
+            results[mode] = service.ingest_csv(source)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare CSV ingest modes against the configured database")
+    parser.add_argument('csv', help="exam results CSV to load (it is written to the database)")
+    parser.add_argument('--mode', action='append', choices=INGEST_MODES, help="mode to run, repeatable")
+    parser.add_argument('--batch-size', type=int)
+    args = parser.parse_args()
+
+    default_modes = ['executemany'] if DatabaseConfig().embedded else INGEST_MODES
+    for mode, summary in benchmark(args.csv, args.mode or default_modes, args.batch_size).items():
+        print(
+            f"{mode:<12} {summary.rows_read:>9,} rows  {summary.elapsed_seconds:8.2f}s  "
+            f"{summary.rows_per_second:>10,.0f} rows/s  "
+            f"(inserted {summary.inserted:,}, updated {summary.updated:,}, "
+            f"unchanged {summary.unchanged:,}, skipped {summary.skipped:,})"
+        )
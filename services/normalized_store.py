@@ -0,0 +1,308 @@
+"""Normalized storage layout derived from the wide exam_results table.
+
+exam_results stays the table uploads write to. The normalized tables are
+filled from it by sync_normalized() and are read by DatabaseService when
+DB_LAYOUT=normalized:
+
+- students:       one row per student (latest name/class/phone); kept in
+                  sync in every layout because student search reads it
+- exams:          one row per exam
+- exam_subjects:  subject names and maximum marks per exam and subject slot
+- student_exams:  per student and exam totals and ranks
+- subject_scores: one row per student, exam and subject (long format)
+
+Backfill everything with ``python -m services.normalized_store``.
+"""
+from config.embedded import dialect
+from models.schema import MAX_SUBJECTS, resolve_columns, subject_column
+
+NORMALIZED_TABLES_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS students (
+        STID VARCHAR(32) PRIMARY KEY,
+        STNAME VARCHAR(128),
+        FATHER VARCHAR(128),
+        ROLLNO VARCHAR(32),
+        CLASS VARCHAR(64),
+        PHONE VARCHAR(32),
+        INDEX idx_students_name (STNAME),
+        INDEX idx_students_class (CLASS, STNAME)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS exams (
+        ExID VARCHAR(32) PRIMARY KEY,
+        EXNM VARCHAR(128),
+        ExDt DATE,
+        Duration VARCHAR(16),
+        QTYPE VARCHAR(32),
+        INDEX idx_exams_date (ExDt)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS exam_subjects (
+        ExID VARCHAR(32),
+        SubjectNo TINYINT,
+        SubjectName VARCHAR(64),
+        MaxMarks INT,
+        PRIMARY KEY (ExID, SubjectNo)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS student_exams (
+        STID VARCHAR(32),
+        ExID VARCHAR(32),
+        CLASS VARCHAR(64),
+        ExMk FLOAT,
+        AllExMk FLOAT,
+        ExRnk INT,
+        ClassExRnk INT,
+        FinRnk INT,
+        ClassRnk INT,
+        PRIMARY KEY (STID, ExID),
+        INDEX idx_student_exams_rank (ExID, ExRnk),
+        INDEX idx_student_exams_class (CLASS, ExID, ExRnk)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS subject_scores (
+        STID VARCHAR(32),
+        ExID VARCHAR(32),
+        SubjectNo TINYINT,
+        Marks FLOAT,
+        Correct INT,
+        Incorrect INT,
+        Unattempted INT,
+        PRIMARY KEY (STID, ExID, SubjectNo),
+        INDEX idx_subject_scores_exam (ExID, SubjectNo)
+    )
+    """,
+]
+
+# Columns of exam_results available in the normalized layout, with their source
+_SOURCES = {
+    'STID': 'r.STID',
+    'ExID': 'r.ExID',
+    'CLASS': 'r.CLASS',
+    'ExMk': 'r.ExMk',
+    'AllExMk': 'r.AllExMk',
+    'ExRnk': 'r.ExRnk',
+    'ClassExRnk': 'r.ClassExRnk',
+    'FinRnk': 'r.FinRnk',
+    'ClassRnk': 'r.ClassRnk',
+    'STNAME': 's.STNAME',
+    'FATHER': 's.FATHER',
+    'ROLLNO': 's.ROLLNO',
+    'PHONE': 's.PHONE',
+    'EXNM': 'e.EXNM',
+    'ExDt': 'e.ExDt',
+    'Duration': 'e.Duration',
+    'QTYPE': 'e.QTYPE',
+}
+
+# Per-subject columns: template -> (table, field)
+_SUBJECT_SOURCES = {
+    'S{}Mk': ('subject_scores', 'Marks'),
+    'QS{}Cor': ('subject_scores', 'Correct'),
+    'QS{}Inc': ('subject_scores', 'Incorrect'),
+    'QS{}Una': ('subject_scores', 'Unattempted'),
+    'S{}NM': ('exam_subjects', 'SubjectName'),
+    'S{}Max': ('exam_subjects', 'MaxMarks'),
+}
+
+_SUBJECT_COLUMNS = {
+    subject_column(template, i): (table, field, i)
+    for template, (table, field) in _SUBJECT_SOURCES.items()
+    for i in range(1, MAX_SUBJECTS + 1)
+}
+
+
+def render_conditions(conditions, sources):
+    """Render (template, params) conditions whose {Column} fields name result columns.
+
+    `sources` maps column names to SQL expressions; returns (sql list, params),
+    or None when a template names a column missing from `sources`.
+    """
+    rendered, params = [], []
+    for template, values in conditions:
+        try:
+            rendered.append(template.format_map(sources))
+        except KeyError:
+            return None
+        params.extend(values)
+    return rendered, params
+
+
+def render_order_by(order_by, sources):
+    """ORDER BY list of (column, direction) pairs; a column with {Column} fields is an expression template"""
+    return ", ".join(
+        f"{column.format_map(sources) if '{' in column else sources[column]} {direction}"
+        for column, direction in order_by
+    )
+
+
+def results_query(columns, filters=(), order_by=(), cohort=(), conditions=()):
+    """Build a SELECT returning exam_results-shaped rows from the normalized tables.
+
+    `filters` is a sequence of (column, value) equality filters and `order_by`
+    a sequence of (column, direction), see render_order_by(). `cohort` filters (CLASS/ExID) select
+    students instead of rows: every row of a student who has a matching result
+    is returned. `conditions` are extra (template, params) predicates, see
+    render_conditions(). Returns (query, params), or None when a requested
+    column only exists in the wide table.
+    """
+    extra = render_conditions(conditions, _SOURCES)
+    if extra is None:
+        return None
+
+    select = []
+    joins = {}
+    for name in resolve_columns(columns):
+        if name in _SOURCES:
+            select.append(f"{_SOURCES[name]} AS `{name}`")
+            continue
+        if name not in _SUBJECT_COLUMNS:
+            return None
+        table, field, i = _SUBJECT_COLUMNS[name]
+        if table == 'subject_scores':
+            alias = f"ss{i}"
+            joins[alias] = (
+                f"LEFT JOIN subject_scores {alias} ON {alias}.STID = r.STID "
+                f"AND {alias}.ExID = r.ExID AND {alias}.SubjectNo = {i}"
+            )
+        else:
+            alias = f"es{i}"
+            joins[alias] = (
+                f"LEFT JOIN exam_subjects {alias} ON {alias}.ExID = r.ExID "
+                f"AND {alias}.SubjectNo = {i}"
+            )
+        select.append(f"{alias}.{field} AS `{name}`")
+
+    where_parts = [f"{_SOURCES[column]} = %s" for column, _ in filters]
+    if cohort:
+        cohort_where = " AND ".join(f"`{column}` = %s" for column, _ in cohort)
+        where_parts.append(f"r.STID IN (SELECT STID FROM student_exams WHERE {cohort_where})")
+    where_parts += extra[0]
+    where = " AND ".join(where_parts) or "1=1"
+    query = f"""
+        SELECT {", ".join(select)}
+        FROM student_exams r
+        JOIN students s ON s.STID = r.STID
+        JOIN exams e ON e.ExID = r.ExID
+        {" ".join(joins.values())}
+        WHERE {where}
+    """
+    if order_by:
+        query += " ORDER BY " + render_order_by(order_by, _SOURCES)
+    return query, [value for _, value in filters] + [value for _, value in cohort] + extra[1]
+
+
+def _exam_filter(exam_ids, column='ExID'):
+    if not exam_ids:
+        return "", []
+    exam_ids = list(exam_ids)
+    return f" WHERE {column} IN ({', '.join(['%s'] * len(exam_ids))})", exam_ids
+
+
+def sync_students(cursor, exam_ids=None):
+    """Upsert the students dimension (also used for student search in every layout).
+
+    Details come from each student's latest exam over all of their rows, not
+    only the uploaded exams, so uploading an older exam keeps the current class.
+    """
+    where, params = _exam_filter(exam_ids)
+    if where:
+        # Every row of the students in these exams
+        where = f" WHERE STID IN (SELECT STID FROM exam_results{where})"
+
+    if dialect(cursor) != 'mysql':
+        # One statement may not update a row twice there: take each student's latest row up front
+        cursor.execute(f"""
+            INSERT INTO students (STID, STNAME, FATHER, ROLLNO, CLASS, PHONE)
+            SELECT STID, STNAME, FATHER, ROLLNO, CLASS, PHONE FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY STID ORDER BY ExDt DESC, ExID DESC) AS latest
+                FROM exam_results{where}
+            ) AS ranked
+            WHERE latest = 1
+            ON DUPLICATE KEY UPDATE STNAME = VALUES(STNAME), FATHER = VALUES(FATHER),
+                ROLLNO = VALUES(ROLLNO), CLASS = VALUES(CLASS), PHONE = VALUES(PHONE)
+        """, params)
+        return
+
+    # Rows are applied in date order so the latest exam wins for student details
+    cursor.execute(f"""
+        INSERT INTO students (STID, STNAME, FATHER, ROLLNO, CLASS, PHONE)
+        SELECT STID, STNAME, FATHER, ROLLNO, CLASS, PHONE
+        FROM exam_results{where}
+        ORDER BY ExDt, ExID
+        ON DUPLICATE KEY UPDATE STNAME = VALUES(STNAME), FATHER = VALUES(FATHER),
+            ROLLNO = VALUES(ROLLNO), CLASS = VALUES(CLASS), PHONE = VALUES(PHONE)
+    """, params)
+
+
+def sync_normalized(cursor, exam_ids=None):
+    """Upsert the normalized tables from exam_results for `exam_ids` (default: all exams)"""
+    where, params = _exam_filter(exam_ids)
+    sync_students(cursor, exam_ids)
+
+    cursor.execute(f"""
+        INSERT INTO exams (ExID, EXNM, ExDt, Duration, QTYPE)
+        SELECT ExID, MAX(EXNM), MAX(ExDt), MAX(Duration), MAX(QTYPE)
+        FROM exam_results{where}
+        GROUP BY ExID
+        ON DUPLICATE KEY UPDATE EXNM = VALUES(EXNM), ExDt = VALUES(ExDt),
+            Duration = VALUES(Duration), QTYPE = VALUES(QTYPE)
+    """, params)
+
+    cursor.execute(f"""
+        INSERT INTO student_exams (STID, ExID, CLASS, ExMk, AllExMk, ExRnk, ClassExRnk, FinRnk, ClassRnk)
+        SELECT STID, ExID, CLASS, ExMk, AllExMk, ExRnk, ClassExRnk, FinRnk, ClassRnk
+        FROM exam_results{where}
+        ON DUPLICATE KEY UPDATE CLASS = VALUES(CLASS), ExMk = VALUES(ExMk),
+            AllExMk = VALUES(AllExMk), ExRnk = VALUES(ExRnk), ClassExRnk = VALUES(ClassExRnk),
+            FinRnk = VALUES(FinRnk), ClassRnk = VALUES(ClassRnk)
+    """, params)
+
+    for i in range(1, MAX_SUBJECTS + 1):
+        name, max_marks, marks, correct, incorrect, unattempted = (
+            subject_column(template, i)
+            for template in ('S{}NM', 'S{}Max', 'S{}Mk', 'QS{}Cor', 'QS{}Inc', 'QS{}Una')
+        )
+        subject_where = f"{where or ' WHERE 1=1'} AND ({name} IS NOT NULL OR {marks} IS NOT NULL)"
+
+        cursor.execute(f"""
+            INSERT INTO exam_subjects (ExID, SubjectNo, SubjectName, MaxMarks)
+            SELECT ExID, {i}, MAX({name}), MAX({max_marks})
+            FROM exam_results{subject_where}
+            GROUP BY ExID
+            ON DUPLICATE KEY UPDATE SubjectName = VALUES(SubjectName), MaxMarks = VALUES(MaxMarks)
+        """, params)
+
+        cursor.execute(f"""
+            INSERT INTO subject_scores (STID, ExID, SubjectNo, Marks, Correct, Incorrect, Unattempted)
+            SELECT STID, ExID, {i}, {marks}, {correct}, {incorrect}, {unattempted}
+            FROM exam_results{subject_where}
+            ON DUPLICATE KEY UPDATE Marks = VALUES(Marks), Correct = VALUES(Correct),
+                Incorrect = VALUES(Incorrect), Unattempted = VALUES(Unattempted)
+        """, params)
+
+
+def create_and_backfill(cursor):
+    """Migration step: create the normalized tables and fill them from exam_results"""
+    for ddl in NORMALIZED_TABLES_DDL:
+        cursor.execute(ddl)
+    sync_normalized(cursor)
+
+
+if __name__ == "__main__":
+    from config.database import DatabaseConfig
+
+    connection = DatabaseConfig().connect()
+    try:
+        cursor = connection.cursor()
+        sync_normalized(cursor)
+        connection.commit()
+        cursor.close()
+        print("Normalized tables backfilled from exam_results")
+    finally:
+        connection.close()
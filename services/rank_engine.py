@@ -0,0 +1,195 @@
+"""Recompute the rank, count and group-stat columns of exam_results per exam.
+
+The CSV values of these columns are not trusted: after every upload the
+ingest pipeline calls recompute_ranks() for the exams it touched, which ranks
+the whole exam again with pandas and writes all derived columns back with one
+UPDATE ... JOIN (UPDATE ... FROM on the embedded engines) from a temporary table.
+
+Ranks use competition ranking (ties share the best rank, the next rank skips):
+- ExRnk / ClassExRnk:  by ExMk within the exam / exam and class
+- FinRnk / ClassRnk:   by AllExMk within the exam / exam and class
+- CNTABOVE / CNTBELOW: students of the exam with a higher / lower ExMk
+- EXSTCOUNT / EXCLASSSTCOUNT: students with marks in the exam / exam and class
+- ExGMax, ExGmin, ExAvg and S*GMax, S*GMin, S*Avg: exam-wide max, min, mean
+
+Recompute every exam with ``python -m services.rank_engine``, or time the
+computation on synthetic data with ``python -m services.rank_engine --benchmark 100000``.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from config.embedded import dialect
+from models.schema import MAX_SUBJECTS, subject_column
+
+RANK_STAGE_TABLE = 'exam_results_rank_stage'
+
+_SUBJECT_MARKS = [subject_column('S{}Mk', i) for i in range(1, MAX_SUBJECTS + 1)]
+_SUBJECT_STATS = [
+    (subject_column('S{}Mk', i), subject_column('S{}GMax', i), subject_column('S{}GMin', i),
+     subject_column('S{}Avg', i))
+    for i in range(1, MAX_SUBJECTS + 1)
+]
+
+INPUT_COLUMNS = ['STID', 'CLASS', 'ExMk', 'AllExMk'] + _SUBJECT_MARKS
+DERIVED_COLUMNS = [
+    'ExRnk', 'ClassExRnk', 'FinRnk', 'ClassRnk', 'CNTABOVE', 'CNTBELOW',
+    'EXSTCOUNT', 'EXCLASSSTCOUNT', 'ExGMax', 'ExGmin', 'ExAvg',
+] + [column for _, *stats in _SUBJECT_STATS for column in stats]
+_INTEGER_COLUMNS = DERIVED_COLUMNS[:8]
+
+
+def compute_ranks(df):
+    """Derived rank, count and stat columns for the rows of one exam.
+
+    `df` needs INPUT_COLUMNS; returns a frame with STID and DERIVED_COLUMNS in
+    the same row order. Rows without marks get NULL ranks and are not counted.
+    """
+    marks = pd.to_numeric(df['ExMk'], errors='coerce')
+    totals = pd.to_numeric(df['AllExMk'], errors='coerce')
+    classes = df['CLASS'].fillna('')
+    by_class = marks.groupby(classes)
+
+    out = pd.DataFrame({'STID': df['STID']}, index=df.index)
+    out['ExRnk'] = marks.rank(method='min', ascending=False)
+    out['ClassExRnk'] = by_class.rank(method='min', ascending=False)
+    out['FinRnk'] = totals.rank(method='min', ascending=False)
+    out['ClassRnk'] = totals.groupby(classes).rank(method='min', ascending=False)
+
+    counted = int(marks.notna().sum())
+    out['CNTABOVE'] = out['ExRnk'] - 1
+    # Students strictly below: everyone minus those at or above this mark
+    out['CNTBELOW'] = counted - marks.rank(method='max', ascending=False)
+    out['EXSTCOUNT'] = counted
+    out['EXCLASSSTCOUNT'] = by_class.transform('count')
+
+    out['ExGMax'] = marks.max()
+    out['ExGmin'] = marks.min()
+    out['ExAvg'] = marks.mean()
+    for mark_column, max_column, min_column, avg_column in _SUBJECT_STATS:
+        subject_marks = pd.to_numeric(df[mark_column], errors='coerce')
+        out[max_column] = subject_marks.max()
+        out[min_column] = subject_marks.min()
+        out[avg_column] = subject_marks.mean()
+
+    # Counts and ranks only apply to rows that have marks
+    no_marks = marks.isna()
+    out.loc[no_marks, ['ExRnk', 'ClassExRnk', 'CNTABOVE', 'CNTBELOW', 'EXCLASSSTCOUNT']] = np.nan
+    out.loc[totals.isna(), ['FinRnk', 'ClassRnk']] = np.nan
+    out[_INTEGER_COLUMNS] = out[_INTEGER_COLUMNS].astype('Int64')
+    return out
+
+
+def _fetch_exam(cursor, exam_id):
+    cursor.execute(
+        f"SELECT {', '.join(f'`{c}`' for c in INPUT_COLUMNS)} FROM exam_results WHERE ExID = %s",
+        (exam_id,)
+    )
+    return pd.DataFrame(cursor.fetchall(), columns=INPUT_COLUMNS)
+
+
+def _write_back(cursor, exam_id, derived):
+    columns = ['STID'] + DERIVED_COLUMNS
+    rows = derived[columns].astype(object).where(derived[columns].notna(), None)
+    cursor.execute(f"DELETE FROM {RANK_STAGE_TABLE}")
+    cursor.executemany(
+        f"INSERT INTO {RANK_STAGE_TABLE} ({', '.join(f'`{c}`' for c in columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))})",
+        list(rows.itertuples(index=False, name=None))
+    )
+    if dialect(cursor) == 'mysql':
+        assignments = ", ".join(f"r.`{c}` = s.`{c}`" for c in DERIVED_COLUMNS)
+        cursor.execute(f"""
+            UPDATE exam_results r
+            JOIN {RANK_STAGE_TABLE} s ON s.STID = r.STID
+            SET {assignments}
+            WHERE r.ExID = %s
+        """, (exam_id,))
+    else:
+        assignments = ", ".join(f"`{c}` = s.`{c}`" for c in DERIVED_COLUMNS)
+        cursor.execute(f"""
+            UPDATE exam_results AS r
+            SET {assignments}
+            FROM {RANK_STAGE_TABLE} AS s
+            WHERE s.STID = r.STID AND r.ExID = %s
+        """, (exam_id,))
+
+
+def recompute_ranks(cursor, exam_ids):
+    """Recompute the derived columns of every exam in `exam_ids`.
+
+    Returns the (ExID, CLASS) pairs of the recomputed rows; rank changes reach
+    every class of an exam, so all of them need their cached reads dropped.
+    """
+    mysql = dialect(cursor) == 'mysql'
+    cursor.execute(
+        f"CREATE TEMPORARY TABLE IF NOT EXISTS {RANK_STAGE_TABLE} "
+        f"{'(PRIMARY KEY (STID))' if mysql else 'AS'} "
+        f"SELECT STID, {', '.join(f'`{c}`' for c in DERIVED_COLUMNS)} FROM exam_results LIMIT 0"
+    )
+    pairs = set()
+    for exam_id in exam_ids:
+        df = _fetch_exam(cursor, exam_id)
+        if df.empty:
+            continue
+        _write_back(cursor, exam_id, compute_ranks(df))
+        pairs.update((str(exam_id), class_name) for class_name in df['CLASS'].fillna('').unique())
+    cursor.execute(f"DROP {'TEMPORARY ' if mysql else ''}TABLE IF EXISTS {RANK_STAGE_TABLE}")
+    return pairs
+
+
+def recompute_all_ranks(cursor):
+    """Recompute the derived columns of every exam in exam_results"""
+    cursor.execute("SELECT DISTINCT ExID FROM exam_results")
+    return recompute_ranks(cursor, [row[0] for row in cursor.fetchall()])
+
+
+def synthetic_exam(students, classes=20, seed=0):
+    """Random exam rows in the shape compute_ranks() expects, with plenty of ties"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'STID': [f"ST{i:07d}" for i in range(students)],
+        'CLASS': rng.integers(0, classes, students).astype(str),
+    })
+    subject_marks = rng.integers(0, 181, (students, 4)).astype(float)
+    for i, column in enumerate(_SUBJECT_MARKS):
+        df[column] = subject_marks[:, i] if i < 4 else np.nan
+    df['ExMk'] = subject_marks.sum(axis=1)
+    df['AllExMk'] = df['ExMk'] + rng.integers(0, 2000, students)
+    return df
+
+
+def benchmark(students=100_000, repeat=3):
+    """Best compute_ranks() time in seconds over `repeat` runs on a synthetic exam"""
+    df = synthetic_exam(students)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        compute_ranks(df)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute rank and group-stat columns of exam_results")
+    parser.add_argument('--benchmark', type=int, metavar='STUDENTS',
+                        help="only time the computation on a synthetic exam of this size")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        seconds = benchmark(args.benchmark)
+        print(f"{args.benchmark:,} students  {seconds:.3f}s  {args.benchmark / seconds:,.0f} rows/s")
+    else:
+        from config.database import DatabaseConfig
+
+        connection = DatabaseConfig().connect()
+        try:
+            cursor = connection.cursor()
+            pairs = recompute_all_ranks(cursor)
+            connection.commit()
+            cursor.close()
+            print(f"Recomputed ranks for {len({exam for exam, _ in pairs})} exams")
+        finally:
+            connection.close()
@@ -1,6 +1,11 @@
+from functools import partial
 import pandas as pd
 import numpy as np
+from models.schema import MAX_SUBJECTS, subject_column, subject_name
+from services import summary_store
 from services.database_service import DatabaseService
+from services.subject_matrix import SubjectMatrix
+from utils.instrumentation import timed, timer
 
 class ReportService:
     def __init__(self):
@@ -8,103 +13,221 @@ class ReportService:
     
     def generate_student_report(self, student_id):
         """Generate comprehensive student report"""
-        df = self.db_service.get_student_performance(student_id)
+        df = self.db_service.get_student_performance(student_id, columns="subjects")
         
         if df.empty:
             return None
         
-        # Calculate performance metrics
-        report = {
-            'student_info': {
-                'name': df.iloc[0]['STNAME'],
-                'father': df.iloc[0]['FATHER'],
-                'roll_no': df.iloc[0]['ROLLNO'],
-                'class': df.iloc[0]['CLASS']
-            },
-            'exam_count': len(df),
-            'average_score': df['ExMk'].mean(),
-            'best_score': df['ExMk'].max(),
-            'worst_score': df['ExMk'].min(),
-            'average_rank': df['ExRnk'].mean(),
-            'best_rank': df['ExRnk'].min(),
-            'subject_performance': {
-                'Physics': {
-                    'average': df['S1Mk'].mean(),
-                    'max': df['S1Mk'].max(),
-                    'min': df['S1Mk'].min()
+        return next(iter(self.build_student_reports(df).values()))
+    
+    def generate_student_reports(self, class_name=None, exam_id=None):
+        """Reports for every student of a class and/or exam cohort, keyed by STID.
+
+        All rows come from one query and the metrics from one groupby; each
+        report has the same structure as generate_student_report and covers
+        the student's whole exam history.
+        """
+        df = self.db_service.get_cohort_performance(class_name, exam_id, columns="subjects")
+        
+        if df.empty:
+            return {}
+        
+        return self.build_student_reports(df)
+    
+    @timed('compute')
+    def build_student_reports(self, df):
+        """Compute student reports from result rows of one or more students"""
+        df = df.sort_values(['STID', 'ExDt'], ascending=[True, False], kind='stable')
+        grouped = df.groupby('STID', sort=False)
+        
+        metrics = grouped.agg(
+            exam_count=('ExMk', 'size'),
+            average_score=('ExMk', 'mean'),
+            best_score=('ExMk', 'max'),
+            worst_score=('ExMk', 'min'),
+            average_rank=('ExRnk', 'mean'),
+            best_rank=('ExRnk', 'min'),
+        )
+        info = grouped[['STNAME', 'FATHER', 'ROLLNO', 'CLASS']].first()
+        histories = dict(iter(grouped))
+        
+        # Every subject of every student in one groupby over the subject matrix
+        matrix = SubjectMatrix.from_frame(df)
+        subject_stats = matrix.grouped_stats(df['STID']).to_dict('index')
+        # Mark columns with a mark in each student's history, for all students at once
+        column_labels = matrix.column_labels()
+        marked = df[list(column_labels)].notna().groupby(df['STID'], sort=False).any().to_dict('index')
+        
+        reports = {}
+        for student_id, row in metrics.join(info).to_dict('index').items():
+            stats = subject_stats[student_id]
+            reports[student_id] = {
+                'student_info': {
+                    'name': row['STNAME'],
+                    'father': row['FATHER'],
+                    'roll_no': row['ROLLNO'],
+                    'class': row['CLASS']
                 },
-                'Chemistry': {
-                    'average': df['S2Mk'].mean(),
-                    'max': df['S2Mk'].max(),
-                    'min': df['S2Mk'].min()
+                'exam_count': row['exam_count'],
+                'average_score': row['average_score'],
+                'best_score': row['best_score'],
+                'worst_score': row['worst_score'],
+                'average_rank': row['average_rank'],
+                'best_rank': row['best_rank'],
+                # Only subjects this student has marks in
+                'subject_performance': {
+                    subject: {
+                        'average': stats[(subject, 'average')],
+                        'max': stats[(subject, 'max')],
+                        'min': stats[(subject, 'min')]
+                    }
+                    for subject in matrix.names if stats[(subject, 'count')]
                 },
-                'Botany': {
-                    'average': df['S3Mk'].mean(),
-                    'max': df['S3Mk'].max(),
-                    'min': df['S3Mk'].min()
+                # Only slots with a mark in this student's history
+                'subject_columns': {
+                    column: subject for column, subject in column_labels.items()
+                    if marked[student_id][column]
                 },
-                'Zoology': {
-                    'average': df['S4Mk'].mean(),
-                    'max': df['S4Mk'].max(),
-                    'min': df['S4Mk'].min()
-                }
-            },
-            'exam_history': df
-        }
+                'exam_history': histories[student_id]
+            }
         
-        return report
+        return reports
     
     def generate_class_report(self, class_name, exam_id=None):
-        """Generate class performance report"""
-        df = self.db_service.get_class_analytics(class_name, exam_id)
+        """Generate class performance report.
+
+        Headline statistics, the score histogram and subject averages come from
+        the pre-aggregated summary tables; raw rows are only read when those
+        are not filled. The independent reads run concurrently. Student rows
+        are paged separately with DatabaseService.get_results_page.
+        """
+        db = self.db_service
+        data = db.fetch_all({
+            'class_summary': partial(db.get_class_summary, class_name, exam_id),
+            'subject_summary': partial(db.get_class_subject_summary, class_name, exam_id),
+            'top_performers': partial(db.get_top_performers, class_name, exam_id, limit=10),
+            'exams': db.get_available_exams,
+        })
+        class_summary, subject_summary = data['class_summary'], data['subject_summary']
+        score_statistics = summary_store.combine(class_summary)
+        score_histogram = summary_store.merged_histogram(class_summary) if score_statistics else None
         
-        if df.empty:
-            return None
+        if score_histogram is not None and not subject_summary.empty:
+            subject_averages, subject_columns = self._summary_subjects(subject_summary)
+        else:
+            df = self.db_service.get_class_analytics(class_name, exam_id, columns="subjects")
+            
+            if df.empty:
+                return None
+            
+            with timer('compute', 'class_report_from_rows'):
+                marks = pd.to_numeric(df['ExMk'], errors='coerce')
+                counts, edges = np.histogram(marks.dropna(), bins=summary_store.HIST_BINS)
+                score_histogram = (edges, counts)
+                score_statistics = {
+                    'count': len(df),
+                    'average': marks.mean(),
+                    'median': marks.median(),
+                    'median_exact': True,
+                    'std_dev': marks.std(),
+                    'max': marks.max(),
+                    'min': marks.min()
+                }
+                matrix = SubjectMatrix.from_frame(df)
+                subject_averages, subject_columns = matrix.averages(), matrix.column_labels()
         
         report = {
             'class_info': {
                 'name': class_name,
-                'total_students': len(df),
-                'exam_name': df.iloc[0]['EXNM'] if exam_id else 'All Exams'
-            },
-            'score_statistics': {
-                'average': df['ExMk'].mean(),
-                'median': df['ExMk'].median(),
-                'std_dev': df['ExMk'].std(),
-                'max': df['ExMk'].max(),
-                'min': df['ExMk'].min()
+                'total_students': score_statistics.pop('count'),
+                'exam_name': self._exam_name(exam_id, data['exams']) if exam_id else 'All Exams'
             },
-            'subject_averages': {
-                'Physics': df['S1Mk'].mean(),
-                'Chemistry': df['S2Mk'].mean(),
-                'Botany': df['S3Mk'].mean(),
-                'Zoology': df['S4Mk'].mean()
-            },
-            'top_performers': df.nsmallest(10, 'ExRnk')[['STNAME', 'ExMk', 'ExRnk']],
-            'data': df
+            'score_statistics': score_statistics,
+            'score_histogram': score_histogram,
+            'subject_averages': subject_averages,
+            'top_performers': data['top_performers'],
+            'subject_columns': subject_columns
         }
         
         return report
     
+    @timed('compute')
+    def _summary_subjects(self, subjects):
+        """Subject averages and {mark column: subject name} from exam_class_subject_summary rows.
+
+        Rows are merged by subject name like SubjectMatrix: a slot can hold
+        different subjects in different exams.
+        """
+        subjects = subjects[subjects['StudentCount'] > 0].sort_values('SubjectNo', kind='stable')
+        subjects = subjects.assign(Subject=[
+            subject_name(subject_no, name) for subject_no, name in zip(subjects['SubjectNo'], subjects['SubjectName'])
+        ])
+        totals = subjects.groupby('Subject', sort=False)[['SumMarks', 'StudentCount']].sum()
+        averages = dict(zip(totals.index, totals['SumMarks'] / totals['StudentCount']))
+        slot_names = subjects.groupby('SubjectNo')['Subject'].unique()
+        columns = {subject_column('S{}Mk', subject_no): " / ".join(names) for subject_no, names in slot_names.items()}
+        return averages, columns
+    
+    def _exam_name(self, exam_id, exams):
+        exam_names = exams.loc[exams['ExID'].astype(str) == str(exam_id), 'EXNM'] if not exams.empty else []
+        return exam_names.iloc[0] if len(exam_names) else exam_id
+    
     def generate_comparative_analysis(self, exam_id):
-        """Generate comparative analysis across classes"""
-        df = self.db_service.get_exam_results(exam_id=exam_id)
+        """Generate comparative analysis across classes.
+
+        The per-class aggregation runs in MySQL; only one row per class is
+        fetched. Student-level rows are loaded separately, on demand, with
+        DatabaseService.get_exam_results.
+        """
+        db = self.db_service
+        data = db.fetch_all({
+            'comparison': partial(db.get_class_comparison, exam_id),
+            'summaries': partial(db.get_class_summary, exam_id=exam_id),
+            'exams': db.get_available_exams,
+        })
+        grouped = data['comparison']
         
-        if df.empty:
+        if grouped.empty:
             return None
         
-        class_performance = df.groupby('CLASS').agg({
-            'ExMk': ['mean', 'median', 'std', 'count'],
-            'S1Mk': 'mean',
-            'S2Mk': 'mean',
-            'S3Mk': 'mean',
-            'S4Mk': 'mean'
-        }).round(2)
+        grouped = grouped.set_index('CLASS')
+        counts = grouped['StudentCount']
+        total_students = int(counts.sum())
+        overall_average = (grouped['MeanMarks'] * counts).sum() / total_students if total_students else float('nan')
         
         return {
-            'exam_name': df.iloc[0]['EXNM'],
-            'total_students': len(df),
-            'overall_average': df['ExMk'].mean(),
-            'class_performance': class_performance,
-            'data': df
+            'exam_name': self._exam_name(exam_id, data['exams']),
+            'total_students': total_students,
+            'overall_average': overall_average,
+            'class_performance': self._class_performance(grouped, data['summaries'])
         }
+    
+    @timed('compute')
+    def _class_performance(self, grouped, summaries):
+        """Per-class statistics table from get_class_comparison rows indexed by CLASS"""
+        counts = grouped['StudentCount']
+        variance = (grouped['SumSquares'] - grouped['SumMarks'] ** 2 / counts) / (counts - 1)
+        
+        class_performance = pd.DataFrame({
+            'Students': counts,
+            'Average': grouped['MeanMarks'],
+            'Std Dev': np.sqrt(variance.clip(lower=0)).where(counts > 1),
+            'Min': grouped['MinMarks'],
+            'Max': grouped['MaxMarks']
+        })
+        
+        if not summaries.empty:
+            medians = summaries.groupby('CLASS')[['Quantiles', 'StudentCount']].apply(
+                lambda rows: summary_store.merged_quantile(rows, 0.5)
+            )
+            class_performance.insert(2, 'Median', medians)
+        
+        for i in range(1, MAX_SUBJECTS + 1):
+            marks = grouped[subject_column('S{}Mk', i)]
+            if marks.notna().any():
+                names = grouped[subject_column('S{}NM', i)].dropna()
+                class_performance[subject_name(i, names.iloc[0] if not names.empty else None)] = marks
+        
+        class_performance = class_performance.astype(float).round(2)
+        class_performance['Students'] = counts.astype(int)
+        return class_performance
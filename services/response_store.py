@@ -0,0 +1,219 @@
+"""Question-level responses per exam and subject, stored as bit-packed matrices.
+
+exam_results keeps each student's answers as comma-separated question id
+lists (QS*CorIds, QS*IncorIds, QS*Leftids). At upload time refresh_responses()
+turns them into one exam_responses row per exam and subject slot holding a
+students x questions matrix as three bit planes (correct, incorrect, skipped)
+packed with np.packbits, plus the student order, question ids and total marks.
+A 2,000 x 180 section takes about 140 KB.
+
+item_analysis() computes per-question statistics over the decoded matrix:
+- difficulty:      share of students answering correctly (higher = easier)
+- discrimination:  correct rate of the top 27% by total marks minus the bottom 27%
+- incorrect_rate / skip_rate: share answering wrong / leaving it
+- point_biserial:  correlation between answering correctly and total marks
+
+Rebuild everything with ``python -m services.response_store``.
+"""
+import json
+import warnings
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from models.schema import MAX_SUBJECTS, subject_column, subject_name
+
+RESPONSES_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS exam_responses (
+        ExID VARCHAR(32),
+        SubjectNo TINYINT,
+        SubjectName VARCHAR(64),
+        StudentIds MEDIUMTEXT,
+        QuestionIds TEXT,
+        Correct MEDIUMBLOB,
+        Incorrect MEDIUMBLOB,
+        Skipped MEDIUMBLOB,
+        Scores MEDIUMBLOB,
+        UpdatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (ExID, SubjectNo)
+    )
+"""
+
+NOT_SEEN, CORRECT, INCORRECT, SKIPPED = 0, 1, 2, 3
+_ID_TEMPLATES = [(CORRECT, 'QS{}CorIds'), (INCORRECT, 'QS{}IncorIds'), (SKIPPED, 'QS{}Leftids')]
+# Share of the cohort forming the upper and lower groups of the discrimination index
+DISCRIMINATION_GROUP = 0.27
+
+
+@dataclass
+class ResponseMatrix:
+    student_ids: List[str]
+    question_ids: List[str]
+    codes: np.ndarray   # int8, students x questions: NOT_SEEN / CORRECT / INCORRECT / SKIPPED
+    scores: np.ndarray  # float, total marks per student (NaN if unknown)
+
+    @classmethod
+    def from_frame(cls, df, subject_no):
+        """Parse the question id lists of one subject slot; None when the slot has none"""
+        pairs = []
+        for code, template in _ID_TEMPLATES:
+            column = subject_column(template, subject_no)
+            if column not in df.columns:
+                continue
+            ids = df[column].dropna().astype(str).str.split(',').explode().str.strip()
+            ids = ids[ids != '']
+            pairs.append(pd.DataFrame({'row': ids.index, 'question': ids.values, 'code': code}))
+        if not pairs:
+            return None
+        pairs = pd.concat(pairs, ignore_index=True)
+        if pairs.empty:
+            return None
+
+        questions = pairs['question'].unique()
+        numeric = pd.to_numeric(pd.Series(questions), errors='coerce')
+        order = np.lexsort((questions.astype(str), numeric.fillna(np.inf).to_numpy()))
+        questions = questions[order]
+
+        codes = np.zeros((len(df), len(questions)), dtype=np.int8)
+        rows = df.index.get_indexer(pairs['row'])
+        columns = pd.Index(questions).get_indexer(pairs['question'])
+        codes[rows, columns] = pairs['code'].to_numpy(dtype=np.int8)
+
+        scores = pd.to_numeric(df['ExMk'], errors='coerce') if 'ExMk' in df.columns else pd.Series(np.nan, index=df.index)
+        return cls(
+            student_ids=df['STID'].astype(str).tolist(),
+            question_ids=[str(q) for q in questions],
+            codes=codes,
+            scores=scores.to_numpy(dtype=float)
+        )
+
+    def pack(self):
+        """Column values (StudentIds, QuestionIds, Correct, Incorrect, Skipped, Scores) for exam_responses"""
+        return [
+            json.dumps(self.student_ids),
+            json.dumps(self.question_ids),
+            np.packbits(self.codes == CORRECT).tobytes(),
+            np.packbits(self.codes == INCORRECT).tobytes(),
+            np.packbits(self.codes == SKIPPED).tobytes(),
+            self.scores.astype('<f4').tobytes(),
+        ]
+
+    @classmethod
+    def unpack(cls, student_ids, question_ids, correct, incorrect, skipped, scores):
+        """Inverse of pack()"""
+        student_ids = json.loads(student_ids)
+        question_ids = json.loads(question_ids)
+        shape = (len(student_ids), len(question_ids))
+        size = shape[0] * shape[1]
+        codes = np.zeros(shape, dtype=np.int8)
+        for code, plane in ((CORRECT, correct), (INCORRECT, incorrect), (SKIPPED, skipped)):
+            bits = np.unpackbits(np.frombuffer(plane, dtype=np.uint8), count=size).reshape(shape)
+            codes[bits.astype(bool)] = code
+        return cls(student_ids, question_ids, codes, np.frombuffer(scores, dtype='<f4').astype(float))
+
+
+def item_analysis(matrix):
+    """Per-question statistics of a ResponseMatrix, one row per question"""
+    seen = matrix.codes != NOT_SEEN
+    correct = (matrix.codes == CORRECT).astype(float)
+    students = seen.sum(axis=0)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        difficulty = correct.sum(axis=0) / students
+        incorrect_rate = (matrix.codes == INCORRECT).sum(axis=0) / students
+        skip_rate = (matrix.codes == SKIPPED).sum(axis=0) / students
+
+        # Upper and lower groups by total marks, among students with a score
+        scored = np.flatnonzero(~np.isnan(matrix.scores))
+        ranked = scored[np.argsort(matrix.scores[scored], kind='stable')]
+        group = max(int(round(len(ranked) * DISCRIMINATION_GROUP)), 1)
+        if len(ranked) >= 2:
+            discrimination = correct[ranked[-group:]].mean(axis=0) - correct[ranked[:group]].mean(axis=0)
+        else:
+            discrimination = np.full(len(matrix.question_ids), np.nan)
+
+        # Point-biserial: Pearson correlation of the 0/1 column with the scores, all questions at once
+        x = correct[scored]
+        y = matrix.scores[scored]
+        x_centered = x - x.mean(axis=0)
+        y_centered = y - y.mean()
+        point_biserial = (x_centered * y_centered[:, None]).sum(axis=0) / np.sqrt(
+            (x_centered ** 2).sum(axis=0) * (y_centered ** 2).sum()
+        )
+
+    return pd.DataFrame({
+        'Question': matrix.question_ids,
+        'Students': students,
+        'difficulty': difficulty,
+        'discrimination': discrimination,
+        'incorrect_rate': incorrect_rate,
+        'skip_rate': skip_rate,
+        'point_biserial': point_biserial,
+    })
+
+
+def _fetch_exam(cursor, exam_id):
+    columns = ['STID', 'ExMk'] + [
+        subject_column(template, i)
+        for i in range(1, MAX_SUBJECTS + 1)
+        for template in ['S{}NM'] + [template for _, template in _ID_TEMPLATES]
+    ]
+    cursor.execute(
+        f"SELECT {', '.join(f'`{c}`' for c in columns)} FROM exam_results WHERE ExID = %s ORDER BY STID",
+        (exam_id,)
+    )
+    return pd.DataFrame(cursor.fetchall(), columns=columns)
+
+
+def response_rows(exam_id, df):
+    """exam_responses rows of one exam, one per subject slot with question ids"""
+    rows = []
+    for i in range(1, MAX_SUBJECTS + 1):
+        matrix = ResponseMatrix.from_frame(df, i)
+        if matrix is None:
+            continue
+        names = df[subject_column('S{}NM', i)].dropna()
+        rows.append([exam_id, i, subject_name(i, names.iloc[0] if not names.empty else None)] + matrix.pack())
+    return rows
+
+
+def refresh_responses(cursor, exam_ids):
+    """Rebuild the exam_responses rows of every exam in `exam_ids` from exam_results"""
+    for exam_id in exam_ids:
+        rows = response_rows(exam_id, _fetch_exam(cursor, exam_id))
+        cursor.execute("DELETE FROM exam_responses WHERE ExID = %s", (exam_id,))
+        if rows:
+            cursor.executemany("""
+                INSERT INTO exam_responses
+                    (ExID, SubjectNo, SubjectName, StudentIds, QuestionIds, Correct, Incorrect, Skipped, Scores)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, rows)
+
+
+def refresh_all_responses(cursor):
+    """Rebuild exam_responses for every exam in exam_results"""
+    cursor.execute("SELECT DISTINCT ExID FROM exam_results")
+    refresh_responses(cursor, [row[0] for row in cursor.fetchall()])
+
+
+def create_and_backfill(cursor):
+    """Migration step: create exam_responses and fill it from exam_results"""
+    cursor.execute(RESPONSES_TABLE_DDL)
+    refresh_all_responses(cursor)
+
+
+if __name__ == "__main__":
+    from config.database import DatabaseConfig
+
+    connection = DatabaseConfig().connect()
+    try:
+        cursor = connection.cursor()
+        refresh_all_responses(cursor)
+        connection.commit()
+        cursor.close()
+        print("exam_responses rebuilt from exam_results")
+    finally:
+        connection.close()
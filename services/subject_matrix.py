@@ -0,0 +1,117 @@
+"""Marks of every subject in a result frame as one rows x subjects array.
+
+Reports used to scan S1Mk..S4Mk one column at a time under fixed names. A
+SubjectMatrix loads all subject marks of a result frame into a single float
+array and computes per-subject statistics with one NumPy/pandas pass over it.
+
+Subjects are keyed by name, not by slot: every mark is labelled with its own
+row's S*NM (falling back to models.schema.DEFAULT_SUBJECT_NAMES), so a slot
+holding different subjects in different exams is split into those subjects,
+and slots holding the same subject are merged into one column. Should a
+row name the same subject in two slots, the lower slot's mark is used.
+"""
+import warnings
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from models.schema import MAX_SUBJECTS, subject_column, subject_name
+
+SUBJECT_STATS = ['average', 'max', 'min', 'std_dev', 'count']
+
+
+def _slot_labels(df, subject_no):
+    """Subject name of every row's mark in one slot: its S*NM, or the slot's default name"""
+    default = subject_name(subject_no)
+    column = subject_column('S{}NM', subject_no)
+    if column not in df.columns:
+        return np.full(len(df), default, dtype=object)
+    stored = df[column].astype(object).where(df[column].notna(), '').astype(str).str.strip()
+    return stored.where(stored != '', default).to_numpy(dtype=object)
+
+
+@dataclass
+class SubjectMatrix:
+    names: List[str]
+    marks: np.ndarray  # float, rows x subjects, NaN where a row has no mark
+    index: pd.Index
+    # {mark column: subject names it holds}, only for slots with marks
+    slot_names: Dict[str, List[str]]
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build the matrix from exam_results-shaped rows (S*Mk and, if present, S*NM columns)"""
+        slots = [i for i in range(1, MAX_SUBJECTS + 1) if subject_column('S{}Mk', i) in df.columns]
+        mark_columns = [subject_column('S{}Mk', i) for i in slots]
+        slot_marks = df[mark_columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        has_mark = ~np.isnan(slot_marks)
+
+        labels = [_slot_labels(df, i) for i in slots]
+        slot_names = {}
+        for column, slot_labels, marked in zip(mark_columns, labels, has_mark.T):
+            if marked.any():
+                slot_names[column] = pd.unique(slot_labels[marked]).tolist()
+        names = list(dict.fromkeys(name for names in slot_names.values() for name in names))
+
+        marks = np.full((len(df), len(names)), np.nan)
+        positions = pd.Index(names)
+        rows = np.arange(len(df))
+        for j, slot_labels in enumerate(labels):
+            target = positions.get_indexer(slot_labels)
+            # Keep a mark already taken from a lower slot for the same subject
+            fill = has_mark[:, j] & (target >= 0)
+            fill[fill] &= np.isnan(marks[rows[fill], target[fill]])
+            marks[rows[fill], target[fill]] = slot_marks[fill, j]
+
+        return cls(names=names, marks=marks, index=df.index, slot_names=slot_names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def frame(self):
+        """Marks as a DataFrame with one column per subject name"""
+        return pd.DataFrame(self.marks, index=self.index, columns=self.names)
+
+    def column_labels(self):
+        """{mark column: subject name}, e.g. for st.dataframe column_config.
+
+        A slot that holds different subjects in different exams is labelled
+        with all of them, e.g. "Physics / Chemistry".
+        """
+        return {column: " / ".join(names) for column, names in self.slot_names.items()}
+
+    def stats(self):
+        """Per-subject statistics over all rows: DataFrame indexed by subject name"""
+        if not len(self):
+            return pd.DataFrame(columns=SUBJECT_STATS)
+        # Every kept column has at least one mark; a single mark has no std dev (NaN)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return pd.DataFrame({
+                'average': np.nanmean(self.marks, axis=0),
+                'max': np.nanmax(self.marks, axis=0),
+                'min': np.nanmin(self.marks, axis=0),
+                'std_dev': np.nanstd(self.marks, axis=0, ddof=1),
+                'count': (~np.isnan(self.marks)).sum(axis=0),
+            }, index=self.names)
+
+    def averages(self):
+        """{subject name: mean mark}"""
+        return self.stats()['average'].to_dict()
+
+    def grouped_stats(self, keys):
+        """Per-group, per-subject statistics with one groupby over the whole matrix.
+
+        Returns a DataFrame indexed by group key with (subject, stat) columns.
+        """
+        grouped = self.frame().groupby(np.asarray(keys), sort=False)
+        result = pd.concat({
+            'average': grouped.mean(),
+            'max': grouped.max(),
+            'min': grouped.min(),
+            'std_dev': grouped.std(),
+            'count': grouped.count(),
+        }, axis=1)
+        return result.swaplevel(axis=1)
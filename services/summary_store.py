@@ -0,0 +1,274 @@
+"""Pre-aggregated score summaries per exam, exam x class and exam x class x subject.
+
+The upload pipeline calls refresh_summaries() for every exam it touched; the
+Class Reports and Analytics headline metrics then read a handful of summary
+rows instead of every result row. Each summary row stores count, sum, sum of
+squares, min and max (so means and standard deviations can be combined across
+rows exactly), a histogram over exam-wide bins and a quantile sketch.
+
+Summaries are recomputed, not updated in place: an upload rebuilds every row
+of each exam it touched from that exam's exam_results rows. Count, sum and
+sum of squares could be adjusted by deltas, but the exam-wide histogram bins
+and the quantile sketch cannot, and an updated row would need its previous
+marks. The cost is one read of the touched exams per upload, independent of
+the size of the rest of the table.
+
+Rebuild everything with ``python -m services.summary_store``.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from models.schema import MAX_SUBJECTS, subject_column
+
+HIST_BINS = 20
+SKETCH_POINTS = 101  # quantiles at 0%, 1%, ..., 100%
+
+_STAT_COLUMNS = """
+        StudentCount INT NOT NULL,
+        SumMarks DOUBLE,
+        SumSquares DOUBLE,
+        MinMarks FLOAT,
+        MaxMarks FLOAT,
+        HistEdges TEXT,
+        HistCounts TEXT,
+        Quantiles TEXT,
+        UpdatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+"""
+
+SUMMARY_TABLES_DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS exam_summary (
+        ExID VARCHAR(32) PRIMARY KEY,
+        {_STAT_COLUMNS}
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS exam_class_summary (
+        ExID VARCHAR(32),
+        CLASS VARCHAR(64),
+        {_STAT_COLUMNS},
+        PRIMARY KEY (ExID, CLASS),
+        INDEX idx_class_summary_class (CLASS)
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS exam_class_subject_summary (
+        ExID VARCHAR(32),
+        CLASS VARCHAR(64),
+        SubjectNo TINYINT,
+        SubjectName VARCHAR(64),
+        {_STAT_COLUMNS},
+        PRIMARY KEY (ExID, CLASS, SubjectNo),
+        INDEX idx_subject_summary_class (CLASS)
+    )
+    """,
+]
+
+_STAT_FIELDS = [
+    'StudentCount', 'SumMarks', 'SumSquares', 'MinMarks', 'MaxMarks',
+    'HistEdges', 'HistCounts', 'Quantiles',
+]
+
+
+def summarize(values, edges):
+    """Summary statistics of one group of marks, with the histogram over shared `edges`"""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return None
+    counts, _ = np.histogram(values, bins=edges)
+    quantiles = np.quantile(values, np.linspace(0, 1, SKETCH_POINTS))
+    return [
+        int(values.size),
+        float(values.sum()),
+        float(np.square(values).sum()),
+        float(values.min()),
+        float(values.max()),
+        json.dumps(np.round(edges, 4).tolist()),
+        json.dumps(counts.tolist()),
+        json.dumps(np.round(quantiles, 4).tolist()),
+    ]
+
+
+def _edges(values):
+    values = pd.to_numeric(values, errors='coerce').dropna()
+    if values.empty:
+        return None
+    low, high = float(values.min()), float(values.max())
+    if low == high:
+        high = low + 1
+    return np.linspace(low, high, HIST_BINS + 1)
+
+
+def _fetch_exam(cursor, exam_id):
+    columns = ['CLASS', 'ExMk'] + [
+        subject_column(template, i)
+        for i in range(1, MAX_SUBJECTS + 1) for template in ('S{}NM', 'S{}Mk')
+    ]
+    cursor.execute(
+        f"SELECT {', '.join(f'`{c}`' for c in columns)} FROM exam_results WHERE ExID = %s",
+        (exam_id,)
+    )
+    return pd.DataFrame(cursor.fetchall(), columns=columns)
+
+
+def summary_rows(exam_id, df):
+    """Compute the exam, exam x class and exam x class x subject summary rows for one exam"""
+    exam_rows, class_rows, subject_rows = [], [], []
+
+    edges = _edges(df['ExMk'])
+    if edges is not None:
+        marks = pd.to_numeric(df['ExMk'], errors='coerce')
+        stats = summarize(marks, edges)
+        exam_rows.append([exam_id] + stats)
+        for class_name, group in marks.groupby(df['CLASS']):
+            stats = summarize(group, edges)
+            if stats:
+                class_rows.append([exam_id, class_name] + stats)
+
+    for i in range(1, MAX_SUBJECTS + 1):
+        marks = pd.to_numeric(df[subject_column('S{}Mk', i)], errors='coerce')
+        edges = _edges(marks)
+        if edges is None:
+            continue
+        names = df[subject_column('S{}NM', i)].dropna()
+        name = names.iloc[0] if not names.empty else None
+        for class_name, group in marks.groupby(df['CLASS']):
+            stats = summarize(group, edges)
+            if stats:
+                subject_rows.append([exam_id, class_name, i, name] + stats)
+
+    return exam_rows, class_rows, subject_rows
+
+
+def _insert(cursor, table, key_columns, rows):
+    if not rows:
+        return
+    columns = key_columns + _STAT_FIELDS
+    cursor.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})",
+        rows
+    )
+
+
+def refresh_summaries(cursor, exam_ids):
+    """Recompute the summary rows of every exam in `exam_ids` from exam_results"""
+    for exam_id in exam_ids:
+        exam_rows, class_rows, subject_rows = summary_rows(exam_id, _fetch_exam(cursor, exam_id))
+        for table in ('exam_summary', 'exam_class_summary', 'exam_class_subject_summary'):
+            cursor.execute(f"DELETE FROM {table} WHERE ExID = %s", (exam_id,))
+        _insert(cursor, 'exam_summary', ['ExID'], exam_rows)
+        _insert(cursor, 'exam_class_summary', ['ExID', 'CLASS'], class_rows)
+        _insert(cursor, 'exam_class_subject_summary', ['ExID', 'CLASS', 'SubjectNo', 'SubjectName'], subject_rows)
+
+
+def refresh_all_summaries(cursor):
+    """Recompute summaries for every exam in exam_results"""
+    cursor.execute("SELECT DISTINCT ExID FROM exam_results")
+    refresh_summaries(cursor, [row[0] for row in cursor.fetchall()])
+
+
+def create_and_backfill(cursor):
+    """Migration step: create the summary tables and fill them from exam_results"""
+    for ddl in SUMMARY_TABLES_DDL:
+        cursor.execute(ddl)
+    refresh_all_summaries(cursor)
+
+
+def combine(summary_df):
+    """Combine summary rows (e.g. one class over several exams) into overall statistics.
+
+    Count, mean, standard deviation, min and max are exact. The median is
+    read from the quantile sketches: exact for a single row, approximate when
+    several rows are merged ('median_exact' tells which).
+    """
+    if summary_df is None or summary_df.empty:
+        return None
+    count = summary_df['StudentCount'].sum()
+    if not count:
+        return None
+    total = summary_df['SumMarks'].sum()
+    squares = summary_df['SumSquares'].sum()
+    mean = total / count
+    variance = (squares - total * total / count) / (count - 1) if count > 1 else float('nan')
+    return {
+        'count': int(count),
+        'average': mean,
+        'median': merged_quantile(summary_df, 0.5),
+        'median_exact': len(summary_df) == 1,
+        'std_dev': float(np.sqrt(max(variance, 0.0))) if count > 1 else float('nan'),
+        'max': summary_df['MaxMarks'].max(),
+        'min': summary_df['MinMarks'].min(),
+    }
+
+
+def merged_quantile(summary_df, q):
+    """Quantile `q` over summary rows from their quantile sketches.
+
+    A single row's sketch holds exact quantiles at every 1%, interpolated in
+    between. Several rows are merged as count-weighted samples, which is an
+    approximation.
+    """
+    if len(summary_df) == 1:
+        sketch = summary_df['Quantiles'].iloc[0]
+        values = json.loads(sketch) if isinstance(sketch, str) else sketch
+        if not values:
+            return float('nan')
+        return float(np.interp(q, np.linspace(0, 1, len(values)), values))
+
+    points, weights = [], []
+    for sketch, count in zip(summary_df['Quantiles'], summary_df['StudentCount']):
+        values = json.loads(sketch) if isinstance(sketch, str) else sketch
+        if not values or not count:
+            continue
+        points.extend(values)
+        weights.extend([count / len(values)] * len(values))
+    if not points:
+        return float('nan')
+    order = np.argsort(points)
+    points = np.asarray(points)[order]
+    cumulative = np.cumsum(np.asarray(weights)[order])
+    return float(points[np.searchsorted(cumulative, q * cumulative[-1])])
+
+
+def merged_histogram(summary_df, bins=HIST_BINS):
+    """Merge the histograms of several summary rows onto one common set of `bins` edges.
+
+    Rows of different exams have different edges; counts are spread uniformly
+    within each source bin. Returns (edges, counts) or None without histograms.
+    """
+    histograms = []
+    for edges, counts in zip(summary_df['HistEdges'], summary_df['HistCounts']):
+        edges = json.loads(edges) if isinstance(edges, str) else edges
+        counts = json.loads(counts) if isinstance(counts, str) else counts
+        if edges and counts:
+            histograms.append((np.asarray(edges, dtype=float), np.asarray(counts, dtype=float)))
+    if not histograms:
+        return None
+    if len(histograms) == 1:
+        return histograms[0]
+
+    low = min(edges[0] for edges, _ in histograms)
+    high = max(edges[-1] for edges, _ in histograms)
+    target = np.linspace(low, high if high > low else low + 1, bins + 1)
+    cumulative = np.zeros(bins + 1)
+    for edges, counts in histograms:
+        # Piecewise-linear cumulative count of each source, read at the target edges
+        cumulative += np.interp(target, edges, np.concatenate([[0], np.cumsum(counts)]))
+    return target, np.diff(cumulative)
+
+
+if __name__ == "__main__":
+    from config.database import DatabaseConfig
+
+    connection = DatabaseConfig().connect()
+    try:
+        cursor = connection.cursor()
+        refresh_all_summaries(cursor)
+        connection.commit()
+        cursor.close()
+        print("Summary tables rebuilt from exam_results")
+    finally:
+        connection.close()
@@ -0,0 +1,71 @@
+"""Shared fixtures. Run the suite from the repository root with ``python -m pytest``."""
+import pytest
+import streamlit as st
+
+from utils.synthetic_data import generate_exam_results
+
+STUDENTS = 40
+EXAMS = 2
+
+
+@pytest.fixture
+def results():
+    """Small synthetic exam_results frame: STUDENTS x EXAMS rows"""
+    return generate_exam_results(students=STUDENTS, classes=3, exams=EXAMS, questions=10)
+
+
+@pytest.fixture
+def empty_db(tmp_path, monkeypatch):
+    """Migrated, empty SQLite database in tmp_path; DB_BACKEND and DB_PATH point at it"""
+    from config.database import DatabaseConfig
+    from utils.migrations import migrate
+
+    # Set before DatabaseConfig reads the environment; .env never overrides these
+    monkeypatch.setenv('DB_BACKEND', 'sqlite')
+    monkeypatch.setenv('DB_PATH', str(tmp_path / 'exam_db.sqlite'))
+    connection = DatabaseConfig().connect()
+    try:
+        migrate(connection, log=lambda message: None)
+    finally:
+        connection.close()
+    st.cache_data.clear()
+    yield
+    st.cache_data.clear()
+
+
+def ingest(tmp_path, df, **kwargs):
+    """Upload `df` as a CSV through IngestService and return its IngestSummary"""
+    from services.database_service import DatabaseService
+    from services.ingest_service import IngestService
+
+    csv = tmp_path / 'results.csv'
+    df.to_csv(csv, index=False)
+    with open(csv, 'rb') as source:
+        summary = IngestService(**kwargs).ingest_csv(source)
+    DatabaseService.refresh_data_versions()
+    return summary
+
+
+def query(sql, params=()):
+    """All rows of one query against the configured database"""
+    from config.database import DatabaseConfig
+
+    connection = DatabaseConfig().connect()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(sql, params)
+        rows = [tuple(row) for row in cursor.fetchall()]
+        cursor.close()
+        return rows
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, empty_db, results):
+    """DatabaseService over the empty_db database holding `results`, ingested through IngestService"""
+    from services.database_service import DatabaseService
+
+    ingest(tmp_path, results)
+    st.cache_data.clear()
+    return DatabaseService()
@@ -0,0 +1,87 @@
+import pytest
+from mysql.connector import Error
+
+from config.database import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.in_transaction = False
+        self.rolled_back = False
+        self.closed = False
+        self.ping_fails = False
+        self.pings = 0
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if self.ping_fails:
+            raise Error("gone away")
+
+    def rollback(self):
+        self.rolled_back = True
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def opened():
+    return []
+
+
+@pytest.fixture
+def pool(opened):
+    def connect():
+        opened.append(FakeConnection(len(opened)))
+        return opened[-1]
+    return ConnectionPool(connect, size=2, timeout=0.05, validate_after=60)
+
+
+def test_released_connection_is_reused(pool, opened):
+    first = pool.acquire()
+    first.close()
+    second = pool.acquire()
+    assert second.number == 0 and len(opened) == 1
+    assert pool.stats()['checkouts'] == 2
+
+
+def test_checkout_times_out_when_pool_is_exhausted(pool):
+    held = [pool.acquire(), pool.acquire()]
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    assert pool.stats()['timeouts'] == 1
+    held[0].close()
+    assert pool.acquire().number == 0
+
+
+def test_release_rolls_back_open_transaction(pool, opened):
+    connection = pool.acquire()
+    connection.in_transaction = True
+    connection.close()
+    assert opened[0].rolled_back
+    assert pool.stats()['in_use'] == 0 and pool.stats()['idle'] == 1
+
+
+def test_returned_wrapper_cannot_be_used(pool):
+    connection = pool.acquire()
+    connection.close()
+    with pytest.raises(Error):
+        connection.ping()
+
+
+def test_stale_idle_connection_is_validated(pool, opened):
+    pool.validate_after = 0
+    pool.acquire().close()
+    opened[0].ping_fails = True
+    connection = pool.acquire()
+    # The dead connection was discarded and a new one opened in its place
+    assert connection.number == 1
+    assert opened[0].closed and pool.stats()['discarded'] == 1
+
+
+def test_recent_idle_connection_is_not_pinged(pool, opened):
+    pool.acquire().close()
+    pool.acquire().close()
+    assert opened[0].pings == 0
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+import streamlit as st
+
+from components.class_reports import _page_key
+from conftest import ingest
+from services.database_service import RESULT_SORT_COLUMNS, DatabaseService
+
+PAGE_SIZE = 7
+
+
+@pytest.fixture
+def with_absent(tmp_path, empty_db, results):
+    """Database holding `results` where a few students sat no exam (no marks, so no ranks)"""
+    results = results.copy()
+    absent = results.index[::9]
+    results.loc[absent, ['ExMk', 'ExRnk', 'ClassExRnk']] = np.nan
+    ingest(tmp_path, results)
+    st.cache_data.clear()
+    return DatabaseService(), results
+
+
+def _pages(db, sort='ExRnk', **kwargs):
+    """Every page of get_results_page, following the keyset from page to page"""
+    pages, after = [], None
+    while True:
+        page = db.get_results_page(sort=sort, after=after, limit=PAGE_SIZE, **kwargs)
+        if page.empty:
+            return pages
+        pages.append(page)
+        after = _page_key(page.iloc[-1], sort)
+
+
+@pytest.mark.parametrize('descending', [None, True, False])
+@pytest.mark.parametrize('sort', list(RESULT_SORT_COLUMNS))
+def test_keyset_pages_cover_every_row_once(with_absent, sort, descending):
+    db, results = with_absent
+    pages = _pages(db, sort=sort, descending=descending)
+    keys = [(row.STID, row.ExID) for page in pages for row in page.itertuples()]
+    assert len(keys) == len(set(keys)) == len(results)
+    assert all(len(page) == PAGE_SIZE for page in pages[:-1])
+
+
+@pytest.mark.parametrize('descending', [True, False])
+def test_rows_without_sort_value_come_last(with_absent, descending):
+    db, results = with_absent
+    marks = [mark for page in _pages(db, sort='ExMk', descending=descending) for mark in page['ExMk']]
+    present = [mark for mark in marks if not pd.isna(mark)]
+    assert present == sorted(present, reverse=descending)
+    assert pd.isna(marks[len(present):]).all() and len(marks) - len(present) == results['ExMk'].isna().sum()
+
+
+def test_keyset_pages_with_filters(sqlite_db, results):
+    exam_id = results['ExID'].iloc[0]
+    class_name = results['CLASS'].iloc[0]
+    expected = results[(results['ExID'] == exam_id) & (results['CLASS'] == class_name)]
+    pages = _pages(sqlite_db, exam_id=exam_id, class_name=class_name)
+    assert sorted(row for page in pages for row in page['STID']) == sorted(expected['STID'])
+
+
+def test_keyset_pages_with_search(sqlite_db, results):
+    name = results['STNAME'].iloc[0]
+    pages = _pages(sqlite_db, search=name)
+    assert {row for page in pages for row in page['STNAME']} == {name}
@@ -0,0 +1,88 @@
+import pytest
+
+from config import embedded
+from services.embedded_store import portable_ddl
+
+
+def test_translate_placeholders_and_quotes():
+    assert embedded.translate("SELECT `ExMk` FROM exam_results WHERE ExID = %s") == \
+        'SELECT "ExMk" FROM exam_results WHERE ExID = ?'
+
+
+def test_translate_like_gets_mysql_escape():
+    assert embedded.translate("WHERE STNAME LIKE %s") == "WHERE STNAME LIKE ? ESCAPE '\\'"
+
+
+def test_translate_insert_ignore():
+    assert embedded.translate("INSERT IGNORE INTO t (a) VALUES (%s)") == "INSERT OR IGNORE INTO t (a) VALUES (?)"
+
+
+def test_translate_on_duplicate_key_update():
+    query = embedded.translate(
+        "INSERT INTO t (k, v) VALUES (%s, %s) ON DUPLICATE KEY UPDATE v = VALUES(v), n = n + 1"
+    )
+    assert query == "INSERT INTO t (k, v) VALUES (?, ?) ON CONFLICT DO UPDATE SET v = excluded.v, n = n + 1"
+
+
+def test_portable_ddl_strips_mysql_only_clauses():
+    table, indexes = portable_ddl("""
+        CREATE TABLE IF NOT EXISTS t (
+            k VARCHAR(32),
+            n TINYINT,
+            h BIGINT UNSIGNED,
+            UpdatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (k),
+            INDEX idx_t_n (n)
+        )
+    """)
+    assert 'VARCHAR' not in table and 'UNSIGNED' not in table and 'ON UPDATE' not in table
+    assert 'INDEX' not in table
+    assert indexes == ["CREATE INDEX IF NOT EXISTS idx_t_n ON t (n)"]
+
+
+@pytest.fixture(params=embedded.EMBEDDED_BACKENDS)
+def connection(request, tmp_path):
+    if request.param == 'duckdb':
+        pytest.importorskip('duckdb')
+    connection = embedded.connect(request.param, str(tmp_path / f"test.{request.param}"))
+    cursor = connection.cursor()
+    cursor.execute("CREATE TABLE t (k TEXT PRIMARY KEY, v INTEGER, n INTEGER DEFAULT 0)")
+    cursor.close()
+    yield connection
+    connection.close()
+
+
+def _rows(connection):
+    cursor = connection.cursor()
+    cursor.execute("SELECT k, v, n FROM t ORDER BY k")
+    rows = [tuple(row) for row in cursor.fetchall()]
+    cursor.close()
+    return rows
+
+
+def test_executemany_insert_ignore(connection):
+    cursor = connection.cursor()
+    cursor.executemany("INSERT INTO t (k, v) VALUES (%s, %s)", [('a', 1), ('b', 2)])
+    cursor.executemany("INSERT IGNORE INTO t (k, v) VALUES (%s, %s)", [('a', 9), ('c', 3)])
+    cursor.close()
+    assert _rows(connection) == [('a', 1, 0), ('b', 2, 0), ('c', 3, 0)]
+
+
+def test_executemany_on_duplicate_key_update(connection):
+    cursor = connection.cursor()
+    cursor.executemany("INSERT INTO t (k, v) VALUES (%s, %s)", [('a', 1)])
+    cursor.executemany(
+        "INSERT INTO t (k, v) VALUES (%s, %s) ON DUPLICATE KEY UPDATE v = VALUES(v), n = n + 1",
+        [('a', 5), ('b', 2)]
+    )
+    cursor.close()
+    assert _rows(connection) == [('a', 5, 1), ('b', 2, 0)]
+
+
+def test_rollback_discards_transaction(connection):
+    connection.start_transaction()
+    cursor = connection.cursor()
+    cursor.execute("INSERT INTO t (k, v) VALUES (%s, %s)", ('a', 1))
+    cursor.close()
+    connection.rollback()
+    assert _rows(connection) == []
@@ -0,0 +1,23 @@
+import pandas as pd
+import pytest
+
+from utils.helpers import normalize_exam_dates
+
+
+def test_normalize_exam_dates_known_formats():
+    dates = pd.Series(['2024-03-05', '05/03/2024', '05-03-2024', '2024-03-05 10:30:00'])
+    assert normalize_exam_dates(dates).tolist() == ['2024-03-05'] * 4
+
+
+def test_normalize_exam_dates_month_first_fallback():
+    # Not a valid day-first date, so MM/DD/YYYY applies
+    assert normalize_exam_dates(pd.Series(['12/31/2024'])).tolist() == ['2024-12-31']
+
+
+def test_normalize_exam_dates_blank_values_become_none():
+    assert normalize_exam_dates(pd.Series(['', '  ', None])).tolist() == [None, None, None]
+
+
+def test_normalize_exam_dates_rejects_unknown_format():
+    with pytest.raises(ValueError, match="2 exam dates are not in a known format"):
+        normalize_exam_dates(pd.Series(['2024-03-05', 'March 5th', '31.12.2024']))
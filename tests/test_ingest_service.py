@@ -0,0 +1,111 @@
+import pandas as pd
+import pytest
+
+from conftest import ingest, query
+from services.ingest_service import IngestError, IngestService, prepare_batch
+
+
+def _count():
+    return query("SELECT COUNT(*) FROM exam_results")[0][0]
+
+
+def test_ingest_writes_in_batches(tmp_path, empty_db, results):
+    summary = ingest(tmp_path, results, batch_size=30)
+    assert (summary.batches, summary.rows_read, summary.inserted) == (3, len(results), len(results))
+    assert _count() == len(results)
+
+
+def test_failed_upload_resumes_after_last_committed_batch(tmp_path, empty_db, results):
+    broken = results.copy()
+    broken.loc[70, 'ExDt'] = 'not a date'
+    with pytest.raises(IngestError) as failure:
+        ingest(tmp_path, broken, batch_size=30)
+    # Batches 0 and 1 were committed, the third failed while being read
+    assert failure.value.next_batch == 2
+    assert _count() == 60
+
+    csv = tmp_path / 'results.csv'
+    results.to_csv(csv, index=False)
+    with open(csv, 'rb') as source:
+        summary = IngestService(batch_size=30).ingest_csv(source, start_batch=failure.value.next_batch)
+    assert (summary.skipped_batches, summary.batches, summary.inserted) == (2, 1, 20)
+    assert _count() == len(results)
+
+
+def _with_duplicate(results):
+    duplicate = results.iloc[[0]].copy()
+    duplicate['STNAME'] = 'Renamed'
+    return pd.concat([results, duplicate], ignore_index=True)
+
+
+def test_prepare_batch_keeps_last_row_of_repeated_key(results):
+    batch = prepare_batch(_with_duplicate(results))
+    assert len(batch) == len(results)
+    first = batch[(batch['STID'] == results['STID'][0]) & (batch['ExID'] == results['ExID'][0])]
+    assert first['STNAME'].tolist() == ['Renamed']
+
+
+def test_executemany_upload_keeps_last_row_of_repeated_key(tmp_path, empty_db, results):
+    ingest(tmp_path, _with_duplicate(results))
+    assert query("SELECT STNAME FROM exam_results WHERE STID = %s AND ExID = %s",
+                 (results['STID'][0], results['ExID'][0])) == [('Renamed',)]
+
+
+class RecordingCursor:
+    """Stands in for a MySQL cursor; keeps the statements and the LOAD DATA file contents"""
+
+    def __init__(self):
+        self.statements = []
+        self.loaded = None
+        self.rowcount = 0
+
+    def execute(self, query, params=None):
+        self.statements.append(' '.join(query.split()))
+        if 'LOAD DATA' in query:
+            with open(params[0], encoding='utf-8') as f:
+                self.loaded = f.read().splitlines()
+
+    def fetchall(self):
+        return []
+
+
+def test_load_data_mode_stages_one_row_per_key(monkeypatch, results):
+    monkeypatch.setenv('DB_BACKEND', 'mysql')
+    batch = prepare_batch(_with_duplicate(results))
+    cursor = RecordingCursor()
+    IngestService(mode='load-data')._load_data_batch(cursor, batch)
+
+    assert len(cursor.loaded) == len(results)
+    assert sum(line.startswith(f"{results['STID'][0]},") and 'Renamed' in line for line in cursor.loaded) == 1
+    assert cursor.statements[-1].startswith("INSERT INTO exam_results")
+    assert 'ON DUPLICATE KEY UPDATE' in cursor.statements[-1]
+
+
+def _versions():
+    return {(exam_id, class_name): version
+            for exam_id, class_name, version in query("SELECT ExID, CLASS, Version FROM data_versions")}
+
+
+def test_unchanged_reupload_keeps_data_versions(tmp_path, empty_db, results):
+    ingest(tmp_path, results)
+    versions = _versions()
+
+    summary = ingest(tmp_path, results)
+    assert summary.skipped == len(results) and summary.exam_ids == set()
+    assert _versions() == versions
+
+
+def test_changed_row_refreshes_only_its_exam(tmp_path, empty_db, results):
+    ingest(tmp_path, results)
+    before = _versions()
+
+    changed = results.copy()
+    changed.loc[0, 'ExMk'] = changed.loc[0, 'ExMk'] + 1
+    summary = ingest(tmp_path, changed)
+    assert (summary.skipped, summary.updated) == (len(results) - 1, 1)
+    exam_id = results['ExID'][0]
+    assert summary.exam_ids == {exam_id}
+
+    after = _versions()
+    # Every class of the changed exam is bumped (its ranks were recomputed), no other exam is
+    assert {key for key in after if after[key] != before[key]} == {key for key in before if key[0] == exam_id}
@@ -0,0 +1,28 @@
+from conftest import ingest, query
+
+
+def _exam(results, exam_id, date, class_name):
+    """A copy of the first exam under another id and date, every student in `class_name`"""
+    exam = results[results['ExID'] == results['ExID'].iloc[0]].copy()
+    exam['ExID'] = exam_id
+    exam['ExDt'] = date
+    exam['CLASS'] = class_name
+    return exam
+
+
+def _classes():
+    return {class_name for (class_name,) in query("SELECT DISTINCT CLASS FROM students")}
+
+
+def test_newer_exam_updates_student_details(tmp_path, empty_db, results):
+    ingest(tmp_path, results)
+    ingest(tmp_path, _exam(results, '2001', '2030-01-01', 'Promoted'))
+    assert _classes() == {'Promoted'}
+
+
+def test_older_exam_keeps_current_student_details(tmp_path, empty_db, results):
+    ingest(tmp_path, results)
+    current = query("SELECT STID, CLASS FROM students ORDER BY STID")
+
+    ingest(tmp_path, _exam(results, '0001', '2020-01-01', 'Old class'))
+    assert query("SELECT STID, CLASS FROM students ORDER BY STID") == current
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.rank_engine import INPUT_COLUMNS, compute_ranks, synthetic_exam
+
+
+@pytest.fixture
+def ranked():
+    df = pd.DataFrame({
+        'STID': ['a', 'b', 'c', 'd', 'e', 'f'],
+        'CLASS': ['X', 'X', 'Y', 'Y', 'X', 'Y'],
+        'ExMk': [90, 80, 90, 70, np.nan, 80],
+        'AllExMk': [300, 250, 250, 200, 100, np.nan],
+    }).reindex(columns=INPUT_COLUMNS)
+    df['S1Mk'] = [50, 40, 50, 30, np.nan, 40]
+    return compute_ranks(df).set_index('STID')
+
+
+def test_ties_share_the_best_rank_and_the_next_rank_skips(ranked):
+    assert ranked['ExRnk'].tolist() == [1, 3, 1, 5, pd.NA, 3]
+    assert ranked['FinRnk'].tolist() == [1, 2, 2, 4, 5, pd.NA]
+
+
+def test_class_ranks(ranked):
+    assert ranked['ClassExRnk'].tolist() == [1, 2, 1, 3, pd.NA, 2]
+    assert ranked.loc[['a', 'b', 'e'], 'ClassRnk'].tolist() == [1, 2, 3]
+
+
+def test_counts_above_and_below_exclude_ties(ranked):
+    assert ranked['CNTABOVE'].tolist() == [0, 2, 0, 4, pd.NA, 2]
+    assert ranked['CNTBELOW'].tolist() == [3, 1, 3, 0, pd.NA, 1]
+    assert ranked['EXSTCOUNT'].unique().tolist() == [5]
+    assert ranked.loc[['a', 'c', 'e'], 'EXCLASSSTCOUNT'].tolist() == [2, 3, pd.NA]
+
+
+def test_group_statistics(ranked):
+    assert (ranked['ExGMax'].iloc[0], ranked['ExGmin'].iloc[0], ranked['ExAvg'].iloc[0]) == (90, 70, 82)
+    assert (ranked['S1GMax'].iloc[0], ranked['S1GMin'].iloc[0], ranked['S1Avg'].iloc[0]) == (50, 30, 42)
+    assert ranked['S2GMax'].isna().all()
+
+
+def test_ranks_match_sorting_on_synthetic_exam():
+    df = synthetic_exam(2000)
+    ranks = compute_ranks(df)['ExRnk'].to_numpy()
+    marks = df['ExMk'].to_numpy()
+    # Competition rank = 1 + number of strictly higher marks
+    expected = 1 + (marks[None, :] > marks[:, None]).sum(axis=1)
+    np.testing.assert_array_equal(ranks, expected)
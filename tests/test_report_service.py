@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.report_service import ReportService
+
+
+@pytest.fixture
+def reports():
+    df = pd.DataFrame({
+        'STID': ['s1', 's1', 's2', 's2'],
+        'STNAME': ['Asha', 'Asha', 'Ben', 'Ben'],
+        'FATHER': ['F1', 'F1', 'F2', 'F2'],
+        'ROLLNO': ['01', '01', '02', '02'],
+        'CLASS': ['10A', '10A', '10B', '10B'],
+        'ExID': ['1001', '1002', '1001', '1002'],
+        'ExDt': ['2024-01-07', '2024-01-21', '2024-01-07', '2024-01-21'],
+        'ExMk': [100.0, 140.0, 90.0, np.nan],
+        'ExRnk': [1, 1, 2, np.nan],
+        'S1NM': ['Maths'] * 4,
+        'S1Mk': [60.0, 80.0, 50.0, np.nan],
+        'S2NM': ['Physics'] * 4,
+        'S2Mk': [40.0, 60.0, np.nan, np.nan],
+    })
+    return ReportService().build_student_reports(df)
+
+
+def test_metrics_per_student(reports):
+    asha, ben = reports['s1'], reports['s2']
+    assert asha['student_info'] == {'name': 'Asha', 'father': 'F1', 'roll_no': '01', 'class': '10A'}
+    assert (asha['exam_count'], asha['average_score'], asha['best_score'], asha['worst_score']) == (2, 120, 140, 100)
+    assert (ben['exam_count'], ben['average_score'], ben['best_rank']) == (2, 90, 2)
+
+
+def test_history_is_newest_first(reports):
+    assert reports['s1']['exam_history']['ExID'].tolist() == ['1002', '1001']
+
+
+def test_only_subjects_with_marks(reports):
+    assert reports['s1']['subject_performance'] == {
+        'Maths': {'average': 70, 'max': 80, 'min': 60},
+        'Physics': {'average': 50, 'max': 60, 'min': 40},
+    }
+    assert reports['s1']['subject_columns'] == {'S1Mk': 'Maths', 'S2Mk': 'Physics'}
+    assert list(reports['s2']['subject_performance']) == ['Maths']
+    assert reports['s2']['subject_columns'] == {'S1Mk': 'Maths'}
+
+
+def test_batch_matches_single_student_reports(results):
+    service = ReportService()
+    batch = service.build_student_reports(results)
+    for student_id in results['STID'].unique()[:5]:
+        single = service.build_student_reports(results[results['STID'] == student_id])[student_id]
+        assert batch[student_id]['subject_columns'] == single['subject_columns']
+        assert batch[student_id]['subject_performance'] == single['subject_performance']
+        assert batch[student_id]['average_score'] == pytest.approx(single['average_score'])
+
+
+def test_rows_without_subject_marks():
+    df = pd.DataFrame({'STID': ['s1'], 'STNAME': ['Asha'], 'FATHER': [None], 'ROLLNO': ['01'],
+                       'CLASS': ['10A'], 'ExID': ['1001'], 'ExDt': ['2024-01-07'], 'ExMk': [10.0],
+                       'ExRnk': [1], 'S1Mk': [np.nan]})
+    report = ReportService().build_student_reports(df)['s1']
+    assert report['subject_columns'] == {} and report['subject_performance'] == {}
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.response_store import CORRECT, INCORRECT, NOT_SEEN, SKIPPED, ResponseMatrix, item_analysis
+
+
+@pytest.fixture
+def matrix():
+    df = pd.DataFrame({
+        'STID': ['s1', 's2', 's3', 's4'],
+        'ExMk': [40, 30, 20, None],
+        'QS1CorIds': ['1,2,10', '1,2', '1', None],
+        'QS1IncorIds': [None, '10', '2', '1'],
+        'QS1Leftids': ['', None, '10', ''],
+    })
+    return ResponseMatrix.from_frame(df, 1)
+
+
+def test_from_frame_orders_questions_numerically(matrix):
+    assert matrix.question_ids == ['1', '2', '10']
+    assert matrix.codes.tolist() == [
+        [CORRECT, CORRECT, CORRECT],
+        [CORRECT, CORRECT, INCORRECT],
+        [CORRECT, INCORRECT, SKIPPED],
+        [INCORRECT, NOT_SEEN, NOT_SEEN],
+    ]
+
+
+def test_pack_unpack_round_trip(matrix):
+    restored = ResponseMatrix.unpack(*matrix.pack())
+    assert restored.student_ids == matrix.student_ids
+    assert restored.question_ids == matrix.question_ids
+    np.testing.assert_array_equal(restored.codes, matrix.codes)
+    np.testing.assert_allclose(restored.scores, matrix.scores)
+
+
+def test_pack_uses_one_bit_per_cell():
+    codes = np.full((100, 9), CORRECT, dtype=np.int8)
+    packed = ResponseMatrix([str(i) for i in range(100)], [str(i) for i in range(9)], codes, np.zeros(100)).pack()
+    assert len(packed[2]) == 100 * 9 // 8 + 1
+
+
+def test_from_frame_without_ids():
+    assert ResponseMatrix.from_frame(pd.DataFrame({'STID': ['s1'], 'QS1CorIds': [None]}), 1) is None
+
+
+def test_item_analysis_rates(matrix):
+    analysis = item_analysis(matrix)
+    assert analysis['difficulty'].tolist() == pytest.approx([0.75, 2 / 3, 1 / 3])
+    assert analysis['incorrect_rate'].tolist() == pytest.approx([0.25, 1 / 3, 1 / 3])
+    assert analysis['skip_rate'].tolist() == pytest.approx([0, 0, 1 / 3])
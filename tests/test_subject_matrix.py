@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from services.subject_matrix import SubjectMatrix
+
+
+def test_marks_are_keyed_by_subject_name():
+    # Exam 1 has Maths in slot 1, exam 2 moved it to slot 2; the second row names Physics twice
+    df = pd.DataFrame({
+        'S1NM': ['Maths', 'Physics', 'Biology'],
+        'S1Mk': [50, 60, 70],
+        'S2NM': ['Physics', 'Maths', 'Physics'],
+        'S2Mk': [40, 80, 90],
+    })
+    matrix = SubjectMatrix.from_frame(df)
+    assert matrix.names == ['Maths', 'Physics', 'Biology']
+    np.testing.assert_array_equal(matrix.marks, [[50, 40, np.nan], [80, 60, np.nan], [np.nan, 90, 70]])
+    assert matrix.column_labels() == {'S1Mk': 'Maths / Physics / Biology', 'S2Mk': 'Physics / Maths'}
+
+
+def test_blank_names_fall_back_to_slot_defaults():
+    matrix = SubjectMatrix.from_frame(pd.DataFrame({'S1NM': [None, ' '], 'S1Mk': [1, 2]}))
+    assert len(matrix.names) == 1
+    np.testing.assert_array_equal(matrix.marks[:, 0], [1, 2])
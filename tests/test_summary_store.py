@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.summary_store import combine, merged_quantile, summarize, _edges
+
+_FIELDS = ['StudentCount', 'SumMarks', 'SumSquares', 'MinMarks', 'MaxMarks', 'HistEdges', 'HistCounts', 'Quantiles']
+
+
+def _summary(*groups):
+    """Summary rows of several groups of marks, as the summary getters return them"""
+    rows = [summarize(marks, _edges(pd.Series(marks))) for marks in groups]
+    return pd.DataFrame(rows, columns=_FIELDS)
+
+
+def test_single_row_median_is_exact():
+    marks = np.random.default_rng(1).normal(100, 20, 501).round()
+    assert merged_quantile(_summary(marks), 0.5) == pytest.approx(np.median(marks), abs=1e-3)
+
+
+def test_merged_median_is_close():
+    rng = np.random.default_rng(2)
+    groups = [rng.normal(80, 15, 300), rng.normal(120, 15, 500)]
+    median = merged_quantile(_summary(*groups), 0.5)
+    assert median == pytest.approx(np.median(np.concatenate(groups)), rel=0.02)
+
+
+def test_combine_exact_statistics():
+    groups = [np.array([10.0, 20.0, 30.0]), np.array([40.0, 50.0])]
+    stats = combine(_summary(*groups))
+    everything = np.concatenate(groups)
+    assert stats['count'] == 5
+    assert stats['average'] == pytest.approx(everything.mean())
+    assert stats['std_dev'] == pytest.approx(everything.std(ddof=1))
+    assert (stats['min'], stats['max']) == (10.0, 50.0)
+    assert stats['median_exact'] is False
+    assert combine(_summary(groups[0]))['median_exact'] is True
+
+
+def test_combine_empty():
+    assert combine(pd.DataFrame(columns=_FIELDS)) is None
@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+import streamlit as st
+
+from conftest import ingest
+from services.database_service import _cache_state, versioned_cache
+
+
+class FakeService:
+    """data_version() from a dict, counting the reads the cached method makes"""
+
+    def __init__(self):
+        self.versions = {('E1', 'A'): 1, ('E1', 'B'): 1, ('E2', 'A'): 1}
+        self.reads = []
+
+    def data_version(self, exam_id=None, class_name=None):
+        return sum(version for (exam, cls), version in self.versions.items()
+                   if exam_id in (None, exam) and class_name in (None, cls))
+
+    @versioned_cache(exam_arg='exam_id', class_arg='class_name')
+    def read(_self, class_name=None, exam_id=None):
+        _self.reads.append((class_name, exam_id))
+        return pd.DataFrame({'n': [len(_self.reads)]})
+
+
+@pytest.fixture
+def service():
+    st.cache_data.clear()
+    yield FakeService()
+    st.cache_data.clear()
+
+
+def test_entry_stays_cached_until_its_version_changes(service):
+    service.read('A', exam_id='E1')
+    service.read('A', 'E1')
+    service.read(class_name='A', exam_id='E1')
+    assert service.reads == [('A', 'E1')]
+
+    service.versions[('E1', 'A')] += 1
+    service.read('A', 'E1')
+    assert len(service.reads) == 2
+
+
+def test_other_exams_and_classes_stay_cached(service):
+    service.read('A', 'E1')
+    service.read('B', 'E1')
+    service.read('A', 'E2')
+    service.versions[('E1', 'A')] += 1
+
+    service.read('B', 'E1')
+    service.read('A', 'E2')
+    assert len(service.reads) == 3
+    # A read over all exams depends on every version
+    service.read('A')
+    service.versions[('E2', 'A')] += 1
+    service.read('A')
+    assert service.reads[-2:] == [('A', None), ('A', None)]
+
+
+def test_upload_invalidates_only_the_changed_exam(tmp_path, sqlite_db, results):
+    first, second = results['ExID'].unique()[:2]
+    before = {exam_id: sqlite_db.get_exam_summary(exam_id) for exam_id in (first, second)}
+
+    changed = results.copy()
+    changed.loc[changed['ExID'] == first, 'ExMk'] += 1
+    ingest(tmp_path, changed)
+
+    misses = _cache_state.misses
+    updated = sqlite_db.get_exam_summary(first)
+    assert _cache_state.misses == misses + 1
+    assert updated['SumMarks'][0] == pytest.approx(before[first]['SumMarks'][0] + (results['ExID'] == first).sum())
+
+    # The other exam's version did not change, so its entry is still served from the cache
+    sqlite_db.get_exam_summary(second)
+    assert _cache_state.misses == misses + 1
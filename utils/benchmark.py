@@ -0,0 +1,318 @@
+"""Benchmark suite over synthetic exam results at several data sizes.
+
+For every size (rows = students x exams) the suite times two groups:
+
+- compute:  in-process work that needs no database - data generation, rank
+            computation, the subject matrix, student reports, item analysis
+            and chart construction (with the serialized chart size).
+- database: CSV ingest into a dedicated benchmark database, then every
+            DatabaseService getter cold (st.cache_data cleared) and warm, and
+            the ReportService reports. Skipped with --offline.
+
+The database group writes to the database named by --database (default
+``exam_db_benchmark``), which is created, migrated and emptied between sizes.
+Never point it at a database holding real results. With --backend sqlite or
+duckdb it runs against the file ``<database>.<backend>`` instead and needs no
+MySQL server.
+
+Results are written as JSON (stdout or --output). Pass --compare with an
+earlier result file to flag timings that got slower by more than --threshold:
+
+    python -m utils.benchmark --sizes 10000 100000 --output baseline.json
+    python -m utils.benchmark --sizes 10000 100000 --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from config.embedded import EMBEDDED_BACKENDS
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+EXAMS = 10
+# Question id lists make the CSV several times larger; leave them out above this size
+ITEM_IDS_MAX_ROWS = 100_000
+RESULT_TABLES = [
+    'exam_results', 'exam_result_hashes', 'students', 'exams', 'exam_subjects', 'student_exams',
+    'subject_scores', 'exam_summary', 'exam_class_summary', 'exam_class_subject_summary',
+    'exam_responses', 'data_versions',
+]
+
+
+def _time(func, repeat):
+    """Run `func` `repeat` times; return (seconds of each run, last result)"""
+    runs = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        runs.append(time.perf_counter() - started)
+    return runs, result
+
+
+class Suite:
+    def __init__(self, repeat=3, log=print):
+        self.repeat = repeat
+        self.log = log
+        self.results = []
+
+    def run(self, group, name, rows, func, repeat=None):
+        """Time `func`, record the result and return its last return value"""
+        runs, result = _time(func, repeat or self.repeat)
+        self.record(group, name, rows, runs)
+        return result
+
+    def record(self, group, name, rows, runs, **extra):
+        """Record the timings `runs` (seconds per run) of one measurement"""
+        self.results.append({
+            'group': group,
+            'name': name,
+            'rows': rows,
+            'seconds_min': min(runs),
+            'seconds_median': statistics.median(runs),
+            'runs': len(runs),
+            **extra,
+        })
+        self.log(f"{group:<9} {name:<38} {rows:>10,} rows  {min(runs):9.4f}s min  "
+                 f"{statistics.median(runs):9.4f}s median")
+
+
+def compute_benchmarks(suite, df):
+    """In-process benchmarks over one synthetic frame"""
+    from services.rank_engine import INPUT_COLUMNS, compute_ranks
+    from services.report_service import ReportService
+    from services.response_store import ResponseMatrix, item_analysis
+    from services.subject_matrix import SubjectMatrix
+    from utils.visualizations import (create_class_distribution_chart, create_performance_chart,
+                                      figure_payload_size)
+
+    rows = len(df)
+    exam_id = df['ExID'].iloc[0]
+    exam = df[df['ExID'] == exam_id].reset_index(drop=True)
+    inputs = exam.reindex(columns=INPUT_COLUMNS)
+
+    suite.run('compute', 'compute_ranks (one exam)', len(exam), lambda: compute_ranks(inputs))
+    matrix = suite.run('compute', 'SubjectMatrix.from_frame', rows, lambda: SubjectMatrix.from_frame(df))
+    suite.run('compute', 'SubjectMatrix.grouped_stats', rows, lambda: matrix.grouped_stats(df['STID']))
+    # build_student_reports is pure; constructing the service opens no connection
+    report_service = ReportService()
+    reports = suite.run('compute', 'build_student_reports', rows,
+                        lambda: report_service.build_student_reports(df))
+
+    responses = ResponseMatrix.from_frame(exam, 1)
+    if responses is not None:
+        suite.run('compute', 'ResponseMatrix.from_frame (one exam)', len(exam),
+                  lambda: ResponseMatrix.from_frame(exam, 1))
+        suite.run('compute', 'item_analysis (one exam)', len(exam), lambda: item_analysis(responses))
+
+    history = next(iter(reports.values()))['exam_history']
+    fig = suite.run('compute', 'create_performance_chart (student)', len(history),
+                    lambda: create_performance_chart(history))
+    suite.results[-1]['payload_bytes'] = figure_payload_size(fig)
+    fig = suite.run('compute', 'create_class_distribution_chart', rows,
+                    lambda: create_class_distribution_chart(df))
+    suite.results[-1]['payload_bytes'] = figure_payload_size(fig)
+
+
+def prepare_database(database):
+    """Create (if needed) and migrate the benchmark database, then empty its result tables"""
+    import mysql.connector
+
+    from config.database import DatabaseConfig
+    from services.embedded_store import SNAPSHOT_TABLES
+    from utils.migrations import migrate
+
+    config = DatabaseConfig()
+    if not config.embedded:
+        server = mysql.connector.connect(host=config.host, user=config.user, password=config.password,
+                                         port=config.port, connection_timeout=config.connect_timeout)
+        try:
+            cursor = server.cursor()
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{database}`")
+            cursor.close()
+        finally:
+            server.close()
+
+    connection = config.connect()
+    try:
+        migrate(connection, log=lambda message: None)
+        cursor = connection.cursor()
+        # The embedded schema has no normalized tables
+        for table in SNAPSHOT_TABLES if config.embedded else RESULT_TABLES:
+            cursor.execute(f"DELETE FROM `{table}`")
+        connection.commit()
+        cursor.close()
+    finally:
+        connection.close()
+
+
+def database_benchmarks(suite, df):
+    """Ingest `df` into the benchmark database and time the read paths against it"""
+    import streamlit as st
+
+    from services.database_service import DatabaseService
+    from services.ingest_service import IngestService
+    from services.report_service import ReportService
+
+    rows = len(df)
+    handle, path = tempfile.mkstemp(suffix='.csv')
+    os.close(handle)
+    try:
+        df.to_csv(path, index=False)
+        with open(path, 'rb') as source:
+            summary = IngestService(skip_unchanged=False).ingest_csv(source)
+        suite.record('database', 'ingest_csv', rows, [summary.elapsed_seconds],
+                     rows_per_second=summary.rows_per_second)
+    finally:
+        os.remove(path)
+
+    DatabaseService.refresh_data_versions()
+    db = DatabaseService()
+    reports = ReportService()
+    exam_id = df['ExID'].iloc[0]
+    class_name = df['CLASS'].iloc[0]
+    student_id = df['STID'].iloc[0]
+    reads = {
+        'get_all_students': db.get_all_students,
+        'get_exam_results (exam)': lambda: db.get_exam_results(exam_id),
+        'get_student_performance': lambda: db.get_student_performance(student_id),
+        'get_cohort_performance (class)': lambda: db.get_cohort_performance(class_name),
+        'get_class_analytics': lambda: db.get_class_analytics(class_name, exam_id),
+        'get_exam_catalog': db.get_exam_catalog,
+        'get_class_catalog': db.get_class_catalog,
+        'get_results_page (first page)': lambda: db.get_results_page(class_name, exam_id),
+        'get_top_performers': lambda: db.get_top_performers(class_name, exam_id),
+        'get_exam_summary': lambda: db.get_exam_summary(exam_id),
+        'get_class_summary': lambda: db.get_class_summary(class_name, exam_id),
+        'get_class_subject_summary': lambda: db.get_class_subject_summary(class_name, exam_id),
+        'get_class_comparison': lambda: db.get_class_comparison(exam_id),
+        'search_students': lambda: db.search_students("Student 00"),
+        'get_item_analysis': lambda: db.get_item_analysis(exam_id),
+        'generate_student_report': lambda: reports.generate_student_report(student_id),
+        'generate_class_report': lambda: reports.generate_class_report(class_name, exam_id),
+        'generate_comparative_analysis': lambda: reports.generate_comparative_analysis(exam_id),
+    }
+    for name, read in reads.items():
+        def cold():
+            st.cache_data.clear()
+            return read()
+        suite.run('database', f"{name} (cold)", rows, cold)
+        suite.run('database', f"{name} (warm)", rows, read)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Entries of `results` slower than the matching `baseline` entry by more than `threshold` (0.2 = 20%)"""
+    previous = {(r['group'], r['name'], r['rows']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        before = previous.get((result['group'], result['name'], result['rows']))
+        if not before or not before['seconds_min']:
+            continue
+        change = result['seconds_min'] / before['seconds_min'] - 1
+        if change > threshold:
+            regressions.append({**result, 'baseline_seconds_min': before['seconds_min'], 'change': change})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the app over synthetic exam results")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="row counts to run")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per measurement")
+    parser.add_argument('--offline', action='store_true', help="only run the compute group")
+    parser.add_argument('--database', default='exam_db_benchmark',
+                        help="database the database group writes to (created and emptied)")
+    parser.add_argument('--backend', choices=['mysql'] + EMBEDDED_BACKENDS, default='mysql',
+                        help="database engine of the database group")
+    parser.add_argument('--output', help="write the JSON results here instead of stdout")
+    parser.add_argument('--compare', help="earlier JSON results to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="relative slowdown reported as a regression (default 0.2)")
+    args = parser.parse_args(argv)
+
+    saved_env = {name: os.environ.get(name) for name in ('DB_NAME', 'DB_BACKEND', 'DB_PATH')}
+    if not args.offline:
+        # Before anything reads DatabaseConfig, so the app database is never touched
+        os.environ['DB_NAME'] = args.database
+        os.environ['DB_BACKEND'] = args.backend
+        if args.backend in EMBEDDED_BACKENDS:
+            path = f"{args.database}.{args.backend}"
+            app_path = saved_env['DB_PATH']
+            if app_path and os.path.abspath(app_path) == os.path.abspath(path):
+                parser.error(f"--database {args.database} would empty the app database {app_path} (DB_PATH)")
+            # DB_PATH would otherwise point the benchmark at the app's embedded database
+            os.environ['DB_PATH'] = path
+    try:
+        return _run(args)
+    finally:
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _run(args):
+    from utils.synthetic_data import generate_exam_results
+
+    suite = Suite(args.repeat, log=lambda message: print(message, file=sys.stderr))
+    for rows in args.sizes:
+        students = max(rows // EXAMS, 1)
+        df = suite.run('compute', 'generate_exam_results', students * EXAMS,
+                       lambda: generate_exam_results(students=students, exams=EXAMS,
+                                                     item_ids=rows <= ITEM_IDS_MAX_ROWS),
+                       repeat=1)
+        compute_benchmarks(suite, df)
+        if not args.offline:
+            prepare_database(args.database)
+            database_benchmarks(suite, df)
+
+    output = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': args.sizes,
+            'repeat': args.repeat,
+            'offline': args.offline,
+            'backend': None if args.offline else args.backend,
+        },
+        'results': suite.results,
+    }
+
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(suite.results, json.load(f), args.threshold)
+        output['regressions'] = regressions
+        for r in regressions:
+            print(f"REGRESSION {r['group']} {r['name']} ({r['rows']:,} rows): "
+                  f"{r['baseline_seconds_min']:.4f}s -> {r['seconds_min']:.4f}s (+{r['change']:.0%})",
+                  file=sys.stderr)
+        status = 1 if regressions else 0
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+    else:
+        json.dump(output, sys.stdout, indent=2)
+        print()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,11 @@ import pandas as pd
 import streamlit as st
 from datetime import datetime
 import re
+import time
+
+# Exam date formats accepted in uploads and the ExDt migration, in order of precedence:
+# ISO first, then day-first before month-first (so 03/04/2024 is 3 April)
+EXAM_DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%m/%d/%Y']
 
 def format_date(date_string):
     """Format date string for display"""
@@ -12,17 +17,43 @@ def format_date(date_string):
         # Handle different date formats
         if isinstance(date_string, str):
             # Try different date formats
-            for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y']:
+            for fmt in EXAM_DATE_FORMATS:
                 try:
                     date_obj = datetime.strptime(date_string, fmt)
                     return date_obj.strftime('%d %b %Y')
                 except ValueError:
                     continue
         
+        # DATE columns come back from MySQL as date objects
+        if hasattr(date_string, 'strftime'):
+            return date_string.strftime('%d %b %Y')
+        
         return str(date_string)
     except:
         return "Invalid Date"
 
+def normalize_exam_dates(dates):
+    """Convert a Series of exam date strings to ISO 'YYYY-MM-DD' for the DATE column.
+
+    Missing and blank values become None. Raises ValueError when any other
+    value matches none of EXAM_DATE_FORMATS, instead of storing it as NULL.
+    """
+    as_text = dates.astype(str).str.strip()
+    present = dates.notna() & (as_text != '')
+    parsed = pd.Series(pd.NaT, index=dates.index, dtype='datetime64[ns]')
+    for fmt in EXAM_DATE_FORMATS:
+        parsed = parsed.fillna(pd.to_datetime(as_text.str[:10], format=fmt, errors='coerce'))
+
+    unparseable = as_text[present & parsed.isna()]
+    if not unparseable.empty:
+        examples = ", ".join(repr(value) for value in unparseable.unique()[:3])
+        raise ValueError(
+            f"{len(unparseable)} exam dates are not in a known format (e.g. {examples}); "
+            "use YYYY-MM-DD, DD/MM/YYYY, DD-MM-YYYY or MM/DD/YYYY"
+        )
+    parsed = parsed.where(present)
+    return parsed.dt.strftime('%Y-%m-%d').astype(object).where(parsed.notna(), None)
+
 def format_score(score):
     """Format score for display"""
     try:
@@ -108,6 +139,17 @@ def export_to_csv(dataframe, filename):
         st.error(f"Error exporting to CSV: {e}")
         return None
 
+def show_load_time(started, fetch=None):
+    """Caption with the page's wall-clock load time since `started` (time.perf_counter())"""
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    caption = f"⏱️ Page data loaded in {elapsed_ms:,.0f} ms"
+    if fetch is not None and fetch.dataset_seconds:
+        caption += (
+            f" · {len(fetch.dataset_seconds)} datasets fetched in parallel in "
+            f"{fetch.wall_seconds * 1000:,.0f} ms ({fetch.serial_seconds * 1000:,.0f} ms one after another)"
+        )
+    st.caption(caption)
+
 def filter_dataframe(df, filters):
     """Apply multiple filters to dataframe"""
     filtered_df = df.copy()
@@ -0,0 +1,268 @@
+"""Timings and counters of the hot paths: queries, cache lookups, pandas compute, charts and pages.
+
+Every instrumented call adds a MetricEvent with record(). Events are kept
+- per Streamlit session for the current and the previous rerun (app.main
+  calls start_run() at the top of every rerun), and
+- aggregated per (kind, name) for the life of the process: call count, total
+  and maximum seconds, a latency histogram, rows, bytes and cache hits/misses.
+
+Queries slower than DB_SLOW_QUERY_MS are also kept, with their EXPLAIN plan,
+in the bounded slow_queries log (filled by DatabaseService._read_sql).
+
+snapshot() returns the aggregates as JSON-ready dicts and prometheus_text()
+renders them in the Prometheus text format. With METRICS_TEXTFILE set, that
+text is also written to the file after every rerun, for node_exporter's
+textfile collector.
+"""
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import asdict
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from models.data_models import MetricEvent, MetricStats
+
+KINDS = ['query', 'cache', 'compute', 'chart', 'page']
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bounds on what is kept per rerun and how many sessions are remembered
+MAX_RUN_EVENTS = 1000
+MAX_SESSIONS = 100
+TEXTFILE = os.getenv('METRICS_TEXTFILE')
+SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', 500))
+SLOW_QUERY_LOG_SIZE = int(os.getenv('DB_SLOW_QUERY_LOG_SIZE', 50))
+
+
+class Registry:
+    """Thread-safe store of the per-rerun events and process-wide aggregates"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._runs = OrderedDict()
+        self.started_at = time.time()
+
+    def record(self, event):
+        session = _session_id()
+        with self._lock:
+            stats = self._stats.get((event.kind, event.name))
+            if stats is None:
+                stats = self._stats[(event.kind, event.name)] = MetricStats(
+                    event.kind, event.name, buckets=[0] * (len(LATENCY_BUCKETS) + 1)
+                )
+            stats.count += 1
+            stats.seconds += event.seconds
+            stats.max_seconds = max(stats.max_seconds, event.seconds)
+            stats.rows += event.rows or 0
+            stats.bytes += event.bytes or 0
+            if event.cache_hit is not None:
+                if event.cache_hit:
+                    stats.cache_hits += 1
+                else:
+                    stats.cache_misses += 1
+            stats.buckets[_bucket(event.seconds)] += 1
+
+            run = self._runs.get(session)
+            if run is not None:
+                run['events'].append(event)
+
+    def start_run(self, page=None):
+        """Begin a new rerun of the current session; the last one becomes the previous run"""
+        session = _session_id()
+        with self._lock:
+            current = self._runs.pop(session, None)
+            self._runs[session] = {
+                'page': page,
+                'started': time.perf_counter(),
+                'events': deque(maxlen=MAX_RUN_EVENTS),
+                'previous': current and {
+                    'page': current['page'],
+                    'seconds': time.perf_counter() - current['started'],
+                    'events': list(current['events']),
+                },
+            }
+            while len(self._runs) > MAX_SESSIONS:
+                self._runs.popitem(last=False)
+
+    def set_page(self, page):
+        """Name the page the current rerun renders"""
+        with self._lock:
+            run = self._runs.get(_session_id())
+            if run is not None:
+                run['page'] = page
+
+    def previous_run(self):
+        """{'page', 'seconds', 'events'} of this session's previous rerun, or None"""
+        with self._lock:
+            run = self._runs.get(_session_id())
+            return run and run['previous']
+
+    def stats(self):
+        """Copies of the aggregates, sorted by kind and name"""
+        with self._lock:
+            return [
+                MetricStats(**asdict(stats))
+                for _, stats in sorted(self._stats.items(), key=lambda item: (KINDS.index(item[0][0]), item[0][1]))
+            ]
+
+    def reset(self):
+        """Drop the aggregates (per-rerun events are kept)"""
+        with self._lock:
+            self._stats.clear()
+            self.started_at = time.time()
+
+
+class SlowQueryLog:
+    """Thread-safe ring buffer of the most recent queries slower than a threshold"""
+
+    def __init__(self, threshold_seconds, size):
+        self.threshold_seconds = threshold_seconds
+        self._lock = threading.Lock()
+        self._entries = deque(maxlen=size)
+
+    def is_slow(self, seconds):
+        return seconds >= self.threshold_seconds
+
+    def add(self, entry):
+        """Keep a SlowQuery, dropping the oldest one when full"""
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self):
+        """Logged queries, newest first"""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+registry = Registry()
+slow_queries = SlowQueryLog(SLOW_QUERY_MS / 1000, SLOW_QUERY_LOG_SIZE)
+
+
+def _session_id():
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else None
+
+
+def _bucket(seconds):
+    for i, bound in enumerate(LATENCY_BUCKETS):
+        if seconds <= bound:
+            return i
+    return len(LATENCY_BUCKETS)
+
+
+def record(kind, name, seconds, rows=None, bytes=None, cache_hit=None):
+    """Add one observation"""
+    registry.record(MetricEvent(kind, name, seconds, rows, bytes, cache_hit))
+
+
+def start_run(page=None):
+    """Call at the top of every rerun, see Registry.start_run"""
+    registry.start_run(page)
+
+
+@contextmanager
+def timer(kind, name):
+    """Record the wall time of the block"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(kind, name, time.perf_counter() - started)
+
+
+def timed(kind, name=None):
+    """Decorator recording the wall time of every call under `name` (default: the function name)"""
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(kind, label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def percentile(stats, q):
+    """Upper bound of the latency bucket holding the q-th quantile (None past the last bound)"""
+    if not stats.count:
+        return None
+    target = q * stats.count
+    seen = 0
+    for bound, observations in zip(LATENCY_BUCKETS, stats.buckets):
+        seen += observations
+        if seen >= target:
+            return bound
+    return None
+
+
+def snapshot():
+    """Aggregates as JSON-ready dicts, with the bucket bounds"""
+    return {
+        'started_at': registry.started_at,
+        'generated_at': time.time(),
+        'latency_buckets': list(LATENCY_BUCKETS),
+        'metrics': [
+            dict(asdict(stats), mean_seconds=stats.mean_seconds, p95_seconds=percentile(stats, 0.95))
+            for stats in registry.stats()
+        ],
+    }
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(stats, **extra):
+    labels = {'kind': stats.kind, 'name': stats.name, **extra}
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def prometheus_text(prefix="exam_app"):
+    """Aggregates in the Prometheus text exposition format"""
+    stats = registry.stats()
+    lines = [
+        f"# HELP {prefix}_duration_seconds Wall time of instrumented operations",
+        f"# TYPE {prefix}_duration_seconds histogram",
+    ]
+    for s in stats:
+        cumulative = 0
+        for bound, observations in zip(list(LATENCY_BUCKETS) + ['+Inf'], s.buckets):
+            cumulative += observations
+            lines.append(f"{prefix}_duration_seconds_bucket{_labels(s, le=bound)} {cumulative}")
+        lines.append(f"{prefix}_duration_seconds_sum{_labels(s)} {s.seconds:.6f}")
+        lines.append(f"{prefix}_duration_seconds_count{_labels(s)} {s.count}")
+
+    for metric, field, help_text in [
+        ('rows_total', 'rows', "Rows fetched by queries"),
+        ('bytes_total', 'bytes', "Bytes of the DataFrames fetched by queries"),
+    ]:
+        lines += [f"# HELP {prefix}_{metric} {help_text}", f"# TYPE {prefix}_{metric} counter"]
+        lines += [f"{prefix}_{metric}{_labels(s)} {getattr(s, field)}" for s in stats if s.kind == 'query']
+
+    lines += [
+        f"# HELP {prefix}_cache_lookups_total Cached DatabaseService reads by result",
+        f"# TYPE {prefix}_cache_lookups_total counter",
+    ]
+    for s in stats:
+        if s.kind == 'cache':
+            lines.append(f"{prefix}_cache_lookups_total{_labels(s, result='hit')} {s.cache_hits}")
+            lines.append(f"{prefix}_cache_lookups_total{_labels(s, result='miss')} {s.cache_misses}")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path=TEXTFILE):
+    """Write prometheus_text() to `path` atomically (no-op when METRICS_TEXTFILE is unset)"""
+    if not path:
+        return
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'w') as f:
+        f.write(prometheus_text())
+    os.replace(temporary, path)
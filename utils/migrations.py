@@ -0,0 +1,203 @@
+"""Versioned schema migrations for the exam results database.
+
+Each migration is applied once and recorded in ``schema_migrations``, so an
+existing deployment can be upgraded in place:
+
+    python -m utils.migrations            # apply everything pending
+    python -m utils.migrations --status   # list applied / pending versions
+    python -m utils.migrations --target 2 # stop after version 2
+
+MySQL commits DDL implicitly, so a migration that fails half-way is not rolled
+back and is not recorded; undo its partial changes before re-running.
+"""
+import argparse
+import sys
+
+import pandas as pd
+
+from config.embedded import dialect
+from models.schema import EXAM_RESULTS_COLUMNS
+from services import embedded_store, normalized_store, response_store, summary_store
+from services.ingest_service import DATA_VERSIONS_DDL, HASH_TABLE_DDL
+from utils.helpers import normalize_exam_dates
+
+# exam_results as originally created by utils/createdb.py (ExDt was a VARCHAR)
+_INITIAL_TYPES = {'ExDt': 'VARCHAR(32)'}
+
+
+def _create_exam_results():
+    columns = ",\n    ".join(
+        f"{name} {_INITIAL_TYPES.get(name, sql_type)}" for name, sql_type in EXAM_RESULTS_COLUMNS
+    )
+    return f"""
+CREATE TABLE IF NOT EXISTS exam_results (
+    {columns},
+    PRIMARY KEY (STID, ExID)
+)
+"""
+
+
+def _convert_exam_dates(cursor):
+    """Fill a new DATE column ExDate from the VARCHAR ExDt.
+
+    The values are parsed in Python by utils.helpers.normalize_exam_dates, so
+    the migration accepts exactly the formats the upload does. Any value it
+    cannot parse stops the migration before the table is altered, rather than
+    being stored as NULL.
+    """
+    cursor.execute("SELECT DISTINCT ExDt FROM exam_results WHERE ExDt IS NOT NULL AND ExDt <> ''")
+    values = pd.Series([row[0] for row in cursor.fetchall()], dtype=object)
+    dates = normalize_exam_dates(values)
+    cursor.execute("ALTER TABLE exam_results ADD COLUMN ExDate DATE AFTER ExDt")
+    cursor.executemany("UPDATE exam_results SET ExDate = %s WHERE ExDt = %s", list(zip(dates, values)))
+
+
+MIGRATIONS = [
+    (1, "Create exam_results table", [
+        _create_exam_results(),
+    ]),
+    (2, "Store ExDt as a DATE instead of a VARCHAR", [
+        _convert_exam_dates,
+        "ALTER TABLE exam_results DROP COLUMN ExDt",
+        "ALTER TABLE exam_results CHANGE COLUMN ExDate ExDt DATE",
+    ]),
+    (3, "Add secondary indexes matching DatabaseService queries", [
+        # get_exam_results(exam_id=...): WHERE ExID = %s ORDER BY ExRnk
+        "CREATE INDEX idx_exam_rank ON exam_results (ExID, ExRnk)",
+        # get_class_analytics / get_exam_results(class_filter=...): WHERE CLASS = %s [AND ExID = %s] ORDER BY ExRnk
+        "CREATE INDEX idx_class_exam_rank ON exam_results (CLASS, ExID, ExRnk)",
+        # get_student_performance: WHERE STID = %s ORDER BY ExDt DESC
+        "CREATE INDEX idx_student_date ON exam_results (STID, ExDt)",
+        # get_available_exams: DISTINCT ExID, EXNM, ExDt ORDER BY ExDt DESC, answered from the index
+        "CREATE INDEX idx_exam_catalog ON exam_results (ExDt, ExID, EXNM)",
+    ]),
+    (4, "Create normalized students/exams/subject score tables and backfill them", [
+        normalized_store.create_and_backfill,
+    ]),
+    (5, "Track a content hash per uploaded exam_results row", [
+        HASH_TABLE_DDL,
+    ]),
+    (6, "Create exam / class / subject summary tables and backfill them", [
+        summary_store.create_and_backfill,
+    ]),
+    (7, "Track a data version per exam and class for cache invalidation", [
+        DATA_VERSIONS_DDL,
+        """
+        INSERT IGNORE INTO data_versions (ExID, CLASS, Version)
+        SELECT DISTINCT ExID, COALESCE(CLASS, ''), 1 FROM exam_results
+        """,
+    ]),
+    (8, "Index the students dimension for student search", [
+        # STID is the primary key and STNAME / (CLASS, STNAME) are indexed since migration 4
+        "CREATE INDEX idx_students_rollno ON students (ROLLNO)",
+        "CREATE INDEX idx_students_class_rollno ON students (CLASS, ROLLNO)",
+    ]),
+    (9, "Create the bit-packed question response store and backfill it", [
+        response_store.create_and_backfill,
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def ensure_version_table(cursor):
+    """Create the schema_migrations bookkeeping table if it is missing"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def applied_versions(cursor):
+    """Return the set of migration versions already applied"""
+    ensure_version_table(cursor)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def current_version(connection):
+    """Return the highest applied migration version (0 for an empty database)"""
+    cursor = connection.cursor()
+    try:
+        return max(applied_versions(cursor), default=0)
+    finally:
+        cursor.close()
+
+
+def migrate(connection, target=None, log=print):
+    """Apply pending migrations up to `target` (default: latest) and return their versions"""
+    target = LATEST_VERSION if target is None else target
+    cursor = connection.cursor()
+    applied = []
+    try:
+        if dialect(cursor) != 'mysql':
+            return _create_embedded(connection, cursor, log)
+        done = applied_versions(cursor)
+        for version, description, steps in MIGRATIONS:
+            if version in done or version > target:
+                continue
+            log(f"Applying migration {version}: {description}")
+            for step in steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                (version, description)
+            )
+            connection.commit()
+            applied.append(version)
+    finally:
+        cursor.close()
+    return applied
+
+
+def _create_embedded(connection, cursor, log):
+    """Embedded databases start at the latest schema; record every version as applied"""
+    embedded_store.create_schema(cursor)
+    done = applied_versions(cursor)
+    pending = [(version, description) for version, description, _ in MIGRATIONS if version not in done]
+    if pending:
+        log(f"Creating the embedded schema at version {LATEST_VERSION}")
+        cursor.executemany("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)", pending)
+        connection.commit()
+    return [version for version, _ in pending]
+
+
+def main(argv=None):
+    from config.database import DatabaseConfig
+
+    parser = argparse.ArgumentParser(description="Upgrade the exam results schema")
+    parser.add_argument('--target', type=int, help="stop after this version")
+    parser.add_argument('--status', action='store_true', help="list migrations without applying")
+    args = parser.parse_args(argv)
+
+    connection = DatabaseConfig().connect()
+    try:
+        if args.status:
+            cursor = connection.cursor()
+            try:
+                done = applied_versions(cursor)
+            finally:
+                cursor.close()
+            for version, description, _ in MIGRATIONS:
+                state = "applied" if version in done else "pending"
+                print(f"{version:>4}  {state:<8} {description}")
+            return 0
+
+        applied = migrate(connection, target=args.target)
+        if applied:
+            print(f"Schema upgraded to version {applied[-1]}")
+        else:
+            print(f"Schema already at version {current_version(connection)}")
+        return 0
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Synthetic exam_results rows for benchmarks and local development.
+
+Rows follow models.schema (the table created by utils/migrations.py): one row
+per student and exam, subject names and marks for the first `subjects` slots,
+question counts and optionally the QS*CorIds/IncorIds/Leftids id lists. Rank,
+count and group-stat columns are filled by services.rank_engine, so the data
+is internally consistent. Only populated columns are emitted.
+
+Write a CSV with ``python -m utils.synthetic_data results.csv --students 10000 --exams 10``.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from models.schema import DEFAULT_SUBJECT_NAMES, MAX_SUBJECTS, subject_column
+from services.rank_engine import INPUT_COLUMNS, compute_ranks
+
+MARKS_PER_CORRECT = 4
+MARKS_PER_INCORRECT = -1
+
+
+def _id_lists(mask):
+    """Comma-separated 1-based column numbers of the True cells of each row of `mask`"""
+    lists = np.full(mask.shape[0], '', dtype=object)
+    for j in range(mask.shape[1]):
+        token = f"{j + 1},"
+        lists = lists + np.where(mask[:, j], token, '')
+    return pd.Series(lists).str.rstrip(',').replace('', None).to_numpy()
+
+
+def generate_exam_results(students=1000, classes=10, exams=5, subjects=4, questions=45,
+                          item_ids=True, seed=0):
+    """DataFrame of students x exams synthetic exam_results rows with schema column names"""
+    if not 1 <= subjects <= MAX_SUBJECTS:
+        raise ValueError(f"subjects must be between 1 and {MAX_SUBJECTS}")
+    rng = np.random.default_rng(seed)
+
+    student_ids = np.array([f"ST{i:07d}" for i in range(students)], dtype=object)
+    student_class = np.array([f"Class {c + 1:02d}" for c in rng.integers(0, classes, students)], dtype=object)
+    ability = rng.normal(0, 1, students)
+    exam_dates = pd.date_range('2024-01-07', periods=exams, freq='14D').strftime('%Y-%m-%d')
+
+    # Rows are exam-major: all students of exam 1, then exam 2, ...
+    rows = students * exams
+    student = np.tile(np.arange(students), exams)
+    exam = np.repeat(np.arange(exams), students)
+
+    df = pd.DataFrame({
+        'STID': student_ids[student],
+        'STNAME': np.array([f"Student {i:07d}" for i in range(students)], dtype=object)[student],
+        'FATHER': np.array([f"Parent {i:07d}" for i in range(students)], dtype=object)[student],
+        'ROLLNO': np.array([f"{i + 1:06d}" for i in range(students)], dtype=object)[student],
+        'CLASS': student_class[student],
+        'ExID': (exam + 1001).astype(str),
+        'EXNM': np.array([f"Mock Test {e + 1}" for e in range(exams)], dtype=object)[exam],
+        'ExDt': np.asarray(exam_dates, dtype=object)[exam],
+        'Duration': '180',
+        'QTYPE': 'MCQ',
+    })
+    df['PHONE'] = np.array([f"98{i:08d}" for i in range(students)], dtype=object)[student]
+
+    totals = np.zeros(rows)
+    for i in range(1, subjects + 1):
+        difficulty = rng.normal(0, 1, questions)
+        p_correct = 1 / (1 + np.exp(-(ability[student][:, None] - difficulty[None, :])))
+        draw = rng.random((rows, questions))
+        correct = draw < p_correct * 0.9
+        skipped = ~correct & (draw > 0.9)
+        incorrect = ~correct & ~skipped
+
+        marks = (correct.sum(axis=1) * MARKS_PER_CORRECT + incorrect.sum(axis=1) * MARKS_PER_INCORRECT).astype(float)
+        totals += marks
+        values = {
+            'S{}NM': DEFAULT_SUBJECT_NAMES.get(i, f"Subject {i}"),
+            'S{}Max': questions * MARKS_PER_CORRECT,
+            'S{}Min': questions * MARKS_PER_INCORRECT,
+            'QS{}Cor': correct.sum(axis=1),
+            'QS{}Inc': incorrect.sum(axis=1),
+            'QS{}Una': skipped.sum(axis=1),
+        }
+        if item_ids:
+            values['QS{}CorIds'] = _id_lists(correct)
+            values['QS{}IncorIds'] = _id_lists(incorrect)
+            values['QS{}Leftids'] = _id_lists(skipped)
+        values['S{}Mk'] = marks
+        for template, value in values.items():
+            df[subject_column(template, i)] = value
+
+    df['ExMk'] = totals
+    # Cumulative marks over the exams so far, in date order
+    df['AllExMk'] = df.groupby('STID', sort=False)['ExMk'].cumsum()
+    df['AllExCount'] = exam + 1
+
+    derived = pd.concat(
+        compute_ranks(group.reindex(columns=INPUT_COLUMNS)) for _, group in df.groupby('ExID', sort=False)
+    )
+    # Group stats of the unused subject slots are all NULL; leave those columns out
+    derived = derived.dropna(axis=1, how='all')
+    for column in derived.columns.drop('STID'):
+        df[column] = derived[column]
+    df['CLASSSTCOUNT'] = df.groupby('CLASS')['STID'].transform('nunique')
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic exam results as CSV")
+    parser.add_argument('output', help="CSV file to write")
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--classes', type=int, default=10)
+    parser.add_argument('--exams', type=int, default=5)
+    parser.add_argument('--subjects', type=int, default=4)
+    parser.add_argument('--questions', type=int, default=45)
+    parser.add_argument('--no-item-ids', action='store_true', help="leave out the QS*Ids question lists")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    df = generate_exam_results(args.students, args.classes, args.exams, args.subjects,
+                               args.questions, not args.no_item_ids, args.seed)
+    df.to_csv(args.output, index=False)
+    print(f"Wrote {len(df):,} rows x {len(df.columns)} columns to {args.output}")
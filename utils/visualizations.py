@@ -1,14 +1,64 @@
+import os
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
+from utils.instrumentation import timed
 
+# Series longer than this are drawn with WebGL (Scattergl) instead of SVG
+WEBGL_THRESHOLD = int(os.getenv('CHART_WEBGL_THRESHOLD', 1000))
+# Time series longer than this are reduced to their per-bucket min/max points
+MAX_SERIES_POINTS = int(os.getenv('CHART_MAX_POINTS', 2000))
+HISTOGRAM_BINS = 20
+
+
+def downsample(x, y, max_points=MAX_SERIES_POINTS):
+    """Reduce a series sorted by x to at most `max_points` points.
+
+    Keeps the minimum and maximum of each bucket so peaks and dips survive.
+    Returns (x, y) as arrays.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    if len(y) <= max_points:
+        return x, y
+
+    buckets = max(max_points // 2, 1)
+    bounds = np.linspace(0, len(y), buckets + 1).astype(int)
+    starts, ends = bounds[:-1], bounds[1:]
+    # Per-bucket argmin/argmax without a Python loop: pad buckets to equal width
+    width = int((ends - starts).max())
+    positions = np.minimum(starts[:, None] + np.arange(width), ends[:, None] - 1)
+    values = y[positions]
+    filled_low = np.where(np.isnan(values), np.inf, values)
+    filled_high = np.where(np.isnan(values), -np.inf, values)
+    keep = np.concatenate([
+        positions[np.arange(buckets), filled_low.argmin(axis=1)],
+        positions[np.arange(buckets), filled_high.argmax(axis=1)],
+    ])
+    keep = np.unique(keep)
+    return x[keep], y[keep]
+
+
+def figure_payload_size(fig):
+    """Size in bytes of the figure JSON sent to the browser"""
+    return len(fig.to_json().encode('utf-8'))
+
+
+def _scatter(n_points):
+    return go.Scattergl if n_points > WEBGL_THRESHOLD else go.Scatter
+
+@timed('chart')
 def create_performance_chart(exam_history):
-    """Create performance trend chart"""
+    """Create performance trend chart (WebGL and downsampled for long histories)"""
+    history = exam_history.sort_values('ExDt')
+    x, y = downsample(history['ExDt'].to_numpy(), history['ExMk'].to_numpy())
+    
     fig = go.Figure()
     
-    fig.add_trace(go.Scatter(
-        x=exam_history['ExDt'],
-        y=exam_history['ExMk'],
+    fig.add_trace(_scatter(len(y))(
+        x=x,
+        y=y,
         mode='lines+markers',
         name='Total Marks',
         line=dict(color='blue', width=3),
@@ -24,6 +74,7 @@ def create_performance_chart(exam_history):
     
     return fig
 
+@timed('chart')
 def create_subject_radar_chart(subject_performance):
     """Create radar chart for subject performance"""
     subjects = list(subject_performance.keys())
@@ -42,7 +93,7 @@ def create_subject_radar_chart(subject_performance):
         polar=dict(
             radialaxis=dict(
                 visible=True,
-                range=[0, max(averages) * 1.1]
+                range=[0, max(averages, default=0) * 1.1]
             )),
         showlegend=True,
         title="Subject-wise Performance"
@@ -50,23 +101,41 @@ def create_subject_radar_chart(subject_performance):
     
     return fig
 
-def create_class_distribution_chart(data):
-    """Create score distribution histogram"""
-    fig = px.histogram(
-        data, 
-        x='ExMk', 
-        nbins=20,
-        title="Score Distribution",
-        labels={'ExMk': 'Total Marks', 'count': 'Number of Students'}
-    )
+@timed('chart')
+def create_class_distribution_chart(data=None, histogram=None, bins=HISTOGRAM_BINS):
+    """Create score distribution histogram.
+
+    Pass pre-binned `histogram` as (edges, counts), e.g. from the summary
+    tables, or raw rows as `data`; raw ExMk values are binned here with NumPy so
+    only the bin counts are sent to the browser.
+    """
+    if histogram is None:
+        marks = pd.to_numeric(data['ExMk'], errors='coerce').dropna().to_numpy()
+        if marks.size == 0:
+            return go.Figure(layout=dict(title="Score Distribution"))
+        counts, edges = np.histogram(marks, bins=bins)
+    else:
+        edges, counts = histogram
+    edges = np.asarray(edges, dtype=float)
+    
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=np.round(np.asarray(counts, dtype=float), 1),
+        width=np.diff(edges),
+        customdata=np.stack([edges[:-1], edges[1:]], axis=1),
+        hovertemplate="%{customdata[0]:.1f} - %{customdata[1]:.1f}: %{y} students<extra></extra>"
+    ))
     
     fig.update_layout(
+        title="Score Distribution",
         xaxis_title="Total Marks",
-        yaxis_title="Number of Students"
+        yaxis_title="Number of Students",
+        bargap=0
     )
     
     return fig
 
+@timed('chart')
 def create_subject_comparison_chart(subject_averages):
     """Create subject comparison bar chart"""
     subjects = list(subject_averages.keys())